@@ -132,19 +132,34 @@ class WindowSpecification(object):
     .. automethod:: __getattribute__
     .. automethod:: __getitem__
     """
-    WAIT_CRITERIA_MAP = {'visible': lambda ctrl, timeout, retry_interval: ctrl.wait_visible(timeout, retry_interval),
-                         'enabled': lambda ctrl, timeout, retry_interval: ctrl.wait_enabled(timeout, retry_interval),
-                         'active': lambda ctrl, timeout, retry_interval: ctrl.wait_active(timeout, retry_interval),
+    WAIT_CRITERIA_MAP = {'visible': lambda ctrl, timeout, retry_interval, notifier=None: wait_until(
+                             timeout, retry_interval, ctrl.is_visible, notifier=notifier),
+                         'enabled': lambda ctrl, timeout, retry_interval, notifier=None: wait_until(
+                             timeout, retry_interval, ctrl.is_enabled, notifier=notifier),
+                         'active': lambda ctrl, timeout, retry_interval, notifier=None: wait_until(
+                             timeout, retry_interval, ctrl.is_active, notifier=notifier),
                          }
 
-    WAIT_NOT_CRITERIA_MAP = {'visible': lambda ctrl, timeout, retry_interval: ctrl.wait_not_visible(timeout,
-                                                                                                    retry_interval),
-                             'enabled': lambda ctrl, timeout, retry_interval: ctrl.wait_not_enabled(timeout,
-                                                                                                    retry_interval),
-                             'active': lambda ctrl, timeout, retry_interval: ctrl.wait_not_active(timeout,
-                                                                                                  retry_interval),
+    WAIT_NOT_CRITERIA_MAP = {'visible': lambda ctrl, timeout, retry_interval, notifier=None: wait_until(
+                                 timeout, retry_interval, ctrl.is_visible, False, notifier=notifier),
+                             'enabled': lambda ctrl, timeout, retry_interval, notifier=None: wait_until(
+                                 timeout, retry_interval, ctrl.is_enabled, False, notifier=notifier),
+                             'active': lambda ctrl, timeout, retry_interval, notifier=None: wait_until(
+                                 timeout, retry_interval, ctrl.is_active, False, notifier=notifier),
                              }
 
+    cache_resolved = False
+    """Reuse the elements found for the criteria levels while they are alive and still match the criteria
+
+    A reused element is not checked for ambiguity and best_match, found_index
+    and ctrl_index are not evaluated against the current tree again,
+    so the cache is opt-in."""
+
+    event_driven_wait = False
+    """Retry find(), exists(), not_exists(), wait() and wait_not() after the backend reports
+    a change of the tree instead of every retry_interval (polling is used if the backend
+    has no event listener)"""
+
     def __init__(self, search_criteria, allow_magic_lookup=True):
         """
         Initialize the class
@@ -165,6 +180,12 @@ class WindowSpecification(object):
         self.backend = backend.registry.backends[search_criteria['backend']]
         self.allow_magic_lookup = allow_magic_lookup
 
+        # criteria level -> (criteria without parent, findwindows.Criteria)
+        self._compiled_criteria = {}
+        # criteria level -> (criteria without parent, parent, found element info),
+        # shared with the specifications created by by() and item access
+        self._resolved_elements = {}
+
         # Non PEP-8 aliases for partial backward compatibility
         self.wrapper_object = deprecated(self.find, deprecated_name='wrapper_object')
         self.child_window = deprecated(self.by, deprecated_name="child_window")
@@ -197,49 +218,109 @@ class WindowSpecification(object):
             del criteria[0]['app']
         return criteria
 
-    def __find_base(self, criteria_, timeout, retry_interval):
+    def _get_compiled_criteria(self, level, criteria, cached=True):
+        """Return findwindows.Criteria for the criteria of the level compiled once
+
+        The parent is resolved for every search so it is not compiled.
+        With cached=False the criteria are compiled again and the compiled
+        criteria of the spec (with their statistics) are left untouched.
+        """
+        kwargs = dict((key, value) for key, value in criteria.items() if key != 'parent')
+        if not cached:
+            return findwindows.Criteria(**kwargs)
+        compiled_kwargs, compiled = self._compiled_criteria.get(level, (None, None))
+        if compiled_kwargs != kwargs:
+            compiled = findwindows.Criteria(**kwargs)
+            self._compiled_criteria[level] = (kwargs, compiled)
+        return compiled
+
+    @staticmethod
+    def _is_resolved_element_valid(criteria, element, parent, resolved_parent):
+        """Return True if the element found before can be reused for the criteria
+
+        The element must be alive, have the same parent and still match
+        the properties and the predicate of the criteria.
+        """
+        if parent is not resolved_parent and parent != resolved_parent:
+            return False
+        if criteria.active_only or not element.is_alive():
+            return False
+        if not criteria.match(element):
+            return False
+        return criteria.predicate_func is None or criteria.predicate_func(element)
+
+    def _get_resolved_elements(self):
+        """Return the cache of the found elements for a find() call
+
+        Without cache_resolved the elements are kept during the retries
+        of one call only, so a retry resumes from the last found level.
+        """
+        if self.cache_resolved:
+            return self._resolved_elements
+        return {}
+
+    def _get_change_notifier(self):
+        """Return the timings.ChangeNotifier of the backend for the event driven wait or None to poll"""
+        if not self.event_driven_wait:
+            return None
+        process = self.app.process if self.app is not None else self.criteria[0].get('pid', None)
+        return self.backend.element_info_class.get_change_notifier(process)
+
+    def _find_element(self, level, criteria, resolved_elements):
+        """Find the element for the criteria level or reuse the one found before"""
+        compiled = self._get_compiled_criteria(level, criteria)
+        parent = criteria.get('parent')
+        parent = getattr(parent, 'element_info', parent)
+        kwargs, resolved_parent, element = resolved_elements.get(level, (None, None, None))
+        if kwargs == compiled.kwargs and \
+                self._is_resolved_element_valid(compiled, element, parent, resolved_parent):
+            return element
+
+        element = findwindows.find_element(criteria=compiled, parent=parent)
+        resolved_elements[level] = (compiled.kwargs, parent, element)
+        return element
+
+    def __find_base(self, criteria_, timeout, retry_interval, resolved_elements=None):
         time_left = timeout
         start = timestamp()
+        if resolved_elements is None:
+            resolved_elements = self._get_resolved_elements()
         criteria = self._get_updated_criteria(criteria_)
-        dialog = self.backend.generic_wrapper_class(findwindows.find_element(**criteria[0]))
-        if len(criteria) > 1:
-            ctrls = []
-            previous_parent = dialog.element_info
-            for ctrl_criteria in criteria[1:]:
-                ctrl_criteria["top_level_only"] = False
-                if "parent" not in ctrl_criteria:
-                    ctrl_criteria["parent"] = previous_parent
-
-                if isinstance(ctrl_criteria["parent"], WindowSpecification):
-                    time_left -= timestamp() - start
-                    if time_left <= 0.0:
-                        raise TimeoutError("Timed out: can not find parent {} for the control with the given"
-                                           "criteria {}.".format(ctrl_criteria['parent'], ctrl_criteria))
-                    ctrl_criteria["parent"] = ctrl_criteria["parent"].find(time_left, retry_interval)
-
-                # resolve the control and return it
-                if 'backend' not in ctrl_criteria:
-                    ctrl_criteria['backend'] = self.backend.name
-
-                ctrl = self.backend.generic_wrapper_class(findwindows.find_element(**ctrl_criteria))
-                previous_parent = ctrl.element_info
-                ctrls.append(ctrl)
-            return ctrls[-1]
-        else:
-            return dialog
+        # only the element of the last level is wrapped
+        element = self._find_element(0, criteria[0], resolved_elements)
+        for level, ctrl_criteria in enumerate(criteria[1:], 1):
+            ctrl_criteria["top_level_only"] = False
+            if "parent" not in ctrl_criteria:
+                ctrl_criteria["parent"] = element
+
+            if isinstance(ctrl_criteria["parent"], WindowSpecification):
+                time_left -= timestamp() - start
+                if time_left <= 0.0:
+                    raise TimeoutError("Timed out: can not find parent {} for the control with the given"
+                                       "criteria {}.".format(ctrl_criteria['parent'], ctrl_criteria))
+                ctrl_criteria["parent"] = ctrl_criteria["parent"].find(time_left, retry_interval)
+
+            # resolve the control and return it
+            if 'backend' not in ctrl_criteria:
+                ctrl_criteria['backend'] = self.backend.name
 
-    def __find_all_base(self, criteria_, timeout, retry_interval):
+            element = self._find_element(level, ctrl_criteria, resolved_elements)
+        return self.backend.generic_wrapper_class(element)
+
+    def __find_all_base(self, criteria_, timeout, retry_interval, resolved_elements=None, cache_last_level=True):
         time_left = timeout
         start = timestamp()
 
         if len(criteria_) == 1:
             criteria = self._get_updated_criteria(criteria_)
-            dialogs = findwindows.find_elements(**criteria[0])
+            dialogs = findwindows.find_elements(
+                criteria=self._get_compiled_criteria(0, criteria[0], cache_last_level),
+                parent=criteria[0].get('parent'))
             return [self.backend.generic_wrapper_class(dialog) for dialog in dialogs]
 
         else:
-            previous_ctrl = self.__find_base(criteria_[:-1], time_left, retry_interval)
-            previous_parent = previous_ctrl.element_info
+            previous_parent = self.__find_base(criteria_[:-1], time_left, retry_interval,
+                                               resolved_elements).element_info
             ctrl_criteria = criteria_[-1]
             ctrl_criteria["top_level_only"] = False
             if "parent" not in ctrl_criteria:
@@ -256,7 +337,9 @@ class WindowSpecification(object):
             if 'backend' not in ctrl_criteria:
                 ctrl_criteria['backend'] = self.backend.name
 
-            all_ctrls = findwindows.find_elements(**ctrl_criteria)
+            all_ctrls = findwindows.find_elements(
+                criteria=self._get_compiled_criteria(len(criteria_) - 1, ctrl_criteria, cache_last_level),
+                parent=ctrl_criteria['parent'])
             return [self.backend.generic_wrapper_class(ctrl) for ctrl in all_ctrls]
 
     def find(self, timeout=None, retry_interval=None):
@@ -290,6 +373,8 @@ class WindowSpecification(object):
                 self.criteria,
                 timeout,
                 retry_interval,
+                self._get_resolved_elements(),
+                notifier=self._get_change_notifier(),
             )
         except TimeoutError as e:
             raise e.original_exception
@@ -327,12 +412,58 @@ class WindowSpecification(object):
                 self.criteria,
                 timeout,
                 retry_interval,
+                self._get_resolved_elements(),
+                notifier=self._get_change_notifier(),
             )
         except TimeoutError as e:
             raise e.original_exception
 
         return ctrls
 
+    def explain_match(self, k=5, timeout=None, retry_interval=None):
+        """
+        Return the k best candidates of the best_match lookup as (name, ratio, variant, control)
+
+        The candidates are the controls matching the other criteria of the last
+        level. They are sorted by the match ratio of their best_match names
+        (see :func:`pywinauto.findbestmatch.find_best_control_matches_topk`),
+        so the names of the runner-up controls are shown when a wrong one is found.
+
+        * **k** - the number of candidates to return (default 5)
+        * **timeout** -  maximum length of time to try to find the controls (default 5)
+        * **retry_interval** - how long to wait between each retry (default .09)
+        """
+        criteria = [crit.copy() for crit in self.criteria]
+        if 'best_match' not in criteria[-1]:
+            raise ValueError('There is no best_match in the criteria {}'.format(self.criteria[-1]))
+        search_text = criteria[-1].pop('best_match')
+        criteria[-1].pop('found_index', None)
+
+        if timeout is None:
+            timeout = Timings.window_find_timeout
+        if retry_interval is None:
+            retry_interval = Timings.window_find_retry
+
+        try:
+            candidates = wait_until_passes(
+                timeout,
+                retry_interval,
+                self.__find_all_base,
+                (findwindows.ElementNotFoundError,
+                 controls.InvalidWindowHandle,
+                 controls.InvalidElement),
+                criteria,
+                timeout,
+                retry_interval,
+                self._get_resolved_elements(),
+                # the criteria without best_match must not replace the compiled ones
+                False,
+            )
+        except TimeoutError as e:
+            raise e.original_exception
+
+        return findbestmatch.find_best_control_matches_topk(search_text, candidates, k)
+
     def wait(self, wait_for, timeout=None, retry_interval=None):
         """
         (DEPRECATED) Wait for the window to be in a particular state/states.
@@ -385,6 +516,7 @@ class WindowSpecification(object):
             if 'enabled' not in correct_wait_for:
                 correct_wait_for.append('enabled')
 
+        notifier = self._get_change_notifier()
         for condition in correct_wait_for:
             time_left -= timestamp() - start
             if time_left <= 0.0:
@@ -394,7 +526,7 @@ class WindowSpecification(object):
             elif condition not in WindowSpecification.WAIT_CRITERIA_MAP.keys():
                 raise SyntaxError("Invalid criteria: {}!".format(condition))
             else:
-                WindowSpecification.WAIT_CRITERIA_MAP[condition](ctrl, time_left, retry_interval)
+                WindowSpecification.WAIT_CRITERIA_MAP[condition](ctrl, time_left, retry_interval, notifier=notifier)
 
         return ctrl
 
@@ -453,6 +585,7 @@ class WindowSpecification(object):
                     controls.InvalidElement,
                     TimeoutError) as e:
                 return
+            notifier = self._get_change_notifier()
             for condition in correct_wait_for:
                 time_left -= timestamp() - start
                 if time_left <= 0.0:
@@ -460,14 +593,18 @@ class WindowSpecification(object):
                 if condition not in WindowSpecification.WAIT_NOT_CRITERIA_MAP.keys():
                     raise SyntaxError("Invalid criteria: {}!".format(condition))
                 else:
-                    WindowSpecification.WAIT_NOT_CRITERIA_MAP[condition](ctrl, time_left, retry_interval)
+                    WindowSpecification.WAIT_NOT_CRITERIA_MAP[condition](ctrl, time_left, retry_interval,
+                                                                         notifier=notifier)
 
     def by(self, **criteria):
         """
         Add criteria for a control
 
         When this window specification is resolved it will be used
-        to match against a control.
+        to match against a control. A ``selector`` keyword finds the control
+        through several levels of the tree in one walk, e.g.
+        ``dlg.by(selector='Pane > Button[name~="^Save"]')``
+        (see :py:mod:`pywinauto.selector`).
         """
         # default to non top level windows because we are usually
         # looking for a control
@@ -477,6 +614,7 @@ class WindowSpecification(object):
         new_item = WindowSpecification(self.criteria[0], allow_magic_lookup=self.allow_magic_lookup)
         new_item.criteria.extend(self.criteria[1:])
         new_item.criteria.append(criteria)
+        new_item._resolved_elements = self._resolved_elements
 
         return new_item
 
@@ -514,6 +652,7 @@ class WindowSpecification(object):
         # if we get here then we must have only had one criteria so far
         # so create a new :class:`WindowSpecification` for this control
         new_item = WindowSpecification(self.criteria[0], allow_magic_lookup=self.allow_magic_lookup)
+        new_item._resolved_elements = self._resolved_elements
 
         # add our new criteria
         new_item.criteria.append({"best_match": key})
@@ -647,7 +786,7 @@ class WindowSpecification(object):
             criterion['visible'] = None
 
         try:
-            wait_until(timeout, retry_interval, self.exists, False)
+            wait_until(timeout, retry_interval, self.exists, False, notifier=self._get_change_notifier())
 
             return True
         except (findwindows.ElementNotFoundError,
@@ -657,6 +796,14 @@ class WindowSpecification(object):
                 TimeoutError):
             return False
 
+    def clear_match_cache(self):
+        """Clear the cache of best_match ratios (see :func:`pywinauto.findbestmatch.clear_cache`)
+
+        The elements found for this specification are forgotten too.
+        """
+        findbestmatch.clear_cache()
+        self._resolved_elements.clear()
+
     def dump_tree(self, depth=10, max_width=10, filename=None):
         """
         Dump the 'identifiers' to console or a file
@@ -722,15 +869,19 @@ class WindowSpecification(object):
         # Build element tree
         elements_tree, depth_limit_reached, width_limit_reached = create_element_tree(all_ctrls)
 
+        # Retrieve the properties of every control only once
+        snapshots = [findbestmatch.ControlSnapshot(ctrl) for ctrl in all_ctrls]
+
         show_best_match_names = self.allow_magic_lookup and not (depth_limit_reached or width_limit_reached)
         if show_best_match_names:
             # Create a list of all visible text controls
-            txt_ctrls = [ctrl for ctrl in all_ctrls if ctrl.can_be_label and ctrl.is_visible() and ctrl.window_text()]
+            txt_ctrls = [ctrl for ctrl in snapshots if ctrl.can_be_label and ctrl.is_visible() and ctrl.window_text()]
+            label_index = findbestmatch.LabelIndex(snapshots, txt_ctrls)
 
             # Build a dictionary of disambiguated list of control names
             name_ctrl_id_map = findbestmatch.UniqueDict()
-            for index, ctrl in enumerate(all_ctrls):
-                ctrl_names = findbestmatch.get_control_names(ctrl, all_ctrls, txt_ctrls)
+            for index, ctrl in enumerate(snapshots):
+                ctrl_names = findbestmatch.get_control_names(ctrl, snapshots, txt_ctrls, label_index)
                 for name in ctrl_names:
                     name_ctrl_id_map[name] = index
 
@@ -757,14 +908,15 @@ class WindowSpecification(object):
             ctrl = element_node.elem
             if ctrl is not None:
                 ctrl_id = element_node.id
-                ctrl_text = ctrl.window_text()
+                snapshot = snapshots[ctrl_id]
+                ctrl_text = snapshot.window_text()
                 if ctrl_text:
                     # transform multi-line text to one liner
                     ctrl_text = repr(ctrl_text)
                 output += indent + u"{class_name} - {text}    {rect}" \
-                                   "".format(class_name=ctrl.friendly_class_name(),
+                                   "".format(class_name=snapshot.friendly_class_name(),
                                              text=ctrl_text,
-                                             rect=ctrl.rectangle())
+                                             rect=snapshot.rectangle())
 
                 if show_best_match_names:
                     output += u'\n' + indent + u'{}'.format(ctrl_id_name_map[ctrl_id])
@@ -999,6 +1151,10 @@ class BaseApplication(object):
         # delegate all functionality to item access
         return self[attr_name]
 
+    def clear_match_cache(self):
+        """Clear the cache of best_match ratios (see :func:`pywinauto.findbestmatch.clear_cache`)"""
+        findbestmatch.clear_cache()
+
     def kill(self, soft=False):
         """
         Try to close and kill the application
@@ -31,11 +31,28 @@
 
 """Interface for classes which should deal with different backend elements"""
 
+# relative costs of getting an element property, used to order the search filters
+PROP_COST_CACHED = 1  # stored in the element info object
+PROP_COST_IPC = 10  # one call to the accessibility API or another process
+PROP_COST_MULTI_IPC = 30  # several calls
+
 
 class ElementInfo(object):
 
     """Abstract wrapper for an element"""
 
+    # costs of the search properties (PROP_COST_IPC if not listed),
+    # the cheap filters are checked first by find_elements()
+    prop_costs = {}
+
+    # True if iter_descendants() yields the same elements in the same order
+    # as descendants(), so a search can stop at the first match
+    ordered_iter_descendants = False
+
+    # True if find_elements() walks the tree with cache_enable=True,
+    # so the filters of one search share the values read for an element
+    search_cache_enable = False
+
     def __repr__(self):
         """Representation of the element info object
 
@@ -65,6 +82,20 @@ class ElementInfo(object):
         """Set a cache strategy for frequently used attributes of the element"""
         raise NotImplementedError()
 
+    def is_alive(self):
+        """Return True if the element still exists (a cheap check before reusing a found element)"""
+        return self.process_id is not None
+
+    @classmethod
+    def get_change_notifier(cls, process=None):
+        """Return a timings.ChangeNotifier signalled when the tree changes
+
+        The notifier for a process ID may be signalled by the changes
+        of the process only. None means that the backend has no event
+        listener and the waits poll for the changes.
+        """
+        return None
+
     @property
     def handle(self):
         """Return the handle of the element"""
@@ -143,6 +174,15 @@ class ElementInfo(object):
         """Iterate over children of element"""
         raise NotImplementedError()
 
+    def iter_tree_children(self):
+        """Iterate over the immediate children of the element in the tree
+
+        It is used to walk the tree level by level (e.g. by a selector),
+        so the backends whose children() lists more than the immediate
+        children override it.
+        """
+        return self.iter_children()
+
     def has_depth(self, root, depth):
         """Return True if element has particular depth level relative to the root"""
         if self.control_id != root.control_id:
@@ -154,23 +194,38 @@ class ElementInfo(object):
         else:
             return True
 
+    @staticmethod
+    def _check_depth(depth):
+        """Raise an exception if the depth is not None or a natural number"""
+        if depth is not None and not (isinstance(depth, int) and depth > 0):
+            raise Exception("Depth must be natural number")
+
     @staticmethod
     def filter_with_depth(elements, root, depth):
-        """Return filtered elements with particular depth level relative to the root"""
+        """Return filtered elements with particular depth level relative to the root
+
+        It checks the parents of every element, so it is better to limit
+        the depth of the walk with descendants(depth=...) instead.
+        """
+        ElementInfo._check_depth(depth)
         if depth is not None:
-                if isinstance(depth, int) and depth > 0:
-                    return [element for element in elements if element.has_depth(root, depth)]
-                else:
-                    raise Exception("Depth must be natural number")
+            return [element for element in elements if element.has_depth(root, depth)]
         else:
             return elements
 
     def descendants(self, **kwargs):
-        """Return descendants of the element"""
-        raise NotImplementedError()
+        """Return descendants of the element
+
+        The children deeper than depth (if specified) are not walked through.
+        """
+        self._check_depth(kwargs.get("depth", None))
+        return list(self.iter_descendants(**kwargs))
 
     def iter_descendants(self, **kwargs):
-        """Iterate over descendants of the element"""
+        """Iterate over descendants of the element
+
+        The children deeper than depth (if specified) are not walked through.
+        """
         depth = kwargs.pop("depth", None)
         if depth == 0:
             return
@@ -181,6 +236,17 @@ class ElementInfo(object):
             for c in child.iter_descendants(**kwargs):
                 yield c
 
+    def query_descendants(self, props, cache_enable=False):
+        """Return the descendants matching the search properties or None
+
+        The backends able to match the elements on the server side return
+        an iterable of the same elements as descendants() called with
+        the class_name, name, control_type and pid of the properties
+        (in the same order), so that ctrl_index refers to the same element.
+        None means that the descendants must be walked.
+        """
+        return None
+
     @property
     def rectangle(self):
         """Return rectangle of element"""
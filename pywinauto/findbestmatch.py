@@ -34,13 +34,18 @@ from __future__ import unicode_literals
 
 import re
 import difflib
-#import ctypes
-#import ldistance
-#levenshtein_distance = ctypes.cdll.levenshtein.levenshtein_distance
-#levenshtein_distance = ldistance.distance
+import heapq
+import threading
+from collections import OrderedDict
+
+from . import similarity
 
 find_best_control_match_cutoff = .6
 
+# Minimal number of keys in a UniqueDict to build a trigram index for
+# (set to None to always scan every key with SequenceMatcher)
+trigram_index_min_keys = 50
+
 #====================================================================
 class MatchError(IndexError):
 
@@ -57,13 +62,145 @@ class MatchError(IndexError):
             "Could not find '{0}' in '{1}'".format(tofind, self.items))
 
 
-_cache = {}
+#====================================================================
+class RatioCache(object):
+
+    """Thread-safe LRU cache of match ratios for pairs of texts
+
+    The pairs are symmetric: a ratio stored for (text1, text2)
+    is also returned for (text2, text1).
+    """
+
+    def __init__(self, capacity=10000):
+        """Create an empty cache for at most capacity ratios"""
+        self._lock = threading.Lock()
+        self._ratios = OrderedDict()
+        self._capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def capacity(self):
+        """Return the maximal number of cached ratios"""
+        return self._capacity
+
+    @capacity.setter
+    def capacity(self, capacity):
+        """Set the maximal number of cached ratios, extra ratios are evicted"""
+        with self._lock:
+            self._capacity = capacity
+            self._evict()
+
+    def _evict(self):
+        """Drop the least recently used ratios above the capacity"""
+        while len(self._ratios) > self._capacity:
+            self._ratios.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, text1, text2):
+        """Return the cached ratio for the pair of texts or None"""
+        with self._lock:
+            for key in ((text1, text2), (text2, text1)):
+                if key in self._ratios:
+                    self._ratios.move_to_end(key)
+                    self.hits += 1
+                    return self._ratios[key]
+            self.misses += 1
+            return None
+
+    def put(self, text1, text2, ratio):
+        """Store the ratio for the pair of texts"""
+        with self._lock:
+            self._ratios[(text1, text2)] = ratio
+            self._ratios.move_to_end((text1, text2))
+            self._evict()
+
+    def clear(self):
+        """Remove all the cached ratios and reset the counters"""
+        with self._lock:
+            self._ratios.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        """Return a dictionary with the cache counters"""
+        with self._lock:
+            return {
+                'size': len(self._ratios),
+                'capacity': self._capacity,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def __len__(self):
+        """Return the number of cached ratios"""
+        return len(self._ratios)
+
+
+# adjust the size with "findbestmatch.ratio_cache.capacity = N"
+ratio_cache = RatioCache()
+
+
+def clear_cache():
+    """Clear the cache of match ratios"""
+    ratio_cache.clear()
+
+
+#====================================================================
+class _TrigramIndex(object):
+
+    """Character trigram inverted index over the normalized keys of a UniqueDict
+
+    The number of trigrams shared by two texts gives an upper bound
+    of their SequenceMatcher ratio (see similarity.trigram_ratio_bound).
+    This lets us skip ratio() for the keys which cannot beat the best match.
+    """
+
+    def __init__(self, keys, texts):
+        """Index texts (normalized variants of keys)"""
+        self.keys = keys
+        self.texts = texts
+        self.postings = {}
+        for i, text in enumerate(texts):
+            for trigram, count in similarity.get_trigrams(text).items():
+                self.postings.setdefault(trigram, []).append((i, count))
+
+    def shared_trigrams(self, search_text):
+        """Return a list with the number of trigrams each text shares with search_text"""
+        shared = [0] * len(self.texts)
+        for trigram, search_count in similarity.get_trigrams(search_text).items():
+            for i, count in self.postings.get(trigram, ()):
+                shared[i] += min(count, search_count)
+        return shared
+
+    def ratio_bounds(self, search_text, ratio_offset):
+        """Yield (ratio upper bound, key index) for all the texts"""
+        search_len = len(search_text)
+        for i, shared in enumerate(self.shared_trigrams(search_text)):
+            yield similarity.trigram_ratio_bound(shared, len(self.texts[i]), search_len) * ratio_offset, i
+
 
 # given a list of texts return the match score for each
 # and the best score and text with best score
 #====================================================================
-def _get_match_ratios(texts, match_against):
+def _get_match_ratios(texts, match_against, scorer=None):
     """Get the match ratio of how each item in texts compared to match_against"""
+    scorer = similarity.get_scorer(scorer)
+    if not isinstance(scorer, similarity.SequenceMatcherScorer):
+        # other scorers get all the texts at once and are not cached
+        texts = list(texts)
+        ratios = dict(zip(texts, scorer.ratios(match_against, texts)))
+        best_ratio = 0
+        best_text = ''
+        for text in texts:
+            if ratios[text] > best_ratio:
+                best_ratio = ratios[text]
+                best_text = text
+        return ratios, best_ratio, best_text
+
     # now time to figure out the matching
     ratio_calc = difflib.SequenceMatcher()
     ratio_calc.set_seq1(match_against)
@@ -74,28 +211,16 @@ def _get_match_ratios(texts, match_against):
 
     for text in texts:
 
-        if 0:
-            pass
+        ratios[text] = ratio_cache.get(text, match_against)
 
-        if (text, match_against) in _cache:
-            ratios[text] = _cache[(text, match_against)]
-
-        elif(match_against, text) in _cache:
-            ratios[text] = _cache[(match_against, text)]
-
-        else:
+        if ratios[text] is None:
             # set up the SequenceMatcher with other text
             ratio_calc.set_seq2(text)
 
-            # try using the levenshtein distance instead
-            #lev_dist = levenshtein_distance(str(match_against), str(text))
-            #ratio = 1 - lev_dist / 10.0
-            #ratios[text] = ratio
-
             # calculate ratio and store it
             ratios[text] = ratio_calc.ratio()
 
-            _cache[(match_against, text)] = ratios[text]
+            ratio_cache.put(match_against, text, ratios[text])
 
         # if this is the best so far then update best stats
         if ratios[text] > best_ratio:
@@ -106,7 +231,7 @@ def _get_match_ratios(texts, match_against):
 
 
 #====================================================================
-def find_best_match(search_text, item_texts, items, limit_ratio = .5):
+def find_best_match(search_text, item_texts, items, limit_ratio = .5, scorer = None):
     """Return the item that best matches the search_text
 
     * **search_text** The text to search for
@@ -116,6 +241,8 @@ def find_best_match(search_text, item_texts, items, limit_ratio = .5):
     * **limit_ratio** How well the text has to match the best match.
       If the best match matches lower then this then it is not
       considered a match and a MatchError is raised, (default = .5)
+    * **scorer** The name or the object of a :mod:`pywinauto.similarity`
+      scorer (default = None, the default scorer)
     """
     search_text = _cut_at_eol(_cut_at_tab(search_text))
 
@@ -126,7 +253,7 @@ def find_best_match(search_text, item_texts, items, limit_ratio = .5):
         text_item_map[_cut_at_eol(_cut_at_tab(text))] = item
 
     ratios, best_ratio, best_text = \
-        _get_match_ratios(text_item_map.keys(), search_text)
+        _get_match_ratios(text_item_map.keys(), search_text, scorer)
 
     if best_ratio < limit_ratio:
         raise MatchError(items = text_item_map.keys(), tofind = search_text)
@@ -139,6 +266,10 @@ _after_tab = re.compile(r"\t.*", re.UNICODE)
 _after_eol = re.compile(r"\n.*", re.UNICODE)
 _non_word_chars = re.compile(r"\W", re.UNICODE)
 
+# (clean, ignore_case) normalizations of the texts in the order they are tried
+_match_variants = ((False, False), (False, True), (True, False), (True, True))
+match_variant_names = ("plain", "ignore_case", "clean", "clean_ignore_case")
+
 def _cut_at_tab(text):
     """Clean out non characters from the string and return it"""
     # remove anything after the first tab
@@ -157,11 +288,25 @@ def _clean_non_chars(text):
     return _non_word_chars.sub("", text)
 
 
+def _get_ratio_offset(clean, ignore_case):
+    """Return the penalty applied to the match ratio of normalized texts"""
+    ratio_offset = 1
+    if clean:
+        ratio_offset *= .9
+
+    if ignore_case:
+        ratio_offset *= .9
+
+    return ratio_offset
+
+
 def is_above_or_to_left(ref_control, other_ctrl):
     """Return true if the other_ctrl is above or to the left of ref_control"""
-    text_r = other_ctrl.rectangle()
-    ctrl_r = ref_control.rectangle()
+    return _is_above_or_to_left(ref_control.rectangle(), other_ctrl.rectangle())
+
 
+def _is_above_or_to_left(ctrl_r, text_r):
+    """Return true if the text_r rectangle is above or to the left of ctrl_r"""
     # skip controls where text win is to the right of ctrl
     if text_r.left >= ctrl_r.right:
         return False
@@ -178,23 +323,199 @@ def is_above_or_to_left(ref_control, other_ctrl):
     return True
 
 
+#====================================================================
+class ControlSnapshot(object):
+
+    """Properties of a control used to build its best_match names
+
+    Every property is retrieved from the control only once, when it is
+    needed for the first time, and it is not changed after that.
+    fetch_count is the number of properties retrieved by all the snapshots.
+    """
+
+    fetch_count = 0
+
+    def __init__(self, control):
+        """Keep the control, its properties are retrieved on demand"""
+        self.control = control
+        self._values = {}
+
+    def _fetch(self, name, is_method=True):
+        """Return the property of the control retrieving it only once"""
+        if name not in self._values:
+            ControlSnapshot.fetch_count += 1
+            value = getattr(self.control, name)
+            self._values[name] = value() if is_method else value
+        return self._values[name]
+
+    @property
+    def can_be_label(self):
+        """Return can_be_label of the control"""
+        return self._fetch('can_be_label', is_method=False)
+
+    @property
+    def has_title(self):
+        """Return has_title of the control"""
+        return self._fetch('has_title', is_method=False)
+
+    def friendly_class_name(self):
+        """Return friendly_class_name() of the control"""
+        return self._fetch('friendly_class_name')
+
+    def window_text(self):
+        """Return window_text() of the control"""
+        return self._fetch('window_text')
+
+    def is_visible(self):
+        """Return is_visible() of the control"""
+        return self._fetch('is_visible')
+
+    def rectangle(self):
+        """Return rectangle() of the control"""
+        return self._fetch('rectangle')
+
+    def texts(self):
+        """Return a copy of texts() of the control"""
+        return list(self._fetch('texts'))
+
+
+#====================================================================
+class LabelIndex(object):
+
+    """Spatial index of the text controls used to name non text controls
+
+    The rectangle of every control is retrieved only once. The text controls
+    are put into a uniform grid by the two corners used to measure
+    the distance to a control: bottom-left and top-right.
+    """
+
+    def __init__(self, controls, text_ctrls):
+        """Build the grid of the text controls"""
+        self.controls = controls
+        self.text_ctrls = text_ctrls
+        self._positions = {}
+        for i, ctrl in enumerate(controls):
+            self._positions.setdefault(id(ctrl), i)
+        self._rects = {}
+        self.text_rects = [self.rectangle(text_ctrl) for text_ctrl in text_ctrls]
+
+        corners = []
+        for i, text_r in enumerate(self.text_rects):
+            corners.append((text_r.left, text_r.bottom, i))
+            corners.append((text_r.right, text_r.top, i))
+
+        # about one corner per cell on average
+        self.cell_size = 1
+        if corners:
+            width = max(x for x, _, _ in corners) - min(x for x, _, _ in corners)
+            height = max(y for _, y, _ in corners) - min(y for _, y, _ in corners)
+            self.cell_size = max(1, int((float(width) * height / len(corners)) ** .5),
+                                 max(width, height) // len(corners))
+
+        self._cells = {}
+        for x, y, i in corners:
+            self._cells.setdefault(self._get_cell(x, y), []).append(i)
+        if self._cells:
+            self._min_cell = [min(cell[axis] for cell in self._cells) for axis in (0, 1)]
+            self._max_cell = [max(cell[axis] for cell in self._cells) for axis in (0, 1)]
+
+    def _get_cell(self, x, y):
+        """Return the grid cell of the point"""
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def rectangle(self, ctrl):
+        """Return the rectangle of the control retrieving it only once"""
+        rect = self._rects.get(id(ctrl))
+        if rect is None:
+            rect = self._rects[id(ctrl)] = ctrl.rectangle()
+        return rect
+
+    def position(self, ctrl):
+        """Return the index of the control in the list of all the controls"""
+        return self._positions.get(id(ctrl), 0)
+
+    def _iter_ring(self, center, radius):
+        """Iterate over the occupied cells at the radius around the center cell"""
+        cx, cy = center
+        min_x, min_y = self._min_cell
+        max_x, max_y = self._max_cell
+        for x in range(max(cx - radius, min_x), min(cx + radius, max_x) + 1):
+            if radius and cx - radius < x < cx + radius:
+                ys = (cy - radius, cy + radius)
+            else:
+                ys = range(max(cy - radius, min_y), min(cy + radius, max_y) + 1)
+            for y in ys:
+                items = self._cells.get((x, y))
+                if items:
+                    yield items
+
+    def find_candidates(self, ctrl_r):
+        """Return indices of the text controls which can be the closest to ctrl_r
+
+        Only the text controls above or to the left of the control are
+        considered. The result includes all the controls at the smallest
+        distance (below distance_cuttoff) and they are sorted by the index.
+        """
+        if not self._cells:
+            return []
+
+        center = self._get_cell(ctrl_r.left, ctrl_r.top)
+        candidates = set()
+        checked = set()
+        closest = distance_cuttoff
+        radius = 0
+        while True:
+            # any corner out of the ring is farther than this
+            min_distance = (radius - 1) * self.cell_size
+            if min_distance >= distance_cuttoff or min_distance > closest:
+                break
+
+            for items in self._iter_ring(center, radius):
+                for i in items:
+                    if i in checked:
+                        continue
+                    checked.add(i)
+
+                    text_r = self.text_rects[i]
+                    if text_r.left >= ctrl_r.right or text_r.top >= ctrl_r.bottom:
+                        continue
+
+                    distance = min(
+                        abs(text_r.left - ctrl_r.left) + abs(text_r.bottom - ctrl_r.top),
+                        abs(text_r.right - ctrl_r.left) + abs(text_r.top - ctrl_r.top))
+                    if distance < distance_cuttoff:
+                        candidates.add(i)
+                        closest = min(closest, distance)
+
+            # stop when the ring has covered all the grid
+            if center[0] - radius <= self._min_cell[0] and center[0] + radius >= self._max_cell[0] and \
+                    center[1] - radius <= self._min_cell[1] and center[1] + radius >= self._max_cell[1]:
+                break
+            radius += 1
+
+        return sorted(candidates)
+
+
 #====================================================================
 distance_cuttoff = 999
-def get_non_text_control_name(ctrl, controls, text_ctrls):
+def get_non_text_control_name(ctrl, controls, text_ctrls, label_index=None):
     """
     return the name for this control by finding the closest
     text control above and to its left
+
+    label_index is a LabelIndex of the same controls and text_ctrls,
+    it is built if not specified.
     """
     names = []
 
+    if label_index is None:
+        label_index = LabelIndex(controls, text_ctrls)
+
     # simply look for an instance of the control in the list,
     # we don't use list.index() method as it invokes __eq__
-    ctrl_index = 0
-    for i, c in enumerate(controls):
-        if c is ctrl:
-            ctrl_index = i
-            break
+    ctrl_index = label_index.position(ctrl)
     ctrl_friendly_class_name = ctrl.friendly_class_name()
+    ctrl_r = label_index.rectangle(ctrl)
 
     if ctrl_index != 0:
         prev_ctrl = controls[ctrl_index-1]
@@ -202,20 +523,37 @@ def get_non_text_control_name(ctrl, controls, text_ctrls):
 
         if prev_ctrl.friendly_class_name() == "Static" and \
             prev_ctrl.is_visible() and prev_ctrl_text and \
-            is_above_or_to_left(ctrl, prev_ctrl):
+            _is_above_or_to_left(ctrl_r, label_index.rectangle(prev_ctrl)):
 
             names.append(
                 prev_ctrl_text +
                 ctrl_friendly_class_name)
 
+    # now for the visible text controls which can be the closest ones
+    candidates = label_index.find_candidates(ctrl_r)
+    best_name, complete = _get_closest_text_name(
+        ctrl_r, ctrl_friendly_class_name,
+        [label_index.text_ctrls[i] for i in candidates],
+        [label_index.text_rects[i] for i in candidates])
+
+    if not complete:
+        # a text control has disappeared, so the next closest one
+        # may be out of the candidates - check all of them
+        best_name, _ = _get_closest_text_name(
+            ctrl_r, ctrl_friendly_class_name, label_index.text_ctrls, label_index.text_rects)
+
+    names.append(best_name)
+
+    return names
+
+
+def _get_closest_text_name(ctrl_r, ctrl_friendly_class_name, text_ctrls, text_rects):
+    """Return the name by the closest text control and False if some text was not available"""
     best_name = ''
     closest = distance_cuttoff
+    complete = True
     # now for each of the visible text controls
-    for text_ctrl in text_ctrls:
-
-        # get aliases to the control rectangles
-        text_r = text_ctrl.rectangle()
-        ctrl_r = ctrl.rectangle()
+    for text_ctrl, text_r in zip(text_ctrls, text_rects):
 
         # skip controls where text win is to the right of ctrl
         if text_r.left >= ctrl_r.right:
@@ -260,12 +598,11 @@ def get_non_text_control_name(ctrl, controls, text_ctrls):
         # UpDown control should use Static text only because edit box text is often useless
         if ctrl_friendly_class_name == "UpDown" and \
                 text_ctrl.friendly_class_name() == "Static" and distance < closest:
-            # TODO: use search in all text controls for all non-text ones
-            # (like Dijkstra algorithm vs Floyd one)
             closest = distance
             ctrl_text = text_ctrl.window_text()
             if ctrl_text is None:
                 # the control probably doesn't exist so skip it
+                complete = False
                 continue
             best_name = ctrl_text + ctrl_friendly_class_name
 
@@ -278,17 +615,20 @@ def get_non_text_control_name(ctrl, controls, text_ctrls):
             ctrl_text = text_ctrl.window_text()
             if ctrl_text is None:
                 # the control probably doesn't exist so skip it
+                complete = False
                 continue
             best_name = ctrl_text + ctrl_friendly_class_name
 
-    names.append(best_name)
-
-    return names
+    return best_name, complete
 
 
 #====================================================================
-def get_control_names(control, allcontrols, textcontrols):
-    """Returns a list of names for this control"""
+def get_control_names(control, allcontrols, textcontrols, label_index=None):
+    """Returns a list of names for this control
+
+    label_index is an optional LabelIndex of allcontrols and textcontrols
+    shared by the calls for all the controls.
+    """
     names = []
 
     # if it has a reference control - then use that
@@ -316,7 +656,7 @@ def get_control_names(control, allcontrols, textcontrols):
             pass #ActionLogger().log('Warning! Cannot get control.texts()') #\nTraceback:\n' + traceback.format_exc())
 
         # so find the text of the nearest text visible control
-        non_text_names = get_non_text_control_name(control, allcontrols, textcontrols)
+        non_text_names = get_non_text_control_name(control, allcontrols, textcontrols, label_index)
 
         # and if one was found - add it
         if non_text_names:
@@ -324,7 +664,7 @@ def get_control_names(control, allcontrols, textcontrols):
     # it didn't have visible text
     else:
         # so find the text of the nearest text visible control
-        non_text_names = get_non_text_control_name(control, allcontrols, textcontrols)
+        non_text_names = get_non_text_control_name(control, allcontrols, textcontrols, label_index)
 
         # and if one was found - add it
         if non_text_names:
@@ -340,8 +680,21 @@ class UniqueDict(dict):
 
     """A dictionary subclass that handles making its keys unique"""
 
+    def __init__(self, *args, **kwargs):
+        """Initialize the dictionary and the data precomputed for lookups"""
+        dict.__init__(self, *args, **kwargs)
+        self._reset_lookup_data()
+
+    def _reset_lookup_data(self):
+        """Drop the normalized keys and the indexes as the keys are changed"""
+        self._key_variants = None
+        self._trigram_indexes = {}
+        self._exact_keys = {}
+
     def __setitem__(self, text, item):
         """Set an item of the dictionary"""
+        self._reset_lookup_data()
+
         # this text is already in the map
         # so we need to make it unique
         if text in self:
@@ -365,17 +718,107 @@ class UniqueDict(dict):
         # add our current item
         dict.__setitem__(self, text, item)
 
+    def __delitem__(self, text):
+        """Delete an item of the dictionary"""
+        self._reset_lookup_data()
+        dict.__delitem__(self, text)
+
+    def _get_key_variants(self):
+        """Return a list of (key, texts, lengths, variants) for the keys
+
+        texts are the key normalized as in _match_variants and variants
+        are indices of the texts different from the not cleaned ones.
+        """
+        # dict methods like update() bypass __setitem__ so check the size also
+        if self._key_variants is None or len(self._key_variants) != len(self):
+            key_variants = []
+            for key in self:
+                lower = key.lower()
+                cleaned = _clean_non_chars(key)
+                cleaned_lower = cleaned.lower()
+                texts = (key, lower, cleaned, cleaned_lower)
+                variants = [0, 1]
+                if cleaned != key:
+                    variants.append(2)
+                if cleaned_lower != lower:
+                    variants.append(3)
+                key_variants.append((key, texts, [len(text) for text in texts], variants))
+            self._key_variants = key_variants
+            self._exact_keys = {}
+        return self._key_variants
+
+    def _get_exact_keys(self, variant):
+        """Return a dictionary mapping the keys normalized as the variant to the original keys"""
+        key_variants = self._get_key_variants()
+        if variant not in self._exact_keys:
+            exact_keys = {}
+            for key, texts, _, _ in key_variants:
+                exact_keys.setdefault(texts[variant], []).append(key)
+            self._exact_keys[variant] = exact_keys
+        return self._exact_keys[variant]
+
+    def _get_trigram_index(self, clean, ignore_case):
+        """Return the trigram index of the keys normalized with clean/ignore_case
+
+        None is returned if the dictionary is too small to be indexed.
+        """
+        if trigram_index_min_keys is None or len(self) < trigram_index_min_keys:
+            return None
+
+        index = self._trigram_indexes.get((clean, ignore_case))
+        if index is None or len(index.keys) != len(self):
+            variant = _match_variants.index((clean, ignore_case))
+            key_variants = self._get_key_variants()
+            index = _TrigramIndex([key_texts[0] for key_texts in key_variants],
+                                  [key_texts[1][variant] for key_texts in key_variants])
+            self._trigram_indexes[(clean, ignore_case)] = index
+        return index
+
+    @staticmethod
+    def _calc_ratio(ratio_calc, text, search_text, ratio_offset):
+        """Return the match ratio of text (ratio_calc.a must be search_text)"""
+        # check if this item is in the cache - if yes, then retrieve it
+        ratio = ratio_cache.get(text, search_text)
+        if ratio is not None:
+            return ratio * ratio_offset
+
+        # not in the cache - calculate it and add it to the cache
+        # set up the SequenceMatcher with other text
+        ratio_calc.set_seq2(text)
+
+        # if a very quick check reveals that this is not going
+        # to match then
+        ratio = ratio_calc.real_quick_ratio() * ratio_offset
+
+        if ratio  >=  find_best_control_match_cutoff:
+            ratio = ratio_calc.quick_ratio() * ratio_offset
+
+            if ratio >= find_best_control_match_cutoff:
+                # the cache keeps the real ratio regardless of the offset
+                real_ratio = ratio_calc.ratio()
+                ratio_cache.put(text, search_text, real_ratio)
+                ratio = real_ratio * ratio_offset
+
+        return ratio
+
     def find_best_matches(
         self,
         search_text,
         clean = False,
-        ignore_case = False):
+        ignore_case = False,
+        scorer = None):
         """Return the best matches for search_text in the items
 
         * **search_text** the text to look for
         * **clean** whether to clean non text characters out of the strings
         * **ignore_case** compare strings case insensitively
+        * **scorer** the name or the object of a :mod:`pywinauto.similarity`
+          scorer (the default scorer if None)
         """
+        scorer = similarity.get_scorer(scorer)
+        if not isinstance(scorer, similarity.SequenceMatcherScorer):
+            return self._find_best_scored_matches(scorer, search_text, clean, ignore_case)
+
         # now time to figure out the matching
         ratio_calc = difflib.SequenceMatcher()
 
@@ -384,74 +827,296 @@ class UniqueDict(dict):
 
         ratio_calc.set_seq1(search_text)
 
-        ratios = {}
-        best_ratio = 0
-        best_texts = []
+        ratio_offset = _get_ratio_offset(clean, ignore_case)
+        variant = _match_variants.index((clean, ignore_case))
+        exact_keys = self._get_exact_keys(variant)
 
-        ratio_offset = 1
-        if clean:
-            ratio_offset *= .9
+        # only the keys equal to search_text can be as good as a perfect match
+        if search_text in exact_keys and 1.0 * ratio_offset >= find_best_control_match_cutoff:
+            return 1.0 * ratio_offset, list(exact_keys[search_text])
 
-        if ignore_case:
-            ratio_offset *= .9
+        index = self._get_trigram_index(clean, ignore_case)
+        if index is not None:
+            best_ratio, best_texts = self._find_best_indexed_matches(
+                index, ratio_calc, search_text, ratio_offset)
+            if best_ratio:
+                return best_ratio, best_texts
+            # nothing reaches the cutoff: fall back to the full scan
+            # so that the result is the same in this case too
 
-        for text_ in self:
+        ratios = {}
+        best_ratio = 0
+        best_texts = []
+        search_length = len(search_text)
 
-            # make a copy of the text as we need the original later
-            text = text_
+        for text_, texts, lengths, _ in self._get_key_variants():
 
-            if clean:
-                text = _clean_non_chars(text)
+            # skip the keys which cannot reach the best ratio by their lengths
+            # (the same upper bound as real_quick_ratio())
+            length = lengths[variant] + search_length
+            if length and 2.0 * min(lengths[variant], search_length) / length * ratio_offset < best_ratio:
+                continue
 
-            if ignore_case:
-                text = text.lower()
+            ratios[text_] = self._calc_ratio(ratio_calc, texts[variant], search_text, ratio_offset)
 
-            # check if this item is in the cache - if yes, then retrieve it
-            if (text, search_text) in _cache:
-                ratios[text_] = _cache[(text, search_text)]
+            # if this is the best so far then update best stats
+            if ratios[text_] > best_ratio and \
+                ratios[text_] >= find_best_control_match_cutoff:
 
-            elif(search_text, text) in _cache:
-                ratios[text_] = _cache[(search_text, text)]
+                best_ratio = ratios[text_]
+                best_texts = [text_]
 
-            # not in the cache - calculate it and add it to the cache
-            else:
-                # set up the SequenceMatcher with other text
-                ratio_calc.set_seq2(text)
+            elif ratios[text_] == best_ratio:
+                best_texts.append(text_)
 
-                # if a very quick check reveals that this is not going
-                # to match then
-                ratio = ratio_calc.real_quick_ratio() * ratio_offset
+        #best_ratio *= ratio_offset
 
-                if ratio  >=  find_best_control_match_cutoff:
-                    ratio = ratio_calc.quick_ratio() * ratio_offset
+        return best_ratio, best_texts
 
-                    if ratio >= find_best_control_match_cutoff:
-                        ratio = ratio_calc.ratio() * ratio_offset
+    def _find_best_scored_matches(self, scorer, search_text, clean, ignore_case):
+        """Return the best matches for search_text scoring all the keys at once"""
+        if ignore_case:
+            search_text = search_text.lower()
 
-                # save the match we got and store it in the cache
-                ratios[text_] = ratio
-                _cache[(text, search_text)] = ratio
+        ratio_offset = _get_ratio_offset(clean, ignore_case)
+        variant = _match_variants.index((clean, ignore_case))
+        key_variants = self._get_key_variants()
+        ratios = scorer.ratios(search_text, [texts[variant] for _, texts, _, _ in key_variants])
 
-            # try using the levenshtein distance instead
-            #lev_dist = levenshtein_distance(str(search_text), str(text))
-            #ratio = 1 - lev_dist / 10.0
-            #ratios[text_] = ratio
-            #print "%5s" %("%0.2f"% ratio), search_text, `text`
+        best_ratio = 0
+        best_texts = []
+        for (text_, _, _, _), ratio in zip(key_variants, ratios):
+            ratio *= ratio_offset
 
             # if this is the best so far then update best stats
-            if ratios[text_] > best_ratio and \
-                ratios[text_] >= find_best_control_match_cutoff:
-
-                best_ratio = ratios[text_]
+            if ratio > best_ratio and ratio >= find_best_control_match_cutoff:
+                best_ratio = ratio
                 best_texts = [text_]
 
-            elif ratios[text_] == best_ratio:
+            elif ratio == best_ratio:
                 best_texts.append(text_)
 
-        #best_ratio *= ratio_offset
+        return best_ratio, best_texts
+
+    def _find_best_indexed_matches(self, index, ratio_calc, search_text, ratio_offset):
+        """Find the best matches calculating ratio() only for promising keys
 
+        The result is the same as for the full scan if any key reaches
+        the cutoff, otherwise (0, []) is returned.
+        """
+        ratios = [None] * len(index.keys)
+        threshold = find_best_control_match_cutoff
+
+        # check the most promising keys first to raise the threshold quickly
+        bounds = sorted(index.ratio_bounds(search_text, ratio_offset),
+                        key=lambda bound_i: bound_i[0], reverse=True)
+        for bound, i in bounds:
+            if bound < threshold:
+                # neither this key nor the rest can be the best one or a tie
+                break
+            ratios[i] = self._calc_ratio(ratio_calc, index.texts[i], search_text, ratio_offset)
+            if ratios[i] > threshold:
+                threshold = ratios[i]
+
+        matched = [ratio for ratio in ratios
+                   if ratio is not None and ratio >= find_best_control_match_cutoff]
+        if not matched:
+            return 0, []
+
+        best_ratio = max(matched)
+        best_texts = [key for key, ratio in zip(index.keys, ratios) if ratio == best_ratio]
         return best_ratio, best_texts
 
+    def find_best_variant_matches(self, search_text, scorer = None):
+        """Return the best matches for search_text trying all the normalizations
+
+        The result is the same as calling :func:`find_best_matches` for every
+        (clean, ignore_case) combination and taking the first one with the
+        highest ratio. But each key is normalized only once and scored for
+        all the combinations in a single pass, and ratio() is skipped for
+        the keys that cannot beat the best matches found so far
+        (by the lengths, by the shared trigrams if the dictionary is large
+        enough to be indexed and by the common characters).
+        Other scorers than SequenceMatcherScorer are just called for
+        every combination.
+
+        (0, []) is returned if no key reaches the cutoff.
+        """
+        cutoff = find_best_control_match_cutoff
+        scorer = similarity.get_scorer(scorer)
+
+        # a perfect match of the not normalized texts cannot be beaten
+        if search_text in self and 1.0 >= cutoff:
+            return 1.0, [search_text]
+
+        if not isinstance(scorer, similarity.SequenceMatcherScorer):
+            best_ratio, best = 0, []
+            for clean, ignore_case in _match_variants:
+                ratio, texts = self.find_best_matches(search_text, clean, ignore_case, scorer)
+                if ratio > best_ratio:
+                    best_ratio, best = ratio, texts
+            if best_ratio < cutoff:
+                return 0, []
+            return best_ratio, best
+
+        search_lower = search_text.lower()
+        search_texts = (search_text, search_lower, search_text, search_lower)
+        offsets = [_get_ratio_offset(clean, ignore_case) for clean, ignore_case in _match_variants]
+
+        # one SequenceMatcher per search text (seq1 is fixed, seq2 is the key)
+        ratio_calcs = {}
+        search_chars = {}
+        for text in search_texts:
+            if text not in ratio_calcs:
+                ratio_calcs[text] = difflib.SequenceMatcher()
+                ratio_calcs[text].set_seq1(text)
+                search_chars[text] = [(char, text.count(char)) for char in set(text)]
+
+        best_ratios = [0] * len(_match_variants)
+        best_texts = [[] for _ in _match_variants]
+        search_lengths = [len(text) for text in search_texts]
+
+        # the number of trigrams every key shares with the search text
+        # (None for the variants without an index)
+        shared_trigrams = []
+        for variant, (clean, ignore_case) in enumerate(_match_variants):
+            index = self._get_trigram_index(clean, ignore_case)
+            shared_trigrams.append(None if index is None else index.shared_trigrams(search_texts[variant]))
+
+        # A cleaned text equal to the not cleaned one is skipped: it is compared
+        # with the same search text at a lower or the same ratio offset,
+        # so it cannot beat the best ratio of the previous variant
+        for position, (key, texts, lengths, variants) in enumerate(self._get_key_variants()):
+            for variant in variants:
+                # a variant is chosen only if it beats all the previous variants
+                previous_best = max(best_ratios[:variant]) if variant else 0
+                need = max(cutoff, best_ratios[variant])
+                ratio_offset = offsets[variant]
+
+                # upper bound by the lengths (the same as real_quick_ratio())
+                length = lengths[variant] + search_lengths[variant]
+                ratio = ratio_offset
+                if length:
+                    ratio = 2.0 * min(lengths[variant], search_lengths[variant]) / length * ratio_offset
+                if ratio < need or ratio <= previous_best:
+                    continue
+
+                text = texts[variant]
+                search = search_texts[variant]
+                real_ratio = ratio_cache.get(text, search)
+                if real_ratio is None:
+                    # upper bound by the shared trigrams (see _TrigramIndex)
+                    if shared_trigrams[variant] is not None:
+                        bound = similarity.trigram_ratio_bound(
+                            shared_trigrams[variant][position], lengths[variant], search_lengths[variant])
+                        ratio = bound * ratio_offset
+                        if ratio < need or ratio <= previous_best:
+                            continue
+
+                    # upper bound by the common characters (the same as quick_ratio())
+                    # without the expensive SequenceMatcher.set_seq2()
+                    if length:
+                        matches = sum([min(text.count(char), count) for char, count in search_chars[search]])
+                        ratio = 2.0 * matches / length * ratio_offset
+                    if ratio < need or ratio <= previous_best:
+                        continue
+
+                    ratio_calc = ratio_calcs[search]
+                    if ratio_calc.b != text:
+                        ratio_calc.set_seq2(text)
+                    real_ratio = ratio_calc.ratio()
+                    ratio_cache.put(text, search, real_ratio)
+
+                ratio = real_ratio * ratio_offset
+                if ratio < need or ratio <= previous_best:
+                    continue
+
+                if ratio > best_ratios[variant]:
+                    best_ratios[variant] = ratio
+                    best_texts[variant] = [key]
+                else:
+                    best_texts[variant].append(key)
+
+        best_ratio, best = best_ratios[0], best_texts[0]
+        for variant in range(1, len(_match_variants)):
+            if best_ratios[variant] > best_ratio:
+                best_ratio, best = best_ratios[variant], best_texts[variant]
+        return best_ratio, best
+
+    def find_best_topk(self, search_text, k, scorer = None):
+        """Return the k best keys for search_text as (key, ratio, variant)
+
+        The ratio of a key is the best one of all the normalizations and
+        variant is the name of that normalization in match_variant_names.
+        The keys below the cutoff are included also. The result is sorted
+        by the ratio and then by the order of the keys. The k best keys
+        are kept in a heap, so a key is not scored for a normalization
+        that cannot get it into the heap.
+        """
+        if k <= 0:
+            return []
+
+        scorer = similarity.get_scorer(scorer)
+        search_lower = search_text.lower()
+        search_texts = (search_text, search_lower, search_text, search_lower)
+        search_lengths = [len(text) for text in search_texts]
+        offsets = [_get_ratio_offset(clean, ignore_case) for clean, ignore_case in _match_variants]
+        key_variants = self._get_key_variants()
+
+        if isinstance(scorer, similarity.SequenceMatcherScorer):
+            ratio_calcs = {}
+            for text in search_texts:
+                ratio_calcs[text] = difflib.SequenceMatcher()
+                ratio_calcs[text].set_seq1(text)
+            scored_ratios = None
+        else:
+            # other scorers get all the keys at once
+            scored_ratios = [
+                scorer.ratios(search_texts[variant], [texts[variant] for _, texts, _, _ in key_variants])
+                for variant in range(len(_match_variants))]
+
+        # a min heap of (ratio, -position, key, variant)
+        heap = []
+        for position, (key, texts, lengths, variants) in enumerate(key_variants):
+            best_ratio, best_variant = None, None
+            for variant in variants:
+                # a key has to beat the worst of the k best ones to get into the heap
+                need = heap[0][0] if len(heap) == k else -1
+                if best_ratio is not None:
+                    need = max(need, best_ratio)
+
+                length = lengths[variant] + search_lengths[variant]
+                bound = 1.0
+                if length:
+                    bound = 2.0 * min(lengths[variant], search_lengths[variant]) / length
+                if bound * offsets[variant] <= need:
+                    continue
+
+                if scored_ratios is not None:
+                    ratio = scored_ratios[variant][position]
+                else:
+                    text, search = texts[variant], search_texts[variant]
+                    ratio = ratio_cache.get(text, search)
+                    if ratio is None:
+                        ratio_calc = ratio_calcs[search]
+                        ratio_calc.set_seq2(text)
+                        ratio = ratio_calc.ratio()
+                        ratio_cache.put(text, search, ratio)
+                ratio *= offsets[variant]
+
+                if best_ratio is None or ratio > best_ratio:
+                    best_ratio, best_variant = ratio, variant
+
+            if best_ratio is None:
+                continue
+            item = (best_ratio, -position, key, match_variant_names[best_variant])
+            if len(heap) < k:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+
+        return [(key, ratio, variant) for ratio, _, key, variant in sorted(heap, reverse=True)]
+
 
 #====================================================================
 def build_unique_dict(controls):
@@ -462,24 +1127,28 @@ def build_unique_dict(controls):
     """
     name_control_map = UniqueDict()
 
+    # the names are built from the properties retrieved once per control
+    snapshots = [ControlSnapshot(ctrl) for ctrl in controls]
+
     # get the visible text controls so that we can get
     # the closest text if the control has no text
-    text_ctrls = [ctrl_ for ctrl_ in controls
+    text_ctrls = [ctrl_ for ctrl_ in snapshots
                   if ctrl_.can_be_label and ctrl_.is_visible() and ctrl_.window_text()]
+    label_index = LabelIndex(snapshots, text_ctrls)
 
     # collect all the possible names for all controls
     # and build a list of them
-    for ctrl in controls:
-        ctrl_names = get_control_names(ctrl, controls, text_ctrls)
+    for snapshot in snapshots:
+        ctrl_names = get_control_names(snapshot, snapshots, text_ctrls, label_index)
 
         # for each of the names
         for name in ctrl_names:
-            name_control_map[name] = ctrl
+            name_control_map[name] = snapshot.control
     return name_control_map
 
 
 #====================================================================
-def find_best_control_matches(search_text, controls):
+def find_best_control_matches(search_text, controls, scorer = None):
     """Returns the control that is the the best match to search_text
 
     This is slightly differnt from find_best_match in that it builds
@@ -490,6 +1159,9 @@ def find_best_control_matches(search_text, controls):
 
     But if there is a ListView (which do not have visible 'text')
     then it will just add "ListView".
+
+    scorer is the name or the object of a :mod:`pywinauto.similarity`
+    scorer (the default scorer if None).
     """
     name_control_map = build_unique_dict(controls)
 
@@ -505,30 +1177,8 @@ def find_best_control_matches(search_text, controls):
 
     search_text = str(search_text)
 
-    best_ratio, best_texts = name_control_map.find_best_matches(search_text)
-
-    best_ratio_ci, best_texts_ci = \
-        name_control_map.find_best_matches(search_text, ignore_case = True)
-
-    best_ratio_clean, best_texts_clean = \
-        name_control_map.find_best_matches(search_text, clean = True)
-
-    best_ratio_clean_ci, best_texts_clean_ci = \
-        name_control_map.find_best_matches(
-            search_text, clean = True, ignore_case = True)
-
-
-    if best_ratio_ci > best_ratio:
-        best_ratio = best_ratio_ci
-        best_texts = best_texts_ci
-
-    if best_ratio_clean > best_ratio:
-        best_ratio = best_ratio_clean
-        best_texts = best_texts_clean
-
-    if best_ratio_clean_ci > best_ratio:
-        best_ratio = best_ratio_clean_ci
-        best_texts = best_texts_clean_ci
+    # plain, ignore_case, clean and clean+ignore_case matches in one pass
+    best_ratio, best_texts = name_control_map.find_best_variant_matches(search_text, scorer)
 
     if best_ratio < find_best_control_match_cutoff:
         raise MatchError(items = name_control_map.keys(), tofind = search_text)
@@ -536,6 +1186,20 @@ def find_best_control_matches(search_text, controls):
     return [name_control_map[best_text] for best_text in best_texts]
 
 
+#====================================================================
+def find_best_control_matches_topk(search_text, controls, k = 5, scorer = None):
+    """Returns the k best matches of search_text as (name, ratio, variant, control)
+
+    The names are built the same way as for find_best_control_matches
+    and the names below the cutoff are returned also, so it shows
+    the runner-up candidates of a best_match lookup. variant is the text
+    normalization giving the ratio (see match_variant_names).
+    """
+    name_control_map = build_unique_dict(controls)
+    matches = name_control_map.find_best_topk(str(search_text), k, scorer)
+    return [(name, ratio, variant, name_control_map[name]) for name, ratio, variant in matches]
+
+
 #
 #def GetControlMatchRatio(text, ctrl):
 #    # get the texts for the control
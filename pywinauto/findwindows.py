@@ -33,12 +33,16 @@
 from __future__ import unicode_literals
 
 import re
+import copy
+import itertools
 import warnings
 
 from . import findbestmatch
 from . import WindowNotFoundError
 from . import controls
 from .backend import registry
+from .element_info import PROP_COST_IPC
+from .selector import compile_selector
 
 
 # TODO: we should filter out invalid elements before returning
@@ -79,8 +83,21 @@ def find_element(**kwargs):
 
     Calls find_elements with exactly the same arguments as it is called with
     so please see :py:func:`find_elements` for the full parameters description.
+    If possible the elements are searched lazily: the search stops
+    at the element with found_index or at the second matching element
+    which makes the criteria ambiguous.
     """
-    elements = find_elements(**kwargs)
+    criteria = _get_criteria(kwargs)
+    # report the keywords the criteria were compiled from
+    kwargs = criteria.kwargs
+
+    found_elements = _iter_elements(criteria)
+    if found_elements is None:
+        elements = find_elements(criteria=criteria)
+        count_text = "{0}".format(len(elements))
+    else:
+        elements = list(itertools.islice(found_elements, 2))
+        count_text = "at least {0}".format(len(elements))
 
     if not elements:
         raise ElementNotFoundError(kwargs)
@@ -88,7 +105,7 @@ def find_element(**kwargs):
     if len(elements) > 1:
         exception = ElementAmbiguousError(
             "There are {0} elements that match the criteria {1}".format(
-                len(elements),
+                count_text,
                 str(kwargs),
             )
         )
@@ -121,24 +138,360 @@ def _raise_search_key_error(key, all_props):
     raise KeyError('Incorrect search keyword "{}". Availaible keywords: {}'.format(key, all_props))
 
 
+#=========================================================================
+class Criteria(object):
+
+    """Search criteria of :py:func:`find_elements` checked and compiled once
+
+    The property keywords are renamed and validated for the element info class
+    of the backend, the regular expressions are compiled and the filters are
+    put cheapest first by the prop_costs of the element info class (then in
+    the order of its search_order). The object can be passed to
+    find_elements as ``criteria`` keyword, so repeated searches
+    (e.g. retries of a WindowSpecification) only traverse the elements.
+    """
+
+    # keywords which control the search (not element properties) and their defaults
+    search_keywords = {
+        'backend': None,
+        'parent': None,
+        'handle': None,
+        'ctrl_index': None,
+        'top_level_only': True,
+        'depth': None,
+        'best_match': None,
+        'predicate_func': None,
+        'found_index': None,
+        'active_only': False,
+        'selector': None,
+    }
+
+    # search keywords which can be changed without compiling the criteria again
+    runtime_keywords = ('parent', 'ctrl_index', 'top_level_only', 'depth',
+                        'best_match', 'predicate_func', 'found_index', 'active_only')
+
+    # reorder the filters by the observed share of the elements passing them,
+    # so a cheap filter rejecting few elements goes after a selective one
+    adaptive_order = False
+    # number of the checked elements between reorderings
+    reorder_interval = 500
+    # number of the checks of a filter before its statistics are used
+    min_filter_checks = 100
+
+    def __init__(self, **kwargs):
+        """Check and compile the keyword arguments of find_elements"""
+        self.kwargs = kwargs
+        self.props = dict(kwargs)
+        for key, default in self.search_keywords.items():
+            setattr(self, key, self.props.pop(key, default))
+
+        if self.backend is None:
+            self.backend = registry.active_backend.name
+        self.backend_obj = registry.backends[self.backend]
+
+        # (keyword, function returning True for a matching element)
+        self.filters = []
+        # keyword: (cost, position in the search order)
+        self._filter_costs = {}
+        # keyword: [checked elements, passed elements]
+        self._filter_stats = {}
+        self._checked_count = 0
+        # the parsed selector and the criteria of its steps
+        self.selector_plan = None
+        self.selector_steps = []
+        # a handle is already unique identifier, other keywords are not used
+        if self.handle is None:
+            self._compile()
+            if self.selector is not None:
+                self._compile_selector()
+
+    def __repr__(self):
+        """Return the keywords the criteria are compiled from"""
+        return 'Criteria({})'.format(self.kwargs)
+
+    def _compile(self):
+        """Rename, check the property keywords and build the filters"""
+        element_info_class = self.backend_obj.element_info_class
+        props = self.props
+
+        # tell user about new property name for every renamed one
+        if hasattr(element_info_class, 'renamed_props'):
+            #renamed_erros = []
+            items = list(props.items())
+            for key, value in items:
+                renamed_prop = element_info_class.renamed_props.get(key, None)
+                if renamed_prop is not None:
+                    new_key, values_map = renamed_prop
+                    if values_map and value in values_map.keys():
+                        error_msg = '"{}={}" -> "{}={}"'.format(key, value, new_key, values_map[value])
+                        props[new_key] = values_map[value]
+                    else:
+                        error_msg = '"{}" -> "{}"'.format(key, new_key)
+                        props[new_key] = props[key]
+                    del props[key]
+                    #renamed_erros.append(error_msg)
+                    warnings.warn("[pywinauto>=0.7.0] Keyword is renamed: {}".format(error_msg), DeprecationWarning)
+            # TODO: raise error in future releases
+            #if renamed_erros:
+            #    raise RenamedKeywordError('[pywinauto>=0.7.0] Some search keywords are renamed: ' + ', '.join(renamed_erros))
+
+        re_props = element_info_class.re_props
+        exact_only_props = element_info_class.exact_only_props
+        all_props = re_props + exact_only_props
+        for key, _ in props.items():
+            if key.endswith('_re') and key[:-3] not in re_props:
+                _raise_search_key_error(key, all_props)
+            if not key.endswith('_re') and key not in all_props:
+                _raise_search_key_error(key, all_props)
+
+        for prop in element_info_class.search_order:
+            cost = element_info_class.prop_costs.get(prop, PROP_COST_IPC)
+            exact_search_value = props.get(prop)
+            if prop in re_props:
+                re_search_value = props.get(prop + '_re')
+                if exact_search_value is not None and \
+                        re_search_value is not None:
+                    raise ValueError('Mutually exclusive keywords are used: "{}", "{}"'.format(prop, prop + '_re'))
+                if re_search_value is not None:
+                    self._add_filter(prop + '_re', cost, self._get_re_filter(prop, re.compile(re_search_value)))
+            if exact_search_value is not None:
+                self._add_filter(prop, cost, self._get_exact_filter(prop, exact_search_value))
+        self._order_filters()
+
+    def _compile_selector(self):
+        """Parse the selector and compile the criteria of its steps"""
+        self.selector_plan = compile_selector(self.selector)
+        self.selector_steps = []
+        for step in self.selector_plan.steps:
+            for key in step.props:
+                if key in self.search_keywords:
+                    raise KeyError('Search keyword "{}" can not be used in a selector'.format(key))
+            self.selector_steps.append(Criteria(backend=self.backend, **step.props))
+
+    def select(self, parent, depth=None):
+        """Walk the tree under the parent and yield the elements matching the selector"""
+        matchers = [step_criteria.match for step_criteria in self.selector_steps]
+        return self.selector_plan.iter_elements(parent, matchers, depth)
+
+    def _add_filter(self, keyword, cost, prop_filter):
+        """Append the filter for the keyword with the cost of its property"""
+        self._filter_costs[keyword] = (cost, len(self.filters))
+        self.filters.append((keyword, prop_filter))
+
+    def _get_filter_rank(self, keyword):
+        """Return the sort key of the filter: expected cost to reject an element
+
+        Without the statistics half of the elements are assumed to pass
+        every filter, so the filters are sorted by cost and search order.
+        """
+        cost, position = self._filter_costs[keyword]
+        pass_rate = 0.5
+        checked, passed = self._filter_stats.get(keyword, (0, 0))
+        if checked >= self.min_filter_checks:
+            pass_rate = min(float(passed) / checked, 0.99)
+        return (cost / (1.0 - pass_rate), position)
+
+    def _order_filters(self):
+        """Sort the filters cheapest and most selective first"""
+        # a new list, so a running match() of a copy isn't affected
+        self.filters = sorted(self.filters, key=lambda item: self._get_filter_rank(item[0]))
+
+    @staticmethod
+    def _get_re_filter(prop, regex):
+        """Return a filter matching the property by the compiled regular expression"""
+        return lambda elem: regex.match(getattr(elem, prop))
+
+    @staticmethod
+    def _get_exact_filter(prop, value):
+        """Return a filter comparing the property with the value"""
+        return lambda elem: value == getattr(elem, prop)
+
+    def copy(self, **kwargs):
+        """Return the criteria with some keywords replaced
+
+        Only the criteria changed by other keywords than runtime_keywords
+        are compiled again.
+        """
+        if any(key not in self.runtime_keywords for key in kwargs):
+            new_kwargs = dict(self.kwargs)
+            new_kwargs.update(kwargs)
+            return Criteria(**new_kwargs)
+
+        criteria = copy.copy(self)
+        criteria.kwargs = dict(self.kwargs)
+        criteria.kwargs.update(kwargs)
+        for key, value in kwargs.items():
+            setattr(criteria, key, value)
+        return criteria
+
+    def match(self, elem):
+        """Return True if the element matches all the property filters"""
+        if self.adaptive_order:
+            return self._match_counting(elem)
+        for _, prop_filter in self.filters:
+            if not prop_filter(elem):
+                return False
+        return True
+
+    def _match_counting(self, elem):
+        """Match the element collecting the statistics of the filters"""
+        matched = True
+        for keyword, prop_filter in self.filters:
+            stats = self._filter_stats.setdefault(keyword, [0, 0])
+            stats[0] += 1
+            if not prop_filter(elem):
+                matched = False
+                break
+            stats[1] += 1
+
+        self._checked_count += 1
+        if self._checked_count % self.reorder_interval == 0:
+            self._order_filters()
+        return matched
+
+
+def _get_criteria(kwargs):
+    """Return Criteria for the keyword arguments of find_elements"""
+    kwargs = dict(kwargs)
+    criteria = kwargs.pop('criteria', None)
+    if criteria is None:
+        return Criteria(**kwargs)
+    if kwargs:
+        return criteria.copy(**kwargs)
+    return criteria
+
+
+def _get_parent_element_info(backend_obj, parent):
+    """Return the element info of the parent passed to find_elements"""
+    if isinstance(parent, backend_obj.generic_wrapper_class):
+        parent = parent.element_info
+    elif isinstance(parent, int):
+        # check if parent is a handle of element (in case of searching native controls)
+        parent = backend_obj.element_info_class(parent)
+    elif parent and not isinstance(parent, backend_obj.element_info_class):
+        raise TypeError('Parent must be {}, {}, integer or None'.format(backend_obj.generic_wrapper_class,
+                                                                        backend_obj.element_info_class))
+    return parent
+
+
+#=========================================================================
+def _iter_elements(criteria):
+    """
+    Return an iterator over the elements matching the criteria or None
+
+    The elements are the same and in the same order as find_elements returns
+    but they are walked through and filtered lazily, so the search stops
+    as soon as the caller stops iterating.
+    None is returned if the whole list of the elements is needed (best_match,
+    ctrl_index) or the backend can't iterate over the descendants
+    in the order of ElementInfo.descendants().
+    """
+    if criteria.handle is not None or criteria.best_match is not None or \
+            criteria.ctrl_index is not None:
+        return None
+    if criteria.found_index is not None and criteria.found_index < 0:
+        return None
+    depth = criteria.depth
+    if depth is not None and not (isinstance(depth, int) and depth > 0):
+        # let find_elements() report the wrong depth
+        return None
+
+    backend_obj = criteria.backend_obj
+    parent = _get_parent_element_info(backend_obj, criteria.parent)
+    props = criteria.props
+
+    if criteria.selector is not None:
+        if not parent:
+            parent = backend_obj.element_info_class()
+        elements = criteria.select(parent, depth)
+    elif criteria.top_level_only:
+        # find the top level elements
+        element = backend_obj.element_info_class()
+        elements = element.children(class_name=props.get('class_name'),
+                                    name=props.get('name'),
+                                    control_type=props.get('control_type'),
+                                    process=props.get('pid'),
+                                    cache_enable=element.search_cache_enable)
+
+        # if we have been given a parent
+        if parent:
+            elements = (elem for elem in elements if elem.parent == parent)
+    else:
+        # if not given a parent look for all children of the desktop
+        if not parent:
+            parent = backend_obj.element_info_class()
+
+        elements = None
+        if depth is None:
+            elements = parent.query_descendants(props, cache_enable=parent.search_cache_enable)
+        if elements is None:
+            if not parent.ordered_iter_descendants:
+                return None
+            elements = parent.iter_descendants(class_name=props.get('class_name'),
+                                               name=props.get('name'),
+                                               control_type=props.get('control_type'),
+                                               process=props.get('pid'),
+                                               cache_enable=parent.search_cache_enable,
+                                               depth=depth)
+
+    return _filter_elements(criteria, elements)
+
+
+def _filter_elements(criteria, elements):
+    """Yield the elements matching the criteria in the order of find_elements filters"""
+    active_elem = None
+    if criteria.active_only:
+        # TODO: re-write to use ElementInfo interface
+        active_elem = criteria.backend_obj.element_info_class.get_active()
+
+    found_count = 0
+    for elem in elements:
+        if not criteria.match(elem):
+            continue
+        if criteria.active_only and elem.handle != active_elem:
+            continue
+        elem.set_cache_strategy(cached=False)
+        if criteria.predicate_func is not None and not criteria.predicate_func(elem):
+            continue
+
+        if criteria.found_index is None:
+            yield elem
+        elif found_count == criteria.found_index:
+            yield elem
+            return
+        else:
+            found_count += 1
+
+
 #=========================================================================
 def find_elements(**kwargs):
-    backend = kwargs.pop('backend', None)
-    parent = kwargs.pop('parent', None)
-    handle = kwargs.pop('handle', None)
-    ctrl_index = kwargs.pop('ctrl_index', None)
-    top_level_only = kwargs.pop('top_level_only', True)
+    """
+    Find elements based on criteria passed in and return list of them
+
+    The keyword arguments are the properties of the backend's element info
+    (exact values or regular expressions with ``_re`` suffix) and the search
+    keywords of :py:class:`Criteria`. Precompiled criteria can be passed
+    as ``criteria`` keyword, the other keywords override its search keywords.
+
+    A ``selector`` (see :py:mod:`pywinauto.selector`) replaces top_level_only:
+    the elements matched by it under the parent (or the desktop) are taken
+    and filtered by the other keywords.
+    """
+    criteria = _get_criteria(kwargs)
+
+    backend_obj = criteria.backend_obj
+    parent = criteria.parent
+    handle = criteria.handle
+    ctrl_index = criteria.ctrl_index
+    top_level_only = criteria.top_level_only
     # TODO: depth = 1, remove top_level_only?
-    depth = kwargs.pop('depth', None)
-    best_match = kwargs.pop('best_match', None)
-    predicate_func = kwargs.pop('predicate_func', None)
+    depth = criteria.depth
+    best_match = criteria.best_match
+    predicate_func = criteria.predicate_func
     # TODO: eliminate found_index by find_all
-    found_index = kwargs.pop('found_index', None)
-    active_only = kwargs.pop('active_only', False)
-
-    if backend is None:
-        backend = registry.active_backend.name
-    backend_obj = registry.backends[backend]
+    found_index = criteria.found_index
+    active_only = criteria.active_only
+    props = criteria.props
 
     if handle is not None:
         # TODO: uncomment later
@@ -148,55 +501,23 @@ def find_elements(**kwargs):
         # if it is present - just return it
         return [backend_obj.element_info_class(handle), ]
 
-    # tell user about new property name for every renamed one
-    if hasattr(backend_obj.element_info_class, 'renamed_props'):
-        #renamed_erros = []
-        items = list(kwargs.items())
-        for key, value in items:
-            renamed_prop = backend_obj.element_info_class.renamed_props.get(key, None)
-            if renamed_prop is not None:
-                new_key, values_map = renamed_prop
-                if values_map and value in values_map.keys():
-                    error_msg = '"{}={}" -> "{}={}"'.format(key, value, new_key, values_map[value])
-                    kwargs[new_key] = values_map[value]
-                else:
-                    error_msg = '"{}" -> "{}"'.format(key, new_key)
-                    kwargs[new_key] = kwargs[key]
-                del kwargs[key]
-                #renamed_erros.append(error_msg)
-                warnings.warn("[pywinauto>=0.7.0] Keyword is renamed: {}".format(error_msg), DeprecationWarning)
-        # TODO: raise error in future releases
-        #if renamed_erros:
-        #    raise RenamedKeywordError('[pywinauto>=0.7.0] Some search keywords are renamed: ' + ', '.join(renamed_erros))
-
-    re_props = backend_obj.element_info_class.re_props
-    exact_only_props = backend_obj.element_info_class.exact_only_props
-    all_props = re_props + exact_only_props
-    for key, _ in kwargs.items():
-        if key.endswith('_re') and key[:-3] not in re_props:
-            _raise_search_key_error(key, all_props)
-        if not key.endswith('_re') and key not in all_props:
-            _raise_search_key_error(key, all_props)
-
-    if isinstance(parent, backend_obj.generic_wrapper_class):
-        parent = parent.element_info
-    elif isinstance(parent, int):
-        # check if parent is a handle of element (in case of searching native controls)
-        parent = backend_obj.element_info_class(parent)
-    elif parent and not isinstance(parent, backend_obj.element_info_class):
-        raise TypeError('Parent must be {}, {}, integer or None'.format(backend_obj.generic_wrapper_class,
-                                                                        backend_obj.element_info_class))
+    parent = _get_parent_element_info(backend_obj, parent)
 
     # create initial list of all elements
-    if top_level_only:
+    if criteria.selector is not None:
+        if not parent:
+            parent = backend_obj.element_info_class()
+        parent._check_depth(depth)
+        elements = list(criteria.select(parent, depth))
+    elif top_level_only:
         # find the top level elements
         element = backend_obj.element_info_class()
         # TODO: think about not passing **kwargs
-        elements = element.children(class_name=kwargs.get('class_name'),
-                                    name=kwargs.get('name'),
-                                    control_type=kwargs.get('control_type'),
-                                    process=kwargs.get('pid'),
-                                    cache_enable=False)
+        elements = element.children(class_name=props.get('class_name'),
+                                    name=props.get('name'),
+                                    control_type=props.get('control_type'),
+                                    process=props.get('pid'),
+                                    cache_enable=element.search_cache_enable)
 
         # if we have been given a parent
         if parent:
@@ -208,14 +529,22 @@ def find_elements(**kwargs):
         if not parent:
             parent = backend_obj.element_info_class()
 
-        # look for ALL children of that parent
-        # TODO: think about not passing **kwargs
-        elements = parent.descendants(class_name=kwargs.get('class_name'),
-                                      name=kwargs.get('name'),
-                                      control_type=kwargs.get('control_type'),
-                                      process=kwargs.get('pid'),
-                                      cache_enable=False,
-                                      depth=depth)
+        # let the backend match the candidates on the server side if it can
+        elements = None
+        if depth is None:
+            elements = parent.query_descendants(props, cache_enable=parent.search_cache_enable)
+
+        if elements is not None:
+            elements = list(elements)
+        else:
+            # look for ALL children of that parent
+            # TODO: think about not passing **kwargs
+            elements = parent.descendants(class_name=props.get('class_name'),
+                                          name=props.get('name'),
+                                          control_type=props.get('control_type'),
+                                          process=props.get('pid'),
+                                          cache_enable=parent.search_cache_enable,
+                                          depth=depth)
 
     # early stop
     if not elements:
@@ -228,21 +557,11 @@ def find_elements(**kwargs):
     # if the ctrl_index has been specified then just return
     # that control
     if ctrl_index is not None:
+        elements[ctrl_index].set_cache_strategy(cached=False)
         return [elements[ctrl_index], ]
 
-
-    for prop in backend_obj.element_info_class.search_order:
-        exact_search_value = kwargs.get(prop)
-        if prop in backend_obj.element_info_class.re_props:
-            re_search_value = kwargs.get(prop + '_re')
-            if exact_search_value is not None and \
-                    re_search_value is not None:
-                raise ValueError('Mutually exclusive keywords are used: "{}", "{}"'.format(prop, prop + '_re'))
-            if re_search_value is not None:
-                regex = re.compile(re_search_value)
-                elements = [elem for elem in elements if regex.match(getattr(elem, prop))]
-        if exact_search_value is not None:
-            elements = [elem for elem in elements if exact_search_value == getattr(elem, prop)]
+    if criteria.filters:
+        elements = [elem for elem in elements if criteria.match(elem)]
 
     if active_only:
         # TODO: re-write to use ElementInfo interface
@@ -33,10 +33,13 @@
 
 Implemented for pywinauto.
 
-This class uses difflib to match strings.
-This class uses a linear search to find the items as it HAS to iterate over
-every item in the dictionary (otherwise it would not be possible to know which
-is the 'best' match).
+This class uses difflib to match strings by default, other scorers
+of pywinauto.similarity can be used also.
+The keys are indexed by their lengths and trigrams, so only the keys
+which can beat the best match found so far are compared (it is still
+the same 'best' match as a linear search over every item would find).
+The results of the recent lookups are remembered until the dictionary
+is changed. A FuzzyDict can be used from several threads.
 
 If the exact item is in the dictionary (no fuzzy matching needed - then it
 doesn't do the linear search and speed should be similar to standard Python
@@ -67,13 +70,19 @@ KeyError: "'There'. closest match: 'hello' with ratio 0.400"
 from __future__ import unicode_literals
 
 import difflib
+import threading
 from collections import OrderedDict
 
+from . import similarity
+
 class FuzzyDict(OrderedDict):
 
     """Provides a dictionary that performs fuzzy lookup"""
 
-    def __init__(self, items = None, cutoff = .6):
+    # the number of the recent fuzzy lookups remembered (0 to not remember them)
+    memo_size = 1000
+
+    def __init__(self, items = None, cutoff = .6, scorer = None):
         """
         Construct a new FuzzyDict instance
 
@@ -81,6 +90,8 @@ class FuzzyDict(OrderedDict):
         cutoff is the match ratio below which mathes should not be considered
         cutoff needs to be a float between 0 and 1 (where zero is no match
         and 1 is a perfect match).
+        scorer is the name or the object of a pywinauto.similarity scorer
+        (optional, the default scorer at the time of the lookup if None)
         """
         super(FuzzyDict, self).__init__()
 
@@ -92,46 +103,272 @@ class FuzzyDict(OrderedDict):
             super(FuzzyDict, self).__getitem__(key)
 
         self.cutoff =  cutoff
+        self.scorer = scorer
+
+        # the dictionary, its indexes and the memo are used under the lock
+        self._lock = threading.RLock()
+
+        # the keys by their lengths (None for the keys without length)
+        # in the order of the dictionary
+        self._keys_by_length = {}
+        # trigram -> {text key: the number of the trigram occurrences}
+        self._trigram_keys = {}
+        self._indexed_count = 0
+
+        # (lookfor, cutoff, scorer) -> the result of _search()
+        self._memo = OrderedDict()
+
         if items:
             self.update(items)
 
+    @staticmethod
+    def _get_key_length(key):
+        """Return the length of the key or None if it has no length"""
+        try:
+            return len(key)
+        except TypeError:
+            return None
+
+    def _index_key(self, key):
+        """Add the key to the length and trigram indexes"""
+        self._keys_by_length.setdefault(self._get_key_length(key), OrderedDict())[key] = None
+        if isinstance(key, type("")):
+            for trigram, count in similarity.get_trigrams(key).items():
+                self._trigram_keys.setdefault(trigram, {})[key] = count
+        self._indexed_count += 1
+
+    def _unindex_key(self, key):
+        """Remove the key from the length and trigram indexes"""
+        length = self._get_key_length(key)
+        keys = self._keys_by_length.get(length, {})
+        if key not in keys:
+            return
+        del keys[key]
+        if not keys:
+            del self._keys_by_length[length]
+        if isinstance(key, type("")):
+            for trigram in similarity.get_trigrams(key):
+                keys = self._trigram_keys.get(trigram, {})
+                keys.pop(key, None)
+                if not keys:
+                    self._trigram_keys.pop(trigram, None)
+        self._indexed_count -= 1
+
+    def _check_indexes(self):
+        """Rebuild the indexes if the dictionary was changed
+        bypassing the methods below (e.g. by OrderedDict.__delitem__)
+        """
+        if self._indexed_count != len(self):
+            self._keys_by_length = {}
+            self._trigram_keys = {}
+            self._indexed_count = 0
+            for key in self:
+                self._index_key(key)
+
+    def __setitem__(self, key, value):
+        """Overides OrderedDict __setitem__ to keep the indexes up to date"""
+        with self._lock:
+            if not self._dict_contains(key):
+                self._index_key(key)
+            super(FuzzyDict, self).__setitem__(key, value)
+            self._memo.clear()
+
+    def __delitem__(self, key):
+        """Overides OrderedDict __delitem__ to keep the indexes up to date"""
+        with self._lock:
+            super(FuzzyDict, self).__delitem__(key)
+            self._unindex_key(key)
+            self._memo.clear()
+
+    def pop(self, key, *default):
+        """Overides OrderedDict pop to keep the indexes up to date"""
+        with self._lock:
+            if self._dict_contains(key):
+                value = self._dict_getitem(key)
+                del self[key]
+                return value
+            return super(FuzzyDict, self).pop(key, *default)
+
+    def popitem(self, last = True):
+        """Overides OrderedDict popitem to keep the indexes up to date"""
+        with self._lock:
+            key, value = super(FuzzyDict, self).popitem(last)
+            self._unindex_key(key)
+            self._memo.clear()
+            return key, value
+
+    def move_to_end(self, key, last = True):
+        """Overides OrderedDict move_to_end, the order of the keys breaks the ties"""
+        with self._lock:
+            super(FuzzyDict, self).move_to_end(key, last)
+            self._memo.clear()
+
+    def clear(self):
+        """Overides OrderedDict clear to keep the indexes up to date"""
+        with self._lock:
+            super(FuzzyDict, self).clear()
+            self._keys_by_length = {}
+            self._trigram_keys = {}
+            self._indexed_count = 0
+            self._memo.clear()
+
     def _search(self, lookfor, stop_on_first = False):
         """
         Returns the value whose key best matches lookfor
 
         if stop_on_first is True then the method returns as soon
-        as it finds the first item.
+        as it finds the first item (unless the lookups are remembered,
+        a full result answers the next __getitem__ too).
         """
-        # if the item is in the dictionary then just return it
-        if self._dict_contains(lookfor):
-            return True, lookfor, self._dict_getitem(lookfor), 1
+        with self._lock:
+            # if the item is in the dictionary then just return it
+            if self._dict_contains(lookfor):
+                return True, lookfor, self._dict_getitem(lookfor), 1
+
+            scorer = similarity.get_scorer(self.scorer)
+
+            memo_key = (lookfor, self.cutoff, scorer)
+            if self.memo_size:
+                if memo_key in self._memo:
+                    self._memo.move_to_end(memo_key)
+                    return self._memo[memo_key]
+                stop_on_first = False
+
+            if isinstance(scorer, similarity.SequenceMatcherScorer):
+                result = self._search_ratios(lookfor, stop_on_first)
+            else:
+                result = self._search_scored(scorer, lookfor, stop_on_first)
+
+            if self.memo_size:
+                self._memo[memo_key] = result
+                while len(self._memo) > self.memo_size:
+                    self._memo.popitem(last = False)
 
+            return result
+
+    def _search_ratios(self, lookfor, stop_on_first):
+        """Returns the value whose key best matches lookfor by SequenceMatcher ratios"""
         # set up the fuzzy matching tool
         ratio_calc = difflib.SequenceMatcher()
         ratio_calc.set_seq1(lookfor)
 
+        try:
+            lookfor_length = len(lookfor)
+        except TypeError:
+            # it cannot be fuzzy matched so it is not in the dictionary
+            return 0 >= self.cutoff, None, None, 0
+
+        self._check_indexes()
+
+        # the number of trigrams each text key shares with lookfor
+        shared = {}
+        text_lookfor = isinstance(lookfor, type(""))
+        if text_lookfor:
+            for trigram, count in similarity.get_trigrams(lookfor).items():
+                for key, key_count in self._trigram_keys.get(trigram, {}).items():
+                    shared[key] = shared.get(key, 0) + min(count, key_count)
+
+        # upper bounds of the ratios: by the shared trigrams for each key
+        # sharing some and by the lengths (the same as real_quick_ratio())
+        # for the other keys, the keys with the highest bounds are tested first
+        bounds = []
+        for key, count in shared.items():
+            bounds.append((similarity.trigram_ratio_bound(count, len(key), lookfor_length), key, None))
+        for length in self._keys_by_length:
+            if length is None:
+                # the key is not a sequence so we just skip it
+                continue
+            bound = 1.0
+            if length + lookfor_length:
+                bound = 2.0 * min(length, lookfor_length) / (length + lookfor_length)
+            bounds.append((bound, None, length))
+        bounds.sort(key=lambda bound_key_length: bound_key_length[0], reverse=True)
+
         # test each key in the dictionary
         best_ratio = 0
+        best_keys = []
+        for bound, key, length in bounds:
+            # keys that cannot beat or tie the best one are not tested
+            if bound < best_ratio or (stop_on_first and bound < self.cutoff):
+                break
+            # nothing can beat a perfect match
+            if best_ratio == 1:
+                break
+
+            if length is None:
+                keys = [key]
+            else:
+                keys = self._keys_by_length[length]
+                # the text keys without shared trigrams
+                no_trigrams_bound = similarity.trigram_ratio_bound(0, length, lookfor_length)
+
+            for key in keys:
+
+                if length is not None and text_lookfor and isinstance(key, type("")):
+                    if key in shared or no_trigrams_bound < best_ratio:
+                        continue
+
+                # if the current key is not a string
+                # then we just skip it
+                try:
+                    # set up the SequenceMatcher with other text
+                    ratio_calc.set_seq2(key)
+                except TypeError:
+                    continue
+
+                # we get an error here if the item to look for is not a
+                # string - if it cannot be fuzzy matched and we are here
+                # this it is defintely not in the dictionary
+                try:
+                    # the ratio by the common characters is cheaper to check first
+                    if best_ratio and ratio_calc.quick_ratio() < best_ratio:
+                        continue
+                    # calculate the match value
+                    ratio = ratio_calc.ratio()
+                except TypeError:
+                    return 0 >= self.cutoff, None, None, 0
+
+                # if this is the best ratio so far - save it and the key
+                if ratio > best_ratio:
+                    best_ratio = ratio
+                    best_keys = [key]
+                elif ratio == best_ratio and ratio:
+                    best_keys.append(key)
+
+                if stop_on_first and ratio >= self.cutoff:
+                    return True, key, self._dict_getitem(key), ratio
+
+        # the first of the equally good keys in the order of the dictionary
+        best_key = None
+        if len(best_keys) > 1:
+            best_keys = set(best_keys)
+            best_key = next(key for key in self if key in best_keys)
+        elif best_keys:
+            best_key = best_keys[0]
+        best_match = None
+        if best_keys:
+            best_match = self._dict_getitem(best_key)
+
+        return (
+            best_ratio >= self.cutoff,
+            best_key,
+            best_match,
+            best_ratio)
+
+    def _search_scored(self, scorer, lookfor, stop_on_first):
+        """Returns the value whose key best matches lookfor scoring all the keys at once"""
+        best_ratio = 0
         best_match = None
         best_key = None
-        for key in self:
-
-            # if the current key is not a string
-            # then we just skip it
-            try:
-                # set up the SequenceMatcher with other text
-                ratio_calc.set_seq2(key)
-            except TypeError:
-                continue
 
-            # we get an error here if the item to look for is not a
-            # string - if it cannot be fuzzy matched and we are here
-            # this it is defintely not in the dictionary
-            try:
-                # calculate the match value
-                ratio = ratio_calc.ratio()
-            except TypeError:
-                break
+        # only the text keys can be matched with a text
+        keys = []
+        ratios = []
+        if isinstance(lookfor, type("")):
+            keys = [key for key in self if isinstance(key, type(""))]
+            ratios = scorer.ratios(lookfor, keys)
+
+        for key, ratio in zip(keys, ratios):
 
             # if this is the best ratio so far - save it and the value
             if ratio > best_ratio:
@@ -148,6 +385,18 @@ class FuzzyDict(OrderedDict):
             best_match,
             best_ratio)
 
+    def get_many(self, lookfors, default = None):
+        """Return a list of the values best matching each item of lookfors
+
+        default is returned for an item without a good enough match.
+        """
+        values = []
+        with self._lock:
+            for lookfor in lookfors:
+                matched, _, item, _ = self._search(lookfor)
+                values.append(item if matched else default)
+        return values
+
     def __contains__(self, item):
         """Overides OrderedDict __contains__ to use fuzzy matching"""
         if self._search(item, True)[0]:
@@ -44,6 +44,14 @@ from ..timings import Timings  # noqa: E402
 
 class Application(BaseApplication):
 
+    cache_mask = None
+    """The attributes cached by libatspi for the application, the mask is set by connect()
+    (e.g. ("parent", "children", "name", "role", "states"), None keeps the libatspi default)"""
+
+    use_tree_mirror = False
+    """Answer the searches in the process from the tree mirror started by start() and connect()
+    (see start_tree_mirror())"""
+
     def __init__(self, backend="atspi", allow_magic_lookup=True):
         """
         Initialize the Application object
@@ -59,6 +67,7 @@ class Application(BaseApplication):
         self.match_history = []
         self.use_history = False
         self.actions = None  # TODO Action logger for linux
+        self._tree_mirror = None
         if backend not in registry.backends:
             raise ValueError('Backend "{0}" is not registered!'.format(backend))
         self.backend = registry.backends[backend]
@@ -77,6 +86,8 @@ class Application(BaseApplication):
             raise AppStartError(message)
         self._proc_descriptor = process
         self.process = process.pid
+        if self.use_tree_mirror:
+            self.start_tree_mirror()
         return self
 
     def connect(self, **kwargs):
@@ -116,6 +127,11 @@ class Application(BaseApplication):
             raise RuntimeError(
                 "You must specify process or handle")
 
+        if self.cache_mask is not None:
+            self.set_cache_mask(*self.cache_mask)
+        if self.use_tree_mirror:
+            self.start_tree_mirror()
+
     def cpu_usage(self, interval=None):
         """Return CPU usage percent during specified number of seconds"""
         if not self.process:
@@ -158,6 +174,7 @@ class Application(BaseApplication):
         This should only be used when it is OK to kill the process like you
         would do in task manager.
         """
+        self.stop_tree_mirror()
         if self._proc_descriptor is not None:
             # Kill process created via Application with subprocess kill
             self._proc_descriptor.kill()
@@ -186,6 +203,61 @@ class Application(BaseApplication):
         else:
             return True
 
+    def _app_elements(self):
+        """Return the application elements of the process"""
+        if not self.process:
+            raise AppNotConnected("Please use start or connect before trying "
+                                  "anything else")
+        return self.backend.element_info_class().children(process=self.process)
+
+    def set_cache_mask(self, *attrs):
+        """
+        Set the attributes cached by libatspi for the application
+
+        See AtspiElementInfo.set_cache_mask() for the attribute names,
+        no names disable the cache. The cached values are updated by
+        the AT-SPI events instead of reading them by every call.
+
+        Returns True if the mask is set (the application is found and
+        its events can be listened) otherwise - False
+        """
+        elements = self._app_elements()
+        return bool(elements) and all([elem.set_cache_mask(*attrs) for elem in elements])
+
+    def clear_cache(self):
+        """Clear the libatspi cache of the application, the values are read again on the next access"""
+        for elem in self._app_elements():
+            elem.clear_cache()
+
+    def start_tree_mirror(self):
+        """
+        Start the in-process mirror of the application tree
+
+        The mirror is kept up to date by the AT-SPI events, so find_elements()
+        and the window specifications of the process walk it instead of the
+        live tree (see linux.atspi_tree_mirror.AtspiTreeMirror).
+
+        Returns True if the mirror is started otherwise - False (the events
+        can't be listened, the live tree is walked then)
+        """
+        if not self.process:
+            raise AppNotConnected("Please use start or connect before trying "
+                                  "anything else")
+        # libatspi is loaded by the first use of the mirror
+        from .atspi_tree_mirror import AtspiTreeMirror
+
+        if self._tree_mirror is not None and self._tree_mirror.process != self.process:
+            self.stop_tree_mirror()
+        if self._tree_mirror is None:
+            self._tree_mirror = AtspiTreeMirror(self.process)
+        return self._tree_mirror.start()
+
+    def stop_tree_mirror(self):
+        """Stop the tree mirror of the application, the live tree is walked again"""
+        if self._tree_mirror is not None:
+            self._tree_mirror.stop()
+            self._tree_mirror = None
+
 
 def assert_valid_process(process_id):
     if str(process_id) not in os.listdir('/proc'):
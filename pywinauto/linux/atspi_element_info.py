@@ -32,9 +32,13 @@
 
 """Linux AtspiElementInfo class"""
 
+import itertools
+import threading
+
 from .atspi_objects import AtspiAccessible, AtspiComponent, AtspiStateEnum, AtspiAction, AtspiValue, \
-    IATSPI, RECT
-from ..element_info import ElementInfo
+    AtspiEventListener, AtspiCollection, GErrorException, IATSPI, RECT, _AtspiCache
+from ..element_info import ElementInfo, PROP_COST_CACHED, PROP_COST_IPC, PROP_COST_MULTI_IPC
+from ..timings import ChangeNotifier
 
 
 class AtspiElementInfo(ElementInfo):
@@ -52,6 +56,24 @@ class AtspiElementInfo(ElementInfo):
     # "auto_id", "full_control_type"
     assert set(re_props + exact_only_props) == set(search_order)
 
+    prop_costs = {
+        "handle": PROP_COST_CACHED,
+        "pid": PROP_COST_CACHED,
+        "runtime_id": PROP_COST_CACHED,
+        "control_type": PROP_COST_IPC,
+        "class_name": PROP_COST_IPC,
+        "control_id": PROP_COST_IPC,
+        "visible": PROP_COST_IPC,
+        "enabled": PROP_COST_IPC,
+        "name": PROP_COST_IPC,
+        "framework_id": PROP_COST_IPC,
+        "framework_name": PROP_COST_IPC,
+        "atspi_version": PROP_COST_IPC,
+        "description": PROP_COST_IPC,
+        "rectangle": PROP_COST_MULTI_IPC,
+    }
+    assert set(prop_costs) == set(search_order)
+
     renamed_props = {
         "title": ("name", None),
         "title_re": ("name_re", None),
@@ -61,8 +83,39 @@ class AtspiElementInfo(ElementInfo):
         "top_level_only": ("depth", {True: 1, False: None}),
     }
 
+    ordered_iter_descendants = True
+    search_cache_enable = True
+
+    # the events which make the event driven waits re-check their conditions
+    # (they also keep the libatspi cache up to date, see set_cache_mask())
+    change_events = ["object:children-changed", "object:state-changed", "object:property-change",
+                     "window:create"]
+
+    _cache_mask_flags = {
+        "parent": _AtspiCache.ATSPI_CACHE_PARENT,
+        "children": _AtspiCache.ATSPI_CACHE_CHILDREN,
+        "name": _AtspiCache.ATSPI_CACHE_NAME,
+        "description": _AtspiCache.ATSPI_CACHE_DESCRIPTION,
+        "states": _AtspiCache.ATSPI_CACHE_STATES,
+        "role": _AtspiCache.ATSPI_CACHE_ROLE,
+        "interfaces": _AtspiCache.ATSPI_CACHE_INTERFACES,
+        "attributes": _AtspiCache.ATSPI_CACHE_ATTRIBUTES,
+    }
+
+    # the listener shared by all the elements (False if it can't be registered)
+    _event_listener = None
+    _change_notifier = None
+    _change_notifier_lock = threading.Lock()
+    # the notifiers of the events of a process by process ID
+    # and the process IDs of the applications by bus name
+    _process_notifiers = {}
+    _bus_name_pids = {}
+    _desktop_identity = None
 
-    def __init__(self, handle=None):
+    # the started tree mirrors by process ID (see atspi_tree_mirror.AtspiTreeMirror)
+    _tree_mirrors = {}
+
+    def __init__(self, handle=None, cache_enable=False):
         """Create element by handle (default is root element)"""
         if handle is None:
             self._handle = self.atspi_accessible.get_desktop(0)
@@ -71,25 +124,21 @@ class AtspiElementInfo(ElementInfo):
 
         # Cache non-mutable element IDs
         self._pid = self.atspi_accessible.get_process_id(self._handle, None)
-        self._root_id = self.atspi_accessible.get_id(self._handle, None)
         self._runtime_id = self.atspi_accessible.get_index_in_parent(self._handle, None)
+        # the bus name of the application and the object path are unique on the bus
+        self._identity = self.atspi_accessible.get_identity(self._handle)
 
-    def __get_elements(self, root, tree, **kwargs):
-        tree.append(root)
-        for el in root.children(**kwargs):
-            self.__get_elements(el, tree, **kwargs)
+        self.set_cache_strategy(cached=cache_enable)
 
     def __hash__(self):
-        """Return a unique hash value based on the element's handle"""
-        return hash((self._pid, self._root_id, self._runtime_id))
+        """Return a unique hash value based on the element's identity"""
+        return hash(self._identity)
 
     def __eq__(self, other):
         """Check if two AtspiElementInfo objects describe the same element"""
         if not isinstance(other, AtspiElementInfo):
             return False
-        if self.control_type == "Application" and other.control_type == "Application":
-            return self.process_id == other.process_id
-        return self.rectangle == other.rectangle
+        return self._identity == other._identity
 
     def __ne__(self, other):
         """Check if two AtspiElementInfo objects describe different elements"""
@@ -108,15 +157,52 @@ class AtspiElementInfo(ElementInfo):
         """Return the handle of the window"""
         return self._handle
 
+    def _get_cached(self, attr, get_current):
+        """Return the cached value of the attribute, read it by get_current() if it isn't cached"""
+        if self._cache is None:
+            return get_current()
+        try:
+            return self._cache[attr]
+        except KeyError:
+            value = self._cache[attr] = get_current()
+            return value
+
+    def _get_current_name(self):
+        return self.atspi_accessible.get_name(self._handle, None).decode(encoding='UTF-8')
+
+    def _get_current_role(self):
+        return self.atspi_accessible.get_role(self._handle, None)
+
+    def _get_current_class_name(self):
+        role = self.atspi_accessible.get_role_name(self._handle, None)
+        return "".join([part.capitalize() for part in role.decode("utf-8").split()])
+
+    def _get_current_state_set(self):
+        val = self.atspi_accessible.get_state_set(self.handle)
+        return self._get_states_as_string(val.contents.states)
+
+    def _get_current_rectangle(self):
+        if self.control_type == "Application":
+            # Application object have`t rectangle. It`s just a fake container which contain base application
+            # info such as process ID, window name etc. Will return application frame rectangle
+            children = self.children()
+            if children:
+                return self.children()[0].rectangle
+            else:
+                return RECT()
+        elif self.control_type == "Invalid":
+            return RECT()
+        return self.component.get_rectangle(coord_type="screen")
+
     @property
     def name(self):
         """Return the text of the window"""
-        return self.atspi_accessible.get_name(self._handle, None).decode(encoding='UTF-8')
+        return self._get_cached("name", self._get_current_name)
 
     @property
     def control_id(self):
         """Return the ID of the window"""
-        return self.atspi_accessible.get_role(self._handle, None)
+        return self._get_cached("role", self._get_current_role)
 
     @property
     def runtime_id(self):
@@ -133,8 +219,7 @@ class AtspiElementInfo(ElementInfo):
     @property
     def class_name(self):
         """Return the class name of the element"""
-        role = self.atspi_accessible.get_role_name(self._handle, None)
-        return "".join([part.capitalize() for part in role.decode("utf-8").split()])
+        return self._get_cached("class_name", self._get_current_class_name)
 
     @property
     def rich_text(self):
@@ -144,7 +229,7 @@ class AtspiElementInfo(ElementInfo):
     @property
     def control_type(self):
         """Return the class name of the element"""
-        role_id = self.atspi_accessible.get_role(self._handle, None)
+        role_id = self._get_cached("role", self._get_current_role)
         try:
             return IATSPI().known_control_type_ids[role_id]
         except KeyError:
@@ -157,42 +242,154 @@ class AtspiElementInfo(ElementInfo):
             return None
         return AtspiElementInfo(self.atspi_accessible.get_parent(self._handle, None))
 
-    def children(self, **kwargs):
-        """Return children of the element"""
-        process = kwargs.get("process", None)
-        class_name = kwargs.get("class_name", None)
-        name = kwargs.get("name", None)
-        control_type = kwargs.get("control_type", None)
+    @staticmethod
+    def _is_satisfying_criteria(element, process=None, class_name=None, name=None, control_type=None, **kwargs):
+        """Check if the element satisfies the criteria of children() and descendants()"""
+        if process is not None and process != element.process_id:
+            return False
+        if class_name is not None and class_name != element.class_name:
+            return False
+        if name is not None and name != element.rich_text:
+            return False
+        if control_type is not None and control_type != element.control_type:
+            return False
+        return True
+
+    def _get_tree_mirror(self, process):
+        """Return the started tree mirror of the process if the element is the desktop or None"""
+        mirror = self._tree_mirrors.get(process, None) if process is not None else None
+        if mirror is None or mirror.desktop_identity != self._identity:
+            return None
+        return mirror
+
+    def iter_children(self, **kwargs):
+        """Iterate over children of the element
+
+        The applications of a process having a started tree mirror
+        are taken from the mirror.
+        """
+        cache_enable = kwargs.get("cache_enable", False)
+
+        mirror = self._get_tree_mirror(kwargs.get("process", None))
+        if mirror is not None:
+            for child in mirror.iter_applications(cache_enable):
+                if self._is_satisfying_criteria(child, **kwargs):
+                    yield child
+            return
 
         cnt = self.atspi_accessible.get_child_count(self._handle, None)
-        childrens = []
         for i in range(cnt):
-            child = AtspiElementInfo(self.atspi_accessible.get_child_at_index(self._handle, i, None))
-            if class_name is not None and class_name != child.class_name:
-                continue
-            if name is not None and name != child.rich_text:
-                continue
-            if control_type is not None and control_type != child.control_type:
-                continue
-            if process is not None and process != child.process_id:
-                continue
-            childrens.append(child)
-        return childrens
+            child = AtspiElementInfo(self.atspi_accessible.get_child_at_index(self._handle, i, None), cache_enable)
+            if self._is_satisfying_criteria(child, **kwargs):
+                yield child
+
+    def children(self, **kwargs):
+        """Return children of the element"""
+        return list(self.iter_children(**kwargs))
+
+    def iter_descendants(self, **kwargs):
+        """Iterate over descendants of the element
+
+        The elements are filtered by the criteria but the whole sub-trees
+        are walked (only the sub-trees of another process are skipped).
+        So all the matching descendants are found like by the UIA backend
+        and the Collection interface (see query_descendants()), not only
+        the ones whose ancestors match the criteria too.
+        The children deeper than depth (if specified) are not walked through.
+        """
+        depth = kwargs.pop("depth", None)
+        return self._iter_walked_descendants(depth, kwargs)
+
+    def _iter_walked_descendants(self, depth, kwargs):
+        """Walk the descendants for iter_descendants()"""
+        if depth == 0:
+            return
+        for child in self._iter_walked_children(process=kwargs.get("process", None),
+                                                cache_enable=kwargs.get("cache_enable", False)):
+            if self._is_satisfying_criteria(child, **kwargs):
+                yield child
+            for c in child._iter_walked_descendants(None if depth is None else depth - 1, kwargs):
+                yield c
+
+    def _iter_walked_children(self, **kwargs):
+        """Iterate over the children of the element in a walk of the descendants"""
+        return self.iter_children(**kwargs)
+
+    @staticmethod
+    def _get_match_role(props):
+        """Return the role of a Collection match rule for the search properties or None"""
+        role_names = set([props[key] for key in ("control_type", "class_name") if props.get(key) is not None])
+        if len(role_names) != 1:
+            return None
+        role_name = role_names.pop()
+        # an application isn't a descendant of another application
+        if role_name == "Application":
+            return None
+        return IATSPI().known_control_types.get(role_name, None)
+
+    def _iter_matches(self, role, cache_enable):
+        """Iterate over the descendants matched by the Collection interface or walk them if it isn't supported"""
+        collection = self.atspi_accessible.get_collection(self._handle)
+        matches = None
+        if collection:
+            collection = AtspiCollection(collection)
+            try:
+                matches = collection.get_matches(roles=[role])
+            except GErrorException:
+                pass
+            finally:
+                collection.unref()
+        if matches is None:
+            for elem in self.iter_descendants(process=self._pid, cache_enable=cache_enable):
+                yield elem
+            return
+        for handle in matches:
+            yield AtspiElementInfo(handle, cache_enable)
+
+    def _iter_query_matches(self, role, props, cache_enable):
+        """Iterate over the matches of the role checked by the criteria of descendants()"""
+        if self.control_type == "DesktopFrame":
+            # the desktop isn't a collection, every application is queried separately
+            applications = self.iter_children(process=props.get("pid", None), cache_enable=cache_enable)
+            candidates = (elem for app in applications
+                          for elem in itertools.chain([app], app._iter_matches(role, cache_enable)))
+        else:
+            candidates = self._iter_matches(role, cache_enable)
+        for elem in candidates:
+            if self._is_satisfying_criteria(elem, process=props.get("pid", None),
+                                            class_name=props.get("class_name", None),
+                                            name=props.get("name", None),
+                                            control_type=props.get("control_type", None)):
+                yield elem
+
+    def query_descendants(self, props, cache_enable=False):
+        """Return the descendants matching the properties by the role or None
+
+        The control_type (or class_name) is matched by the role inside the
+        applications (AT-SPI Collection interface), the rest of the criteria
+        of descendants() are checked for the matches.
+        The desktop queries every application (of the pid if it is specified).
+        None is returned if the properties have no role, the element doesn't
+        support the Collection interface or the tree mirror of the pid is started.
+        """
+        role = self._get_match_role(props)
+        if role is None:
+            return None
+        # the tree mirror is walked faster than the applications are queried
+        if self._get_tree_mirror(props.get("pid", None)) is not None:
+            return None
+        if self.control_type != "DesktopFrame":
+            collection = self.atspi_accessible.get_collection(self._handle)
+            if not collection:
+                return None
+            AtspiCollection(collection).unref()
+        return self._iter_query_matches(role, props, cache_enable)
 
     @property
     def component(self):
         component = self.atspi_accessible.get_component(self._handle)
         return AtspiComponent(component)
 
-    def descendants(self, **kwargs):
-        """Return descendants of the element"""
-        tree = []
-        for obj in self.children(**kwargs):
-            self.__get_elements(obj, tree, **kwargs)
-        depth = kwargs.get("depth", None)
-        tree = self.filter_with_depth(tree, self, depth)
-        return tree
-
     def description(self):
         return self.atspi_accessible.get_description(self._handle, None).decode(encoding='UTF-8')
 
@@ -217,8 +414,7 @@ class AtspiElementInfo(ElementInfo):
         return self.component.get_mdi_z_order()
 
     def get_state_set(self):
-        val = self.atspi_accessible.get_state_set(self.handle)
-        return self._get_states_as_string(val.contents.states)
+        return self._get_cached("states", self._get_current_state_set)
 
     def get_action(self):
         if self.atspi_accessible.is_action(self.handle):
@@ -240,9 +436,141 @@ class AtspiElementInfo(ElementInfo):
                 return False
         return "STATE_VISIBLE" in states and "STATE_SHOWING" in states and "STATE_ICONIFIED" not in states
 
+    def is_alive(self):
+        """Return True if the element still exists (its state set isn't defunct)"""
+        return "STATE_DEFUNCT" not in self._get_current_state_set()
+
+    @classmethod
+    def get_change_notifier(cls, process=None):
+        """Return a timings.ChangeNotifier signalled by the AT-SPI events of change_events
+
+        The notifier of a process is signalled by the events of its applications
+        (matched by the bus name of the event source) and by the applications
+        added to or removed from the desktop. Without a process any event signals it.
+
+        The events are dispatched by the AT-SPI event loop running in a daemon
+        thread started on the first call. The notifiers are live while the loop
+        runs. None is returned (so the waits poll) if the event listener
+        can't be registered.
+        """
+        with AtspiElementInfo._change_notifier_lock:
+            if AtspiElementInfo._event_listener is None:
+                AtspiElementInfo._desktop_identity = AtspiElementInfo()._identity
+                AtspiElementInfo._update_bus_name_pids()
+                notifier = ChangeNotifier(AtspiEventListener.is_running)
+                listener = AtspiEventListener(AtspiElementInfo._on_change_event)
+                try:
+                    registered = all([listener.register(event_type) for event_type in cls.change_events])
+                except GErrorException:
+                    registered = False
+
+                if registered:
+                    AtspiElementInfo._change_notifier = notifier
+                    AtspiElementInfo._event_listener = listener
+                    thread = threading.Thread(target=AtspiEventListener.main, name="atspi-event-loop")
+                    thread.daemon = True
+                    thread.start()
+                else:
+                    AtspiElementInfo._event_listener = False
+            if process is None or AtspiElementInfo._change_notifier is None:
+                return AtspiElementInfo._change_notifier
+            if process not in AtspiElementInfo._process_notifiers:
+                AtspiElementInfo._process_notifiers[process] = ChangeNotifier(AtspiEventListener.is_running)
+                AtspiElementInfo._update_bus_name_pids()
+            return AtspiElementInfo._process_notifiers[process]
+
+    @staticmethod
+    def _update_bus_name_pids():
+        """Read the process IDs of the applications on the desktop"""
+        AtspiElementInfo._bus_name_pids = dict((app._identity[0], app.process_id)
+                                               for app in AtspiElementInfo().iter_children())
+
+    @staticmethod
+    def _on_change_event(event_type, source):
+        """Signal the notifiers about the event (called in the event loop thread)"""
+        AtspiElementInfo._change_notifier.notify()
+        if source is None:
+            return
+        if source == AtspiElementInfo._desktop_identity:
+            # an application is added or removed
+            AtspiElementInfo._update_bus_name_pids()
+            for notifier in list(AtspiElementInfo._process_notifiers.values()):
+                notifier.notify()
+            return
+        notifier = AtspiElementInfo._process_notifiers.get(AtspiElementInfo._bus_name_pids.get(source[0], None), None)
+        if notifier is not None:
+            notifier.notify()
+
     def set_cache_strategy(self, cached):
-        """Set a cache strategy for frequently used attributes of the element"""
-        pass  # TODO: implement a cache strategy for atspi elements
+        """Set a cache strategy for frequently used attributes of the element
+
+        The cached name, class name, role (control_type and control_id),
+        state set and rectangle are read once on the first access
+        until refresh(), invalidate() or set_cache_strategy(cached=False).
+        find_elements() walks the tree with cached elements and switches
+        the found ones to the actual values.
+
+        Both strategies read the values through the cache of libatspi
+        if it's enabled for the application by set_cache_mask(), the cache
+        is kept up to date by the AT-SPI events. refresh() and invalidate()
+        clear it for the element.
+        """
+        self._cache = {} if cached else None
+
+    def set_cache_mask(self, *attrs):
+        """Set the attributes cached by libatspi for the application of the element
+
+        The attribute names are "parent", "children", "name", "description",
+        "states", "role", "interfaces" and "attributes", no names disable the cache.
+        The cache is updated by the AT-SPI events, so the event loop is started
+        (see get_change_notifier()). Return False and keep the mask if the events
+        can't be listened.
+        """
+        mask = _AtspiCache.ATSPI_CACHE_NONE
+        for attr in attrs:
+            if attr not in self._cache_mask_flags:
+                raise ValueError('Unknown libatspi cache attribute "{0}"'.format(attr))
+            mask |= self._cache_mask_flags[attr]
+        if mask != _AtspiCache.ATSPI_CACHE_NONE and self.get_change_notifier() is None:
+            return False
+        self.atspi_accessible.set_cache_mask(self._handle, mask)
+        return True
+
+    def clear_cache(self):
+        """Clear the libatspi cache of the element and its descendants (no IPC is made)"""
+        self.atspi_accessible.clear_cache(self._handle)
+
+    def invalidate(self, *attrs):
+        """Forget the cached values of the attributes (all of them by default)
+
+        The attribute names are "name", "class_name", "role", "states" and "rectangle".
+        The libatspi cache of the element is cleared anyway.
+        """
+        self.clear_cache()
+        if self._cache is None:
+            return
+        if attrs:
+            for attr in attrs:
+                self._cache.pop(attr, None)
+        else:
+            self._cache.clear()
+
+    def refresh(self):
+        """Read the cached attributes again to take a new snapshot of the element"""
+        self.clear_cache()
+        if self._cache is None:
+            return
+        attrs = list(self._cache)
+        self._cache.clear()
+        getters = {
+            "name": self._get_current_name,
+            "class_name": self._get_current_class_name,
+            "role": self._get_current_role,
+            "states": self._get_current_state_set,
+            "rectangle": self._get_current_rectangle,
+        }
+        for attr in attrs:
+            self._get_cached(attr, getters[attr])
 
     @property
     def enabled(self):
@@ -258,14 +586,4 @@ class AtspiElementInfo(ElementInfo):
     @property
     def rectangle(self):
         """Return rectangle of element"""
-        if self.control_type == "Application":
-            # Application object have`t rectangle. It`s just a fake container which contain base application
-            # info such as process ID, window name etc. Will return application frame rectangle
-            children = self.children()
-            if children:
-                return self.children()[0].rectangle
-            else:
-                return RECT()
-        elif self.control_type == "Invalid":
-            return RECT()
-        return self.component.get_rectangle(coord_type="screen")
+        return self._get_cached("rectangle", self._get_current_rectangle)
@@ -33,9 +33,11 @@
 """Low-level interface to Linux ATSPI"""
 
 import subprocess
+import threading
+import time
 
 from ctypes import c_int, c_bool, c_char_p, c_char, POINTER, c_uint, c_uint32, c_uint64, c_double, c_short, \
-    create_string_buffer, cdll, pointer, c_void_p, CFUNCTYPE
+    create_string_buffer, cdll, pointer, c_void_p, CFUNCTYPE, c_size_t, cast, sizeof
 from functools import wraps
 
 from ..base_types import Structure
@@ -141,6 +143,40 @@ class _AtspiStateType(CtypesEnum):
     ATSPI_STATE_LAST_DEFINED = 44
 
 
+class _AtspiCollectionMatchType(CtypesEnum):
+    ATSPI_Collection_MATCH_INVALID = 0
+    ATSPI_Collection_MATCH_ALL = 1
+    ATSPI_Collection_MATCH_ANY = 2
+    ATSPI_Collection_MATCH_NONE = 3
+    ATSPI_Collection_MATCH_EMPTY = 4
+
+
+class _AtspiCollectionSortOrder(CtypesEnum):
+    ATSPI_Collection_SORT_ORDER_INVALID = 0
+    ATSPI_Collection_SORT_ORDER_CANONICAL = 1
+    ATSPI_Collection_SORT_ORDER_FLOW = 2
+    ATSPI_Collection_SORT_ORDER_TAB = 3
+    ATSPI_Collection_SORT_ORDER_REVERSE_CANONICAL = 4
+    ATSPI_Collection_SORT_ORDER_REVERSE_FLOW = 5
+    ATSPI_Collection_SORT_ORDER_REVERSE_TAB = 6
+
+
+class _AtspiCache(CtypesEnum):
+    ATSPI_CACHE_NONE = 0
+    ATSPI_CACHE_PARENT = 1 << 0
+    ATSPI_CACHE_CHILDREN = 1 << 1
+    ATSPI_CACHE_NAME = 1 << 2
+    ATSPI_CACHE_DESCRIPTION = 1 << 3
+    ATSPI_CACHE_STATES = 1 << 4
+    ATSPI_CACHE_ROLE = 1 << 5
+    ATSPI_CACHE_INTERFACES = 1 << 6
+    ATSPI_CACHE_ATTRIBUTES = 1 << 7
+    ATSPI_CACHE_ALL = 0x3fffffff
+    ATSPI_CACHE_DEFAULT = ATSPI_CACHE_PARENT | ATSPI_CACHE_CHILDREN | ATSPI_CACHE_NAME | \
+        ATSPI_CACHE_DESCRIPTION | ATSPI_CACHE_STATES | ATSPI_CACHE_ROLE | ATSPI_CACHE_INTERFACES
+    ATSPI_CACHE_UNDEFINED = 0x40000000
+
+
 AtspiStateEnum = {
     0: 'STATE_INVALID',
     1: 'STATE_ACTIVE',
@@ -243,7 +279,9 @@ RectExtMixin._RECT = RECT
 
 
 class _GTypeInstance(Structure):
-    pass
+    _fields_ = [
+        ('g_class', c_void_p),
+    ]
 
 
 class _GData(Structure):
@@ -290,7 +328,12 @@ class _AtspiRole(Structure):
 
 
 class _AtspiApplication(Structure):
-    pass
+    # the rest of the fields isn't used
+    _fields_ = [
+        ('parent', _GObject),
+        ('hash', POINTER(_GHashTable)),
+        ('bus_name', c_char_p),
+    ]
 
 
 class _AtspiComponent(Structure):
@@ -312,7 +355,7 @@ class _AtspiAccessiblePrivate(Structure):
 class _AtspiObject(Structure):
     _fields_ = [
         ('parent', _GObject),
-        ('accessible_parent', POINTER(_AtspiApplication)),
+        ('app', POINTER(_AtspiApplication)),
         ('path', c_char_p),
     ]
 
@@ -350,6 +393,16 @@ class _AtspiValue(Structure):
     ]
 
 
+class _AtspiCollection(Structure):
+    _fields_ = [
+        ('parent', _GTypeInterface),
+    ]
+
+
+class _AtspiMatchRule(Structure):
+    pass
+
+
 class _AtspiTextRange(Structure):
     _fields_ = [
         ('start_offset', c_int),
@@ -384,6 +437,16 @@ _AtspiAccessible._fields_ = [
 ]
 
 
+class _AtspiEvent(Structure):
+    # the trailing GValue any_data field isn't used
+    _fields_ = [
+        ('type', c_char_p),
+        ('source', POINTER(_AtspiAccessible)),
+        ('detail1', c_int),
+        ('detail2', c_int),
+    ]
+
+
 class GErrorException(RuntimeError):
 
     """Raised when an exception occurred during libatspi method call"""
@@ -432,6 +495,29 @@ def _find_library(libs_list):
         return libs_list[-1]
 
 
+# libatspi isn't thread safe: its functions are called holding the lock,
+# the event loop (see AtspiEventListener.main()) dispatches the events holding it too
+atspi_lock = threading.RLock()
+
+
+class _LockedFunction(object):
+
+    """ctypes function of libatspi called holding atspi_lock"""
+
+    def __init__(self, func):
+        object.__setattr__(self, "_func", func)
+
+    def __getattr__(self, name):
+        return getattr(self._func, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._func, name, value)
+
+    def __call__(self, *args):
+        with atspi_lock:
+            return self._func(*args)
+
+
 class IATSPI(object, metaclass=Singleton):
 
     """Python wrapper around C functions from ATSPI library"""
@@ -472,9 +558,9 @@ class IATSPI(object, metaclass=Singleton):
 
     def get_iface_func(self, func_name):
         if hasattr(self.atspi, func_name + "_iface"):
-            return getattr(self.atspi, func_name + "_iface")
+            return _LockedFunction(getattr(self.atspi, func_name + "_iface"))
         elif hasattr(self.atspi, func_name):
-            return getattr(self.atspi, func_name)
+            return _LockedFunction(getattr(self.atspi, func_name))
         else:
             print("Warning! method: {} not found in libatspi.".format(func_name))
             return None
@@ -668,6 +754,25 @@ class AtspiAccessible(object):
     get_image.argtypes = [POINTER(_AtspiAccessible)]
     get_image.restype = POINTER(_AtspiImage)
 
+    get_collection = IATSPI().get_iface_func("atspi_accessible_get_collection")
+    get_collection.argtypes = [POINTER(_AtspiAccessible)]
+    get_collection.restype = POINTER(_AtspiCollection)
+
+    set_cache_mask = IATSPI().get_iface_func("atspi_accessible_set_cache_mask")
+    set_cache_mask.argtypes = [POINTER(_AtspiAccessible), _AtspiCache]
+    set_cache_mask.restype = None
+
+    clear_cache = IATSPI().get_iface_func("atspi_accessible_clear_cache")
+    clear_cache.argtypes = [POINTER(_AtspiAccessible)]
+    clear_cache.restype = None
+
+    @staticmethod
+    def get_identity(accessible):
+        """Return the (bus name, object path) pair of the accessible (it's read without IPC)"""
+        obj = accessible.contents.parent
+        bus_name = obj.app.contents.bus_name if obj.app else None
+        return bus_name, obj.path
+
 
 class AtspiComponent(object):
 
@@ -808,6 +913,91 @@ class AtspiStateSet(object):
         self._set_by_name(self._pointer, buffer, status)
 
 
+class AtspiCollection(object):
+
+    """Access to ATSPI Collection Interface"""
+
+    _match_rule_new = IATSPI().get_iface_func("atspi_match_rule_new")
+    _match_rule_new.argtypes = [POINTER(_AtspiStateSet), _AtspiCollectionMatchType,
+                                c_void_p, _AtspiCollectionMatchType,
+                                POINTER(_GArray), _AtspiCollectionMatchType,
+                                POINTER(_GArray), _AtspiCollectionMatchType,
+                                c_bool]
+    _match_rule_new.restype = POINTER(_AtspiMatchRule)
+
+    _get_matches = IATSPI().get_iface_func("atspi_collection_get_matches")
+    _get_matches.argtypes = [POINTER(_AtspiCollection), POINTER(_AtspiMatchRule), _AtspiCollectionSortOrder,
+                             c_int, c_bool, POINTER(POINTER(_GError))]
+    _get_matches.restype = POINTER(_GArray)
+
+    _g_object_unref = IATSPI().get_iface_func("g_object_unref")
+    _g_object_unref.argtypes = [c_void_p]
+    _g_object_unref.restype = None
+
+    _g_array_new = GLIB.glib.g_array_new
+    _g_array_new.argtypes = [c_bool, c_bool, c_uint]
+    _g_array_new.restype = POINTER(_GArray)
+
+    _g_array_append_vals = GLIB.glib.g_array_append_vals
+    _g_array_append_vals.argtypes = [POINTER(_GArray), c_void_p, c_uint]
+    _g_array_append_vals.restype = POINTER(_GArray)
+
+    _g_array_free = GLIB.glib.g_array_free
+    _g_array_free.argtypes = [POINTER(_GArray), c_bool]
+    _g_array_free.restype = c_void_p
+
+    def __init__(self, pointer):
+        """Init the ATSPI Collection Interface"""
+        self._pointer = pointer
+
+    def unref(self):
+        """Release the reference returned by atspi_accessible_get_collection()"""
+        self._g_object_unref(self._pointer)
+
+    @classmethod
+    def _new_int_array(cls, values):
+        """Create a GArray of the integers (e.g. roles)"""
+        array = cls._g_array_new(False, False, sizeof(c_int))
+        if values:
+            cls._g_array_append_vals(array, (c_int * len(values))(*values), len(values))
+        return array
+
+    @g_error_handler
+    def get_matches(self, roles=None, states=None, count=0, g_error_pointer=None):
+        """
+        Get the descendants having all the states and any of the roles
+
+        The descendants are matched inside the application in one call.
+        Return the list of the accessible pointers in the canonical (depth first) order,
+        at most count ones (0 means no limit).
+        """
+        state_set = AtspiStateSet._new(None)
+        for state in states or []:
+            AtspiStateSet._add(state_set, state)
+        role_array = self._new_int_array(roles)
+        rule = self._match_rule_new(state_set, _AtspiCollectionMatchType.ATSPI_Collection_MATCH_ALL,
+                                    None, _AtspiCollectionMatchType.ATSPI_Collection_MATCH_ALL,
+                                    role_array, _AtspiCollectionMatchType.ATSPI_Collection_MATCH_ANY,
+                                    None, _AtspiCollectionMatchType.ATSPI_Collection_MATCH_ALL,
+                                    False)
+        try:
+            matches = self._get_matches(self._pointer, rule,
+                                        _AtspiCollectionSortOrder.ATSPI_Collection_SORT_ORDER_CANONICAL,
+                                        count, True, g_error_pointer)
+        finally:
+            self._g_object_unref(rule)
+            self._g_object_unref(state_set)
+            self._g_array_free(role_array, True)
+
+        if not matches:
+            return []
+        items = cast(matches.contents.data, POINTER(POINTER(_AtspiAccessible)))
+        accessibles = [items[i] for i in range(matches.contents.len)]
+        # the references to the accessibles are kept by the returned pointers
+        self._g_array_free(matches, True)
+        return accessibles
+
+
 class AtspiAction(object):
 
     """Access to ATSPI Action Interface"""
@@ -1222,3 +1412,95 @@ class AtspiImage(object):
         """
         rect = self._get_image_extents(self._pointer, _coord_type_to_atspi(coord_type), g_error_pointer)
         return RECT(rect.contents)
+
+
+class AtspiEventListener(object):
+
+    """Access to ATSPI EventListener"""
+
+    # void (*AtspiEventListenerCB)(AtspiEvent *event, void *user_data)
+    _EventListenerCB = CFUNCTYPE(None, c_void_p, c_void_p)
+
+    _new = IATSPI().get_iface_func("atspi_event_listener_new")
+    _new.argtypes = [_EventListenerCB, c_void_p, c_void_p]
+    _new.restype = c_void_p
+
+    _register = IATSPI().get_iface_func("atspi_event_listener_register")
+    _register.argtypes = [c_void_p, c_char_p, POINTER(POINTER(_GError))]
+    _register.restype = c_bool
+
+    _deregister = IATSPI().get_iface_func("atspi_event_listener_deregister")
+    _deregister.argtypes = [c_void_p, c_char_p, POINTER(POINTER(_GError))]
+    _deregister.restype = c_bool
+
+    # dispatches the pending events of the default main context of GLib
+    _main_context_iteration = IATSPI().get_iface_func("g_main_context_iteration")
+    _main_context_iteration.argtypes = [c_void_p, c_bool]
+    _main_context_iteration.restype = c_bool
+
+    # how often the event loop checks for the events
+    poll_interval = 0.01
+    _running = False
+
+    # the listener owns the events passed to the callback
+    _event_get_type = IATSPI().get_iface_func("atspi_event_get_type")
+    _event_get_type.restype = c_size_t
+
+    _g_boxed_free = IATSPI().get_iface_func("g_boxed_free")
+    _g_boxed_free.argtypes = [c_size_t, c_void_p]
+    _g_boxed_free.restype = None
+
+    def __init__(self, callback):
+        """Create a listener calling callback(event_type, source) for the registered events
+
+        The source is the (bus name, object path) identity of the event source
+        (see AtspiAccessible.get_identity()) or None.
+        """
+        self._callback = callback
+        self._event_type_id = self._event_get_type()
+        # keep the reference to the C callback while the listener is alive
+        self._c_callback = self._EventListenerCB(self._on_event)
+        self._pointer = self._new(self._c_callback, None, None)
+
+    def _on_event(self, event, user_data):
+        try:
+            contents = cast(event, POINTER(_AtspiEvent)).contents
+            source = AtspiAccessible.get_identity(contents.source) if contents.source else None
+            self._callback(contents.type.decode(encoding='UTF-8'), source)
+        finally:
+            self._g_boxed_free(self._event_type_id, event)
+
+    @g_error_handler
+    def register(self, event_type, g_error_pointer=None):
+        """Listen to the events of the type, e.g. "object:children-changed" """
+        return self._register(self._pointer, event_type.encode('utf-8'), g_error_pointer)
+
+    @g_error_handler
+    def deregister(self, event_type, g_error_pointer=None):
+        """Stop listening to the events of the type"""
+        return self._deregister(self._pointer, event_type.encode('utf-8'), g_error_pointer)
+
+    @classmethod
+    def main(cls):
+        """Run the loop dispatching the events to the listeners until quit() is called
+
+        The blocking atspi_event_main() would run libatspi in parallel with
+        the calls of the other threads, so the pending events are dispatched
+        holding atspi_lock every poll_interval instead. The callbacks run
+        in the thread of the loop and may call libatspi.
+        """
+        cls._running = True
+        while cls._running:
+            while cls._running and cls._main_context_iteration(None, False):
+                pass
+            time.sleep(cls.poll_interval)
+
+    @classmethod
+    def quit(cls):
+        """Stop the loop started by main()"""
+        cls._running = False
+
+    @classmethod
+    def is_running(cls):
+        """Return True while the loop of main() dispatches the events"""
+        return cls._running
@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+# GUI Application automation and testing library
+# Copyright (C) 2006-2019 Mark Mc Mahon and Contributors
+# https://github.com/pywinauto/pywinauto/graphs/contributors
+# http://pywinauto.readthedocs.io/en/latest/credits.html
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of pywinauto nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Linux in-process mirror of the AT-SPI tree of an application"""
+
+import collections
+import threading
+
+from .atspi_objects import AtspiAccessible, AtspiEventListener, GErrorException
+from .atspi_element_info import AtspiElementInfo
+from ..timings import timestamp
+
+
+def _get_identity(element):
+    """Return the (bus name, object path) identity of the element (no IPC is made)"""
+    return AtspiAccessible.get_identity(element.handle)
+
+
+class _MirrorNode(object):
+
+    """The live element with its cached attributes and the mirrored children"""
+
+    __slots__ = ("element", "parent", "children")
+
+    def __init__(self, element, parent):
+        self.element = element
+        self.parent = parent
+        # the list is replaced (not changed) by the updates, so it can be iterated safely
+        self.children = []
+
+
+class MirrorElementInfo(AtspiElementInfo):
+
+    """AtspiElementInfo of an element of the tree mirror
+
+    The children and the cached attributes (name, role, states and rectangle)
+    are taken from the current replica, the rest is read through libatspi as usual.
+    The replica is synced when a search starts from the element (iter_children(),
+    iter_descendants()), not during the walk.
+    """
+
+    def __init__(self, mirror, node, cache_enable=False):
+        """Create the element of the mirror node (no IPC is made)"""
+        self._mirror = mirror
+        element = node.element
+        self._handle = element.handle
+        self._pid = element.process_id
+        self._runtime_id = element.runtime_id
+        self._identity = _get_identity(element)
+        self._cache = element._cache if cache_enable else None
+
+    def set_cache_strategy(self, cached):
+        """Set a cache strategy for frequently used attributes of the element
+
+        The cached attributes are the mirrored ones, they are kept up to date
+        by the events. Otherwise the actual values are read.
+        """
+        if not cached:
+            self._cache = None
+            return
+        node = self._mirror.get_node(self._identity)
+        self._cache = node.element._cache if node is not None else {}
+
+    def iter_children(self, **kwargs):
+        """Sync the replica and iterate over the mirrored children of the element"""
+        self._mirror.sync()
+        return self._iter_walked_children(**kwargs)
+
+    def iter_descendants(self, **kwargs):
+        """Sync the replica and iterate over the mirrored descendants of the element"""
+        self._mirror.sync()
+        return super(MirrorElementInfo, self).iter_descendants(**kwargs)
+
+    def _iter_walked_children(self, **kwargs):
+        """Iterate over the children of the element in the current replica"""
+        node = self._mirror.get_node(self._identity)
+        if node is None:
+            return
+        cache_enable = kwargs.get("cache_enable", False)
+        for child_node in node.children:
+            child = MirrorElementInfo(self._mirror, child_node, cache_enable)
+            if self._is_satisfying_criteria(child, **kwargs):
+                yield child
+
+    @property
+    def parent(self):
+        """Return the parent of the element"""
+        node = self._mirror.get_node(self._identity)
+        if node is None or node.parent is None:
+            return super(MirrorElementInfo, self).parent
+        return MirrorElementInfo(self._mirror, node.parent)
+
+    def query_descendants(self, props, cache_enable=False):
+        """Return None, the mirrored descendants are walked faster than queried"""
+        return None
+
+
+class AtspiTreeMirror(object):
+
+    """In-process replica of the AT-SPI tree of a process kept up to date by the events
+
+    When the mirror is started find_elements() walks the replica instead of
+    libatspi for the searches in the process (the desktop children with the pid).
+    The events received by the event loop thread are queued without a lock
+    (the loop holds the libatspi lock) and applied once at the start of
+    the next search (see sync()), so a walk sees one snapshot.
+    The replica is resynced completely if it's stale: a structural change
+    of an unknown element is reported, more than max_pending_events events
+    are pending or resync_interval seconds passed since the last resync.
+    """
+
+    events = ["object:children-changed", "object:property-change:accessible-name",
+              "object:state-changed", "object:bounds-changed"]
+
+    # the cached attributes outdated by the events
+    outdated_attrs = [
+        ("object:property-change:accessible-name", ("name",)),
+        ("object:state-changed", ("states",)),
+        ("object:bounds-changed", ("rectangle",)),
+    ]
+
+    max_pending_events = 1000
+    resync_interval = None
+
+    def __init__(self, process):
+        """Create the mirror of the process tree, start() takes the replica"""
+        self.process = process
+        self.desktop_identity = None
+        self.resync_count = 0
+
+        self._nodes = {}
+        self._applications = []
+        self._bus_names = frozenset()
+        self._pending = collections.deque()
+        self._stale = True
+        self._resync_time = None
+        self._started = False
+        self._listener = None
+        self._lock = threading.RLock()
+
+    @property
+    def started(self):
+        """True if the searches in the process are answered from the mirror"""
+        return self._started
+
+    @property
+    def stale(self):
+        """True if the replica must be resynced before it's used"""
+        if self._stale:
+            return True
+        return self.resync_interval is not None and timestamp() - self._resync_time > self.resync_interval
+
+    def start(self):
+        """Listen to the events, take the replica and answer the searches from it
+
+        Return False if the events can't be listened (libatspi is walked then).
+        """
+        if self._started:
+            return True
+        # the events are dispatched by the event loop of the change notifier
+        if AtspiElementInfo.get_change_notifier() is None:
+            return False
+
+        self.desktop_identity = _get_identity(AtspiElementInfo())
+        if self._listener is None:
+            self._listener = AtspiEventListener(self._on_event)
+        try:
+            registered = all([self._listener.register(event_type) for event_type in self.events])
+        except GErrorException:
+            registered = False
+        if not registered:
+            return False
+
+        self.resync()
+        self._started = True
+        AtspiElementInfo._tree_mirrors[self.process] = self
+        return True
+
+    def stop(self):
+        """Stop listening to the events, libatspi is walked by the searches again"""
+        if AtspiElementInfo._tree_mirrors.get(self.process, None) is self:
+            del AtspiElementInfo._tree_mirrors[self.process]
+        if not self._started:
+            return
+        self._started = False
+        for event_type in self.events:
+            try:
+                self._listener.deregister(event_type)
+            except GErrorException:
+                pass
+        with self._lock:
+            self._nodes = {}
+            self._applications = []
+            self._stale = True
+
+    def _on_event(self, event_type, source):
+        """Queue the event of the event loop thread, sync() applies it in the searching thread"""
+        if source is None or not (source[0] in self._bus_names or source == self.desktop_identity):
+            return
+        if len(self._pending) >= self.max_pending_events:
+            self._stale = True
+        else:
+            self._pending.append((event_type, source))
+
+    def _iter_live_applications(self):
+        """Iterate over the applications of the process read through libatspi"""
+        for element in AtspiElementInfo().iter_children(cache_enable=True):
+            if element.process_id == self.process:
+                yield element
+
+    def _add_subtree(self, element, parent):
+        """Add the node of the element and its descendants read through libatspi"""
+        node = _MirrorNode(element, parent)
+        self._nodes[_get_identity(element)] = node
+        node.children = [self._add_subtree(child, node)
+                         for child in element.iter_children(process=self.process, cache_enable=True)]
+        return node
+
+    def _remove_subtree(self, node):
+        """Remove the node and its descendants"""
+        nodes = [node]
+        while nodes:
+            node = nodes.pop()
+            self._nodes.pop(_get_identity(node.element), None)
+            nodes.extend(node.children)
+
+    def _update_children(self, node):
+        """Read the children of the node and their descendants again"""
+        for child in node.children:
+            self._remove_subtree(child)
+        node.children = [self._add_subtree(child, node)
+                         for child in node.element.iter_children(process=self.process, cache_enable=True)]
+
+    def resync(self):
+        """Take the replica of the process tree again"""
+        with self._lock:
+            self._pending.clear()
+            self._stale = False
+            self._resync_time = timestamp()
+            applications = list(self._iter_live_applications())
+            # the events of the applications are queued during the walk
+            self._bus_names = frozenset([_get_identity(element)[0] for element in applications])
+            self._nodes = {}
+            self._applications = [self._add_subtree(element, None) for element in applications]
+            self.resync_count += 1
+
+    def sync(self):
+        """Apply the pending events to the replica or resync it if it's stale"""
+        with self._lock:
+            if self.stale:
+                self.resync()
+                return
+            while self._pending:
+                event_type, source = self._pending.popleft()
+                node = self._nodes.get(source, None)
+                if event_type.startswith("object:children-changed"):
+                    if source == self.desktop_identity:
+                        identities = [_get_identity(element) for element in self._iter_live_applications()]
+                        if identities == [_get_identity(app.element) for app in self._applications]:
+                            continue
+                    if node is None:
+                        # the change of an unknown element means that the replica is outdated
+                        self.resync()
+                        return
+                    self._update_children(node)
+                elif node is not None:
+                    for prefix, attrs in self.outdated_attrs:
+                        if event_type.startswith(prefix):
+                            node.element.invalidate(*attrs)
+
+    def get_node(self, identity):
+        """Return the node of the element identity in the current replica or None if it isn't mirrored"""
+        return self._nodes.get(identity, None)
+
+    def iter_applications(self, cache_enable=False):
+        """Sync the replica and iterate over the mirrored applications of the process (a search starts here)"""
+        self.sync()
+        for node in self._applications:
+            yield MirrorElementInfo(self, node, cache_enable)
@@ -0,0 +1,298 @@
+# GUI Application automation and testing library
+# Copyright (C) 2006-2018 Mark Mc Mahon and Contributors
+# https://github.com/pywinauto/pywinauto/graphs/contributors
+# http://pywinauto.readthedocs.io/en/latest/credits.html
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of pywinauto nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""CSS-like selectors of elements walking the tree in a single pass
+
+A selector is a sequence of compound selectors separated by combinators::
+
+    Frame[name="Editor"] > Panel PushButton[name~="^Save"]:nth(0)
+
+A compound selector consists of:
+
+* an optional control type or ``*`` for any element,
+* ``[property=value]`` conditions comparing the property with the value
+  and ``[property~=regex]`` conditions matching the property by
+  the regular expression (as ``property_re`` search keyword does),
+* an optional ``:nth(index)`` taking only the element with the index
+  among all the elements matched so far in the tree order.
+
+The values are quoted strings or bare words (``true``, ``false``
+and integers are converted). ``>`` combinator requires a child of
+the previous element, whitespace allows any descendant. A leading ``>``
+looks for the children of the parent only.
+
+The selector is parsed once to a list of steps, and the tree is walked
+once: a subtree is skipped when no step can match there anymore.
+"""
+from __future__ import unicode_literals
+
+import re
+import threading
+
+CHILD = '>'
+DESCENDANT = ' '
+
+_identifier_re = re.compile(r'\*|[A-Za-z_][\w]*')
+_operator_re = re.compile(r'~?=')
+_bare_value_re = re.compile(r'[^\]\s"\']+')
+_integer_re = re.compile(r'-?\d+$')
+_nth_re = re.compile(r':nth\(\s*(\d+)\s*\)')
+
+
+#=========================================================================
+class SelectorSyntaxError(ValueError):
+
+    """The selector can't be parsed"""
+    pass
+
+
+#=========================================================================
+class SelectorStep(object):
+
+    """One compound selector with the combinator before it"""
+
+    def __init__(self, combinator, props, nth=None):
+        """Initialize the step"""
+        self.combinator = combinator
+        self.props = props
+        self.nth = nth
+
+    def __repr__(self):
+        """Return a representation of the step"""
+        return 'SelectorStep({0!r}, {1!r}, nth={2!r})'.format(self.combinator, self.props, self.nth)
+
+
+#=========================================================================
+class _Parser(object):
+
+    """Recursive descent parser of a selector string"""
+
+    def __init__(self, text):
+        """Initialize the parser"""
+        self.text = text
+        self.pos = 0
+
+    def error(self, message):
+        """Raise SelectorSyntaxError pointing at the current position"""
+        raise SelectorSyntaxError('{0} at position {1} of selector "{2}"'.format(message, self.pos, self.text))
+
+    def skip_spaces(self):
+        """Skip whitespace and return True if there was any"""
+        start = self.pos
+        while self.pos < len(self.text) and self.text[self.pos].isspace():
+            self.pos += 1
+        return self.pos > start
+
+    def match(self, regex):
+        """Return the match of the regular expression at the current position and skip it"""
+        match = regex.match(self.text, self.pos)
+        if match:
+            self.pos = match.end()
+        return match
+
+    def parse(self):
+        """Return a list of SelectorStep"""
+        steps = []
+        self.skip_spaces()
+        combinator = DESCENDANT
+        if self.text.startswith(CHILD, self.pos):
+            combinator = CHILD
+            self.pos += 1
+            self.skip_spaces()
+        while True:
+            steps.append(self.parse_step(combinator))
+            has_spaces = self.skip_spaces()
+            if self.pos >= len(self.text):
+                return steps
+            if self.text.startswith(CHILD, self.pos):
+                combinator = CHILD
+                self.pos += 1
+                self.skip_spaces()
+            elif has_spaces:
+                combinator = DESCENDANT
+            else:
+                self.error('Unexpected "{0}"'.format(self.text[self.pos]))
+
+    def parse_step(self, combinator):
+        """Parse a compound selector"""
+        start = self.pos
+        props = {}
+        nth = None
+        match = self.match(_identifier_re)
+        if match and match.group() != '*':
+            props['control_type'] = match.group()
+        while self.text.startswith('[', self.pos):
+            self.pos += 1
+            self.skip_spaces()
+            key, value = self.parse_condition()
+            if key in props:
+                self.error('Duplicated condition "{0}"'.format(key))
+            props[key] = value
+        match = self.match(_nth_re)
+        if match:
+            nth = int(match.group(1))
+        if self.pos == start:
+            self.error('Expected a control type, "*", "[" or ":nth("')
+        return SelectorStep(combinator, props, nth)
+
+    def parse_condition(self):
+        """Parse a condition in square brackets and return (keyword, value)"""
+        match = self.match(_identifier_re)
+        if not match or match.group() == '*':
+            self.error('Expected a property name')
+        key = match.group()
+        self.skip_spaces()
+        operator = self.match(_operator_re)
+        if not operator:
+            self.error('Expected "=" or "~="')
+        if operator.group() == '~=':
+            key += '_re'
+        self.skip_spaces()
+        value = self.parse_value()
+        self.skip_spaces()
+        if not self.text.startswith(']', self.pos):
+            self.error('Expected "]"')
+        self.pos += 1
+        return key, value
+
+    def parse_value(self):
+        """Parse a quoted string or a bare word"""
+        if self.pos < len(self.text) and self.text[self.pos] in '"\'':
+            quote = self.text[self.pos]
+            chars = []
+            self.pos += 1
+            while self.pos < len(self.text) and self.text[self.pos] != quote:
+                if self.text[self.pos] == '\\':
+                    self.pos += 1
+                    if self.pos >= len(self.text):
+                        break
+                chars.append(self.text[self.pos])
+                self.pos += 1
+            if self.pos >= len(self.text):
+                self.error('Unterminated string')
+            self.pos += 1
+            return ''.join(chars)
+
+        match = self.match(_bare_value_re)
+        if not match:
+            self.error('Expected a value')
+        value = match.group()
+        if value in ('true', 'false'):
+            return value == 'true'
+        if _integer_re.match(value):
+            return int(value)
+        return value
+
+
+#=========================================================================
+class Selector(object):
+
+    """A selector parsed to the steps of the tree walk"""
+
+    def __init__(self, text):
+        """Parse the selector"""
+        self.text = text
+        self.steps = _Parser(text).parse()
+
+    def __repr__(self):
+        """Return the selector string"""
+        return 'Selector({0!r})'.format(self.text)
+
+    def iter_elements(self, parent, matchers, depth=None):
+        """
+        Walk the tree under the parent and yield the elements matched by the selector
+
+        * **parent** - ElementInfo to search under
+        * **matchers** - functions taking an element and returning True if
+          it matches the step, one per step (in the order of the steps)
+        * **depth** - the deepest level of the walk (children of the parent
+          have level 1), no limit if None
+
+        The elements are yielded in the tree order (parents before their
+        children) as soon as they are found.
+        """
+        steps = self.steps
+        last = len(steps) - 1
+        nth_counts = [0] * len(steps)
+        # the steps which found their nth element already
+        finished = set()
+
+        # the steps which can match the children of the element on top
+        stack = [(parent.iter_tree_children(), (0,))]
+        while stack:
+            children, states = stack[-1]
+            elem = next(children, None)
+            if elem is None:
+                stack.pop()
+                continue
+
+            matched = []
+            for index in states:
+                if index in finished or not matchers[index](elem):
+                    continue
+                nth = steps[index].nth
+                if nth is not None:
+                    nth_counts[index] += 1
+                    if nth_counts[index] <= nth:
+                        continue
+                    finished.add(index)
+                matched.append(index)
+
+            if last in matched:
+                yield elem
+                if last in finished:
+                    return
+
+            child_states = [index for index in states
+                            if steps[index].combinator == DESCENDANT and index not in finished]
+            child_states.extend(index + 1 for index in matched if index < last)
+            if child_states and (depth is None or len(stack) < depth):
+                stack.append((elem.iter_tree_children(), tuple(sorted(set(child_states)))))
+
+
+#=========================================================================
+_selectors = {}
+_selectors_lock = threading.Lock()
+# maximal number of the parsed selectors kept by compile_selector()
+max_cached_selectors = 1000
+
+
+def compile_selector(text):
+    """Return the Selector parsed from the text, the parsed selectors are cached"""
+    with _selectors_lock:
+        selector = _selectors.get(text)
+    if selector is None:
+        selector = Selector(text)
+        with _selectors_lock:
+            if len(_selectors) >= max_cached_selectors:
+                _selectors.clear()
+            _selectors[text] = selector
+    return selector
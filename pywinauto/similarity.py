@@ -0,0 +1,333 @@
+# GUI Application automation and testing library
+# Copyright (C) 2006-2018 Mark Mc Mahon and Contributors
+# https://github.com/pywinauto/pywinauto/graphs/contributors
+# http://pywinauto.readthedocs.io/en/latest/credits.html
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of pywinauto nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""String similarity scorers used by findbestmatch and fuzzydict
+
+A scorer returns the match ratios of one search text against a list of texts
+at once: from 0 (nothing in common) to 1 (the same texts).
+
+The default scorer is based on difflib.SequenceMatcher. The ratios of the
+other scorers are mapped to the SequenceMatcher scale by a calibration table,
+so the cutoffs (.5 for find_best_match, .6 for best_match names and FuzzyDict)
+keep their meaning with any scorer.
+
+A scorer can be passed to a lookup by name or as an object, or set globally:
+
+>>> from pywinauto import similarity
+>>> similarity.set_default_scorer('levenshtein')
+"""
+from __future__ import unicode_literals
+
+import bisect
+import difflib
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+#====================================================================
+def _interpolate(points, value):
+    """Map the value by a piecewise linear function given by sorted (x, y) points"""
+    i = bisect.bisect_right([x for x, _ in points], value)
+    if i == 0:
+        return points[0][1]
+    if i == len(points):
+        return points[-1][1]
+    (x1, y1), (x2, y2) = points[i - 1], points[i]
+    return y1 + (y2 - y1) * (value - x1) / (x2 - x1)
+
+
+#====================================================================
+class Scorer(object):
+
+    """Base class of the string similarity scorers"""
+
+    name = None
+
+    # (raw ratio, SequenceMatcher ratio) points in ascending order,
+    # None if the raw ratios are used as is
+    calibration = None
+
+    def raw_ratios(self, search_text, texts):
+        """Return the not calibrated ratios of search_text against each of the texts"""
+        raise NotImplementedError()
+
+    def ratios(self, search_text, texts):
+        """Return the ratios of search_text against each of the texts"""
+        raw_ratios = self.raw_ratios(search_text, texts)
+        if not self.calibration:
+            return list(raw_ratios)
+        return [_interpolate(self.calibration, ratio) for ratio in raw_ratios]
+
+    def ratio(self, text1, text2):
+        """Return the ratio of two texts"""
+        return self.ratios(text1, [text2])[0]
+
+
+#====================================================================
+class SequenceMatcherScorer(Scorer):
+
+    """Scorer based on difflib.SequenceMatcher.ratio() (the default one)
+
+    findbestmatch uses its own cache and quick checks for this scorer.
+    """
+
+    name = 'difflib'
+
+    def raw_ratios(self, search_text, texts):
+        """Return SequenceMatcher ratios of search_text against each of the texts"""
+        ratio_calc = difflib.SequenceMatcher()
+        ratio_calc.set_seq1(search_text)
+
+        ratios = []
+        for text in texts:
+            ratio_calc.set_seq2(text)
+            ratios.append(ratio_calc.ratio())
+        return ratios
+
+
+#====================================================================
+def get_trigrams(text):
+    """Return a dictionary with the number of occurrences of each trigram in text"""
+    trigrams = {}
+    for i in range(len(text) - 2):
+        trigram = text[i:i + 3]
+        trigrams[trigram] = trigrams.get(trigram, 0) + 1
+    return trigrams
+
+
+def trigram_ratio_bound(shared, length1, length2):
+    """Return an upper bound of the SequenceMatcher ratio of two texts
+
+    shared is the number of trigrams the texts have in common
+    (counted with their occurrences, see get_trigrams()).
+    SequenceMatcher finds M matching characters in b non-adjacent blocks.
+    Every block of length L shares L - 2 trigrams between both texts
+    and consecutive blocks are separated by at least one unmatched character,
+    so b - 1 <= length1 + length2 - 2 * M. Together it gives an upper bound
+    5 * M <= shared + 2 * (length1 + length2) + 2.
+    """
+    length = length1 + length2
+    if not length:
+        return 1.0
+    matches = min(length1, length2, (shared + 2 * length + 2) // 5)
+    # the same arithmetic as in SequenceMatcher.ratio() keeps the bound exact
+    return 2.0 * matches / length
+
+
+#====================================================================
+def _get_char_masks(pattern):
+    """Return a dictionary of bit masks of the char positions in the pattern"""
+    masks = {}
+    for i, char in enumerate(pattern):
+        masks[char] = masks.get(char, 0) | (1 << i)
+    return masks
+
+
+def _bit_parallel_distance(char_masks, length, text):
+    """Return the Levenshtein distance between the pattern and the text
+
+    The pattern is given by its length and _get_char_masks().
+    This is the bit-vector algorithm of Myers as modified by Hyyro
+    for the edit distance of the whole strings.
+    """
+    if not length:
+        return len(text)
+
+    mask = (1 << length) - 1
+    high_bit = 1 << (length - 1)
+    pv, mv, distance = mask, 0, length
+    for char in text:
+        eq = char_masks.get(char, 0)
+        xv = eq | mv
+        xh = ((((eq & pv) + pv) & mask) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & high_bit:
+            distance += 1
+        elif mh & high_bit:
+            distance -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+    return distance
+
+
+def _numpy_distances(char_masks, length, texts):
+    """Return the Levenshtein distances for all the texts processed together
+
+    The same algorithm as _bit_parallel_distance() where the bit vectors of
+    all the texts are processed column by column in NumPy arrays
+    (the pattern length must be from 1 to 64).
+    """
+    lengths = numpy.array([len(text) for text in texts])
+    width = int(lengths.max())
+    codes = numpy.full((len(texts), width), -1, dtype=numpy.int64)
+    for i, text in enumerate(texts):
+        codes[i, :len(text)] = [ord(char) for char in text]
+
+    chars = sorted(char_masks)
+    char_codes = numpy.array([ord(char) for char in chars], dtype=numpy.int64)
+    masks = numpy.array([char_masks[char] for char in chars], dtype=numpy.uint64)
+
+    zero, one = numpy.uint64(0), numpy.uint64(1)
+    mask = numpy.uint64((1 << length) - 1)
+    high_bit = numpy.uint64(1 << (length - 1))
+    pv = numpy.full(len(texts), mask, dtype=numpy.uint64)
+    mv = numpy.zeros(len(texts), dtype=numpy.uint64)
+    distances = numpy.full(len(texts), length, dtype=numpy.int64)
+    for j in range(width):
+        column = codes[:, j]
+        index = numpy.searchsorted(char_codes, column).clip(0, len(chars) - 1)
+        eq = numpy.where(char_codes[index] == column, masks[index], zero)
+        xv = eq | mv
+        xh = ((((eq & pv) + pv) & mask) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        active = lengths > j
+        distances += active & ((ph & high_bit) != 0)
+        distances -= active & ((ph & high_bit) == 0) & ((mh & high_bit) != 0)
+        ph = ((ph << one) | one) & mask
+        mh = (mh << one) & mask
+        pv = numpy.where(active, mh | (~(xv | ph) & mask), pv)
+        mv = numpy.where(active, ph & xv, mv)
+    return distances.tolist()
+
+
+#====================================================================
+class LevenshteinScorer(Scorer):
+
+    """Scorer based on the Levenshtein (edit) distance
+
+    The raw ratio is 1 - distance / max(len(search_text), len(text)).
+    The search text is preprocessed once for all the texts and every text
+    takes one pass over its chars. With NumPy installed the texts are
+    processed together if there are at least numpy_min_texts of them
+    and the search text is not longer than 64 chars.
+    """
+
+    name = 'levenshtein'
+
+    numpy_min_texts = 32
+
+    # fitted by calibrate() on 20000 lookups of typical control names
+    # ("OKButton", "Save AsEdit", "ComboBox3") misspelled, cut or lower cased:
+    # half of them against the name looked for and half against a random one
+    calibration = (
+        (0.0, 0.0),
+        (0.1, 0.174),
+        (0.2, 0.308),
+        (0.3, 0.429),
+        (0.4, 0.513),
+        (0.5, 0.588),
+        (0.6, 0.667),
+        (0.7, 0.75),
+        (0.8, 0.833),
+        (0.9, 0.933),
+        (1.0, 1.0),
+    )
+
+    def distances(self, search_text, texts):
+        """Return the Levenshtein distances of search_text to each of the texts"""
+        texts = list(texts)
+        char_masks = _get_char_masks(search_text)
+        length = len(search_text)
+        if numpy is not None and texts and len(texts) >= self.numpy_min_texts and 0 < length <= 64:
+            return _numpy_distances(char_masks, length, texts)
+        return [_bit_parallel_distance(char_masks, length, text) for text in texts]
+
+    def raw_ratios(self, search_text, texts):
+        """Return the normalized similarity of search_text to each of the texts"""
+        texts = list(texts)
+        ratios = []
+        for text, distance in zip(texts, self.distances(search_text, texts)):
+            longest = max(len(search_text), len(text))
+            ratios.append(1.0 - float(distance) / longest if longest else 1.0)
+        return ratios
+
+
+#====================================================================
+def calibrate(scorer, pairs, reference=None, points=11):
+    """Return a calibration table of the scorer for a sample of text pairs
+
+    The ratios of the scorer and of the reference scorer (SequenceMatcher by
+    default) are matched by their ranks, so a calibrated ratio is above
+    a cutoff for the same share of the pairs as the reference ratio is.
+    """
+    if reference is None:
+        reference = SequenceMatcherScorer()
+    raw = sorted(scorer.raw_ratios(text1, [text2])[0] for text1, text2 in pairs)
+    expected = sorted(reference.ratio(text1, text2) for text1, text2 in pairs)
+
+    table = [(0.0, 0.0)]
+    for i in range(1, points - 1):
+        x = float(i) / (points - 1)
+        # the reference ratio of the same rank as the raw ratio x
+        rank = bisect.bisect_left(raw, x)
+        y = expected[min(rank, len(expected) - 1)]
+        table.append((x, round(max(y, table[-1][1]), 3)))
+    table.append((1.0, 1.0))
+    return tuple(table)
+
+
+#====================================================================
+scorers = {}
+
+
+def register_scorer(scorer):
+    """Make the scorer available by its name"""
+    scorers[scorer.name] = scorer
+
+
+register_scorer(SequenceMatcherScorer())
+register_scorer(LevenshteinScorer())
+
+_default_scorer = scorers['difflib']
+
+
+def get_scorer(scorer=None):
+    """Return the scorer object by its name, the default one for None"""
+    if scorer is None:
+        return _default_scorer
+    if isinstance(scorer, Scorer):
+        return scorer
+    if scorer not in scorers:
+        raise ValueError('Unknown scorer "{}". Available scorers: {}'.format(scorer, sorted(scorers)))
+    return scorers[scorer]
+
+
+def set_default_scorer(scorer):
+    """Set the scorer (a name or an object) used by the lookups by default"""
+    global _default_scorer
+    _default_scorer = get_scorer(scorer)
@@ -111,10 +111,20 @@ The Following are the individual timing settings that can be adjusted:
 * after_drag_n_drop_wait  default(.1)
 * scroll_step_wait  default(.1)
 
+* notifier_poll_interval  default(1)
+
+The policy of the retries in ``wait_until()`` and ``wait_until_passes()``
+(see :class:`RetryPolicy`) is selected by name:
+
+* retry_policy  default('fixed'), also 'exponential' or 'cost_aware'
+
 """
 
 import time
+import random
 import operator
+import threading
+from contextlib import contextmanager
 from functools import wraps
 
 from . import deprecated
@@ -195,32 +205,45 @@ class TimeConfig(object):
 
         'app_exit_timeout': 10.,
         'app_exit_retry': .1,
+
+        'notifier_poll_interval': 1.,
+
+        'retry_policy': 'fixed',
     }
 
+    # the settings which are not times (fast() and slow() keep them)
+    __policy_settings = ('retry_policy', )
+
     assert(__default_timing['window_find_timeout'] >=
            __default_timing['window_find_retry'] * 2)
 
     _timings = __default_timing.copy()
     _cur_speed = 1
 
+    # the names of the timings are checked once per attribute read
+    __timing_names = frozenset(__default_timing)
+
+    # the timings overridden by override() in the current thread
+    __local = threading.local()
+
     def __getattribute__(self, attr):
         """Get the value for a particular timing"""
-        if attr in ['__dict__', '__members__', '__methods__', '__class__']:
-            return object.__getattribute__(self, attr)
+        if attr in TimeConfig.__timing_names:
+            overrides = getattr(TimeConfig.__local, 'overrides', None)
+            if overrides and attr in overrides:
+                return overrides[attr]
+            return object.__getattribute__(self, '_timings')[attr]
 
-        if attr in dir(TimeConfig):
+        try:
             return object.__getattribute__(self, attr)
-
-        if attr in self.__default_timing:
-            return self._timings[attr]
-        else:
+        except AttributeError:
             raise AttributeError("Unknown timing setting: {0}".format(attr))
 
     def __setattr__(self, attr, value):
         """Set a particular timing"""
         if attr == '_timings':
             object.__setattr__(self, attr, value)
-        elif attr in self.__default_timing:
+        elif attr in self.__timing_names:
             self._timings[attr] = value
         else:
             raise AttributeError("Unknown timing setting: {0}".format(attr))
@@ -237,6 +260,9 @@ class TimeConfig(object):
         """
 
         for setting in self.__default_timing:
+            if setting in self.__policy_settings:
+                continue
+
             # set timeouts to the min of the current speed or 1 second
             if "_timeout" in setting:
                 self._timings[setting] = \
@@ -261,6 +287,9 @@ class TimeConfig(object):
         (if existing times are slower then keep existing times)
         """
         for setting in self.__default_timing:
+            if setting in self.__policy_settings:
+                continue
+
             if "_timeout" in setting:
                 self._timings[setting] = max(
                     self.__default_timing[setting] * 10,
@@ -283,6 +312,30 @@ class TimeConfig(object):
         """Set all timings to the default time"""
         self._timings = self.__default_timing.copy()
 
+    @contextmanager
+    def override(self, **timings):
+        """Override the timings in the current thread inside a with block
+
+        The other threads and the settings changed inside the block
+        (e.g. by fast()) are not affected, they are shadowed by the overrides
+        until the end of the block. e.g. ::
+
+            with Timings.override(after_click_wait=0, window_find_timeout=1):
+                dlg.OK.click()
+        """
+        for attr in timings:
+            if attr not in self.__timing_names:
+                raise AttributeError("Unknown timing setting: {0}".format(attr))
+
+        previous = getattr(self.__local, 'overrides', None)
+        overrides = dict(previous or {})
+        overrides.update(timings)
+        self.__local.overrides = overrides
+        try:
+            yield self
+        finally:
+            self.__local.overrides = previous
+
     Fast = deprecated(fast)
     Slow = deprecated(slow)
     Defaults = deprecated(defaults)
@@ -305,6 +358,169 @@ def timestamp():
     return _clock_func()
 
 
+#=========================================================================
+class ChangeNotifier(object):
+
+    """
+    Wake up the waiting functions when something has changed
+
+    An event source (e.g. an accessibility event listener) calls notify().
+    wait_until() and wait_until_passes() called with a notifier sleep
+    until the next change instead of every retry_interval.
+    The changes are counted by the version number so a change
+    during the check of a condition is not missed.
+    """
+
+    def __init__(self, is_live=None):
+        """Initialize the notifier
+
+        is_live is a function returning True while the event source
+        delivers the changes (see the live property).
+        """
+        self._condition = threading.Condition()
+        self._is_live = is_live
+        self.version = 0
+
+    @property
+    def live(self):
+        """True if the event source confirms it delivers the changes
+
+        The waits rely only on a live notifier, otherwise they poll
+        every retry_interval as without a notifier.
+        """
+        return self._is_live is not None and bool(self._is_live())
+
+    def notify(self):
+        """Signal a change to all the waiting threads"""
+        with self._condition:
+            self.version += 1
+            self._condition.notify_all()
+
+    def wait(self, version, timeout):
+        """Wait until a change after the version, return False if the timeout expires"""
+        end = timestamp() + timeout
+        with self._condition:
+            while self.version == version:
+                time_left = end - timestamp()
+                if time_left <= 0:
+                    return False
+                self._condition.wait(time_left)
+        return True
+
+
+#=========================================================================
+class RetryPolicy(object):
+
+    """
+    Fixed policy of the retries: sleep retry_interval between the attempts
+
+    A policy object is used by one call of wait_until() or wait_until_passes().
+    It counts the attempts and the time spent inside the function, so the
+    policy passed to a call can be inspected after it
+    (the policy is also in the 'retry_policy' attribute of TimeoutError).
+    """
+
+    name = 'fixed'
+
+    def __init__(self):
+        """Initialize the policy"""
+        self.reset()
+
+    def reset(self):
+        """Forget the attempts (called at the start of a wait)"""
+        self.attempts = 0
+        self.func_time = 0.
+        self.last_duration = 0.
+
+    def add_attempt(self, duration):
+        """Count an attempt calling the function for duration seconds"""
+        self.attempts += 1
+        self.func_time += duration
+        self.last_duration = duration
+
+    def get_interval(self, retry_interval):
+        """Return how long to sleep before the next attempt"""
+        return retry_interval
+
+
+class ExponentialRetryPolicy(RetryPolicy):
+
+    """Double the interval after every attempt up to max_interval, minus a random jitter"""
+
+    name = 'exponential'
+
+    factor = 2.
+    max_interval = 1.
+    # the interval is reduced by a random part up to jitter (to not retry in lockstep)
+    jitter = .5
+
+    def get_interval(self, retry_interval):
+        """Return retry_interval * factor ** (attempts - 1) capped by max_interval with a jitter"""
+        interval = retry_interval * self.factor ** max(self.attempts - 1, 0)
+        interval = min(interval, max(self.max_interval, retry_interval))
+        return interval * (1. - random.uniform(0, self.jitter))
+
+
+class CostAwareRetryPolicy(RetryPolicy):
+
+    """Sleep at least cost_factor times the duration of the last attempt
+
+    An expensive function (e.g. a search walking a big tree) doesn't spend
+    the whole timeout in the attempts.
+    """
+
+    name = 'cost_aware'
+
+    cost_factor = 1.
+
+    def get_interval(self, retry_interval):
+        """Return the max of retry_interval and the scaled duration of the last attempt"""
+        return max(retry_interval, self.last_duration * self.cost_factor)
+
+
+# the policies selected by Timings.retry_policy or the retry_policy keyword
+retry_policies = dict((policy.name, policy) for policy in
+                      (RetryPolicy, ExponentialRetryPolicy, CostAwareRetryPolicy))
+
+
+def _get_retry_policy(policy):
+    """Return the RetryPolicy object for a name, a class, an object or None (Timings.retry_policy)"""
+    if policy is None:
+        policy = Timings.retry_policy
+    if not isinstance(policy, RetryPolicy):
+        if policy in retry_policies:
+            policy = retry_policies[policy]
+        elif not (isinstance(policy, type) and issubclass(policy, RetryPolicy)):
+            raise ValueError("Unknown retry policy: {0}".format(policy))
+        policy = policy()
+    policy.reset()
+    return policy
+
+
+def _call_attempt(policy, func, *args, **kwargs):
+    """Call the function counting the attempt and its duration by the policy"""
+    start = timestamp()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        policy.add_attempt(timestamp() - start)
+
+
+def _wait_for_retry(retry_interval, time_left, notifier, version):
+    """Sleep before the next retry of wait_until() or wait_until_passes()
+
+    With a live notifier the sleep ends at the first change after the version
+    but not earlier than retry_interval, so a burst of events doesn't make
+    the checks more frequent. Events may be missed (or not sent for some
+    changes) so the condition is checked every Timings.notifier_poll_interval anyway.
+    If the event source isn't confirmed live (ChangeNotifier.live),
+    the sleep is just retry_interval: a stopped listener doesn't slow down the checks.
+    """
+    time.sleep(min(retry_interval, time_left))
+    if notifier is not None and notifier.live and time_left > retry_interval:
+        notifier.wait(version, min(Timings.notifier_poll_interval - retry_interval, time_left - retry_interval))
+
+
 #=========================================================================
 def always_wait_until(timeout,
                       retry_interval,
@@ -328,7 +544,10 @@ def wait_until(timeout,
                func,
                value=True,
                op=operator.eq,
-               *args, **kwargs):
+               *args,
+               notifier=None,
+               retry_policy=None,
+               **kwargs):
     r"""
     Wait until ``op(function(*args, **kwargs), value)`` is True or until timeout expires
 
@@ -338,6 +557,12 @@ def wait_until(timeout,
     * **value**  the value to be compared against (defaults to True)
     * **op** the comparison function (defaults to equality)\
     * **args** optional arguments to be passed to func when called
+    * **notifier** optional :class:`ChangeNotifier` (keyword only),
+      the function is called again at the first change notified after
+      retry_interval instead of every retry_interval
+    * **retry_policy** optional (keyword only): a name from
+      ``retry_policies``, a :class:`RetryPolicy` class or object
+      (default: ``Timings.retry_policy``)
     * **kwargs** optional keyword arguments to be passed to func when called
 
     Returns the return value of the function
@@ -354,9 +579,11 @@ def wait_until(timeout,
         except TimeoutError as e:
             print("timed out")
     """
+    policy = _get_retry_policy(retry_policy)
     start = timestamp()
 
-    func_val = func(*args, **kwargs)
+    version = notifier.version if notifier is not None else None
+    func_val = _call_attempt(policy, func, *args, **kwargs)
     # while the function hasn't returned what we are waiting for
     while not op(func_val, value):
 
@@ -365,13 +592,15 @@ def wait_until(timeout,
 
         # if we have to wait some more
         if time_left > 0:
-            # wait either the retry_interval or else the amount of
+            # wait either the retry_interval (or a change) or else the amount of
             # time until the timeout expires (whichever is less)
-            time.sleep(min(retry_interval, time_left))
-            func_val = func(*args, **kwargs)
+            _wait_for_retry(policy.get_interval(retry_interval), time_left, notifier, version)
+            version = notifier.version if notifier is not None else None
+            func_val = _call_attempt(policy, func, *args, **kwargs)
         else:
             err = TimeoutError("timed out")
             err.function_value = func_val
+            err.retry_policy = policy
             raise err
 
     return func_val
@@ -401,7 +630,10 @@ def wait_until_passes(timeout,
                       retry_interval,
                       func,
                       exceptions=(Exception),
-                      *args, **kwargs):
+                      *args,
+                      notifier=None,
+                      retry_policy=None,
+                      **kwargs):
     """
     Wait until ``func(*args, **kwargs)`` does not raise one of the exceptions
 
@@ -410,6 +642,12 @@ def wait_until_passes(timeout,
     * **func** the function that will be executed
     * **exceptions**  list of exceptions to test against (default: Exception)
     * **args** optional arguments to be passed to func when called
+    * **notifier** optional :class:`ChangeNotifier` (keyword only),
+      the function is called again at the first change notified after
+      retry_interval instead of every retry_interval
+    * **retry_policy** optional (keyword only): a name from
+      ``retry_policies``, a :class:`RetryPolicy` class or object
+      (default: ``Timings.retry_policy``)
     * **kwargs** optional keyword arguments to be passed to func when called
 
     Returns the return value of the function
@@ -427,13 +665,15 @@ def wait_until_passes(timeout,
             print("timed out")
             raise e.
     """
+    policy = _get_retry_policy(retry_policy)
     start = timestamp()
 
     # keep trying until the timeout is passed
     while True:
+        version = notifier.version if notifier is not None else None
         try:
             # Call the function with any arguments
-            func_val = func(*args, **kwargs)
+            func_val = _call_attempt(policy, func, *args, **kwargs)
 
             # if no exception is raised then we are finished
             break
@@ -446,13 +686,14 @@ def wait_until_passes(timeout,
 
             # if we have to wait some more
             if time_left > 0:
-                # wait either the retry_interval or else the amount of
+                # wait either the retry_interval (or a change) or else the amount of
                 # time until the timeout expires (whichever is less)
-                time.sleep(min(retry_interval, time_left))
+                _wait_for_retry(policy.get_interval(retry_interval), time_left, notifier, version)
 
             else:
                 err = TimeoutError()
                 err.original_exception = e
+                err.retry_policy = policy
                 raise err
 
     # return the function value
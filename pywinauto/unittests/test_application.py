@@ -846,6 +846,39 @@ class WindowSpecificationTestCases(unittest.TestCase):
 
         self.assertRaises(AttributeError, wspec)
 
+    def test_resolved_elements_cache(self):
+        """Test if 100 calls on the same spec reuse the elements found once"""
+        self.assertFalse(WindowSpecification.cache_resolved)
+        start = timestamp()
+        for _ in range(100):
+            self.ctrlspec.window_text()
+        uncached_time = timestamp() - start
+
+        self.ctrlspec.cache_resolved = True
+        with mock.patch.object(findwindows, 'find_element', wraps=findwindows.find_element) as find_element:
+            start = timestamp()
+            for _ in range(100):
+                self.ctrlspec.window_text()
+            cached_time = timestamp() - start
+        self.assertEqual(find_element.call_count, 2)
+        self.assertTrue(cached_time < uncached_time)
+
+    def test_find_retries_resume_from_found_level(self):
+        """Test if the retries of find() don't search the found levels again"""
+        spec = self.ctrlspec.by(name='NoSuchControl')
+        with mock.patch.object(findwindows, 'find_element', wraps=findwindows.find_element) as find_element:
+            self.assertRaises(findwindows.ElementNotFoundError, spec.find, timeout=0.5, retry_interval=0.05)
+        parents = [call[1].get('parent') for call in find_element.call_args_list]
+        self.assertTrue(len(parents) > 3)
+        self.assertEqual(1, parents.count(None))
+
+    def test_resolved_elements_cache_validation(self):
+        """Test if a cached element is not reused after the window is closed"""
+        self.ctrlspec.cache_resolved = True
+        self.assertTrue(self.ctrlspec.exists(timeout=0))
+        self.app.kill()
+        self.assertFalse(self.ctrlspec.exists(timeout=0))
+
     def test_wrapper_object(self):
         """Test that we can get a control"""
         self.assertEqual(True, isinstance(self.dlgspec, WindowSpecification))
@@ -952,6 +985,16 @@ class WindowSpecificationTestCases(unittest.TestCase):
         self.assertEqual(ctrls[0], self.app.Notepad.Edit.find())
         self.assertEqual(ctrls[1], self.app.Notepad.StatusBar.find())
 
+    def test_explain_match(self):
+        """Test explain_match() finds the best_match candidates without changing the compiled criteria"""
+        ctrl = self.ctrlspec.find()
+        compiled_criteria = dict(self.ctrlspec._compiled_criteria)
+
+        candidates = self.ctrlspec.explain_match(k=2)
+        self.assertEqual(2, len(candidates))
+        self.assertEqual(ctrl, candidates[0][3])
+        self.assertEqual(compiled_criteria, self.ctrlspec._compiled_criteria)
+
     def test_wait(self):
         """test the functionality and timing of the wait method"""
         allowable_error = .2
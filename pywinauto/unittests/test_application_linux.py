@@ -4,9 +4,12 @@ import os
 import unittest
 import subprocess
 import time
+import mock
 
 sys.path.append(".")
 from pywinauto.application import WindowSpecification  # noqa: E402
+from pywinauto import findwindows  # noqa: E402
+from pywinauto import base_application  # noqa: E402
 if sys.platform.startswith('linux'):
     from pywinauto.controls import atspiwrapper  # register atspi backend
     from pywinauto.linux.application import Application  # noqa: E402
@@ -80,6 +83,18 @@ if sys.platform.startswith('linux'):
             self.app.connect(path=_test_app())
             self.assertEqual(self.app.process, self.subprocess_app.pid)
 
+        def test_cache_mask(self):
+            """Set the libatspi cache mask by connect() and clear the cache"""
+            self.assertRaises(AppNotConnected, Application().set_cache_mask, "name")
+            self.subprocess_app = subprocess.Popen(_test_app().split(), stdout=subprocess.PIPE, shell=False)
+            time.sleep(1)
+            self.app.cache_mask = ("parent", "children", "name", "role", "states")
+            self.app.connect(pid=self.subprocess_app.pid)
+            self.assertTrue(self.app.set_cache_mask("name", "states"))
+            self.assertRaises(ValueError, self.app.set_cache_mask, "rectangle")
+            self.app.clear_cache()
+            self.assertTrue(self.app.set_cache_mask())
+
         def test_cpu_usage(self):
             self.app.start(_test_app())
             self.assertGreater(self.app.cpu_usage(0.1), 0)
@@ -155,6 +170,51 @@ if sys.platform.startswith('linux'):
             self.assertNotEqual(old_pid, new_pid)
             self.assertEqual(wspec.app, self.app)
 
+        def test_event_driven_wait(self):
+            """Test find() and exists() waiting for the AT-SPI events"""
+            wspec = self.app.Application.Panel
+            wspec.event_driven_wait = True
+            self.assertIsNotNone(wspec._get_change_notifier())
+
+            self.app.start(_test_app())
+            self.assertIsInstance(wspec.find(timeout=10), atspiwrapper.AtspiWrapper)
+            self.assertEqual(wspec.exists(), True)
+            self.assertEqual(wspec.by(name="NonExistingControl").exists(timeout=1), False)
+
+            with mock.patch.object(base_application, 'wait_until', wraps=base_application.wait_until) as wait_until:
+                self.assertEqual(wspec.wait("ready"), wspec.find())
+            # "ready" is waited for as "visible" and "enabled"
+            self.assertEqual(wait_until.call_count, 2)
+            for call in wait_until.call_args_list:
+                self.assertIs(call[1]['notifier'], wspec._get_change_notifier())
+
+        def test_resolved_elements_cache(self):
+            """Test if the calls on the same spec reuse the elements found once"""
+            self.app.start(_test_app())
+            wspec = self.app.Application.Panel
+            self.assertTrue(wspec.exists(timeout=10))
+            self.assertFalse(WindowSpecification.cache_resolved)
+
+            wspec.cache_resolved = True
+            with mock.patch.object(findwindows, 'find_element', wraps=findwindows.find_element) as find_element:
+                for _ in range(10):
+                    wspec.find()
+            self.assertEqual(find_element.call_count, 2)
+
+            self.app.kill()
+            self.assertFalse(wspec.exists(timeout=0))
+
+        def test_find_retries_resume_from_found_level(self):
+            """Test if the retries of find() don't search the found levels again"""
+            self.app.start(_test_app())
+            self.assertTrue(self.app.Application.Panel.exists(timeout=10))
+            wspec = self.app.Application.Panel.by(name="NonExistingControl")
+            with mock.patch.object(findwindows, 'find_element', wraps=findwindows.find_element) as find_element:
+                self.assertRaises(findwindows.ElementNotFoundError, wspec.find, timeout=0.5, retry_interval=0.05)
+            parents = [call[1].get('parent') for call in find_element.call_args_list]
+            self.assertTrue(len(parents) > 3)
+            self.assertEqual(1, parents.count(None))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -49,10 +49,13 @@ if sys.platform.startswith("linux"):
     from pywinauto.linux.atspi_objects import POINT
     from pywinauto.linux.atspi_objects import _AtspiCoordType
     from pywinauto.linux.atspi_element_info import AtspiElementInfo
+    from pywinauto.element_info import ElementInfo
     from pywinauto.linux.atspi_objects import IATSPI
+    from pywinauto.linux.atspi_objects import atspi_lock
     from pywinauto.linux.application import Application
     from pywinauto.linux.atspi_objects import GHashTable
     from pywinauto.linux.atspi_objects import _find_library
+    from pywinauto.findwindows import find_elements
 
 app_name = r"gtk_example.py"
 
@@ -184,6 +187,161 @@ if sys.platform.startswith("linux"):
             for child in children:
                 self.assertTrue(child.control_type in IATSPI().known_control_types.keys())
 
+        def test_iter_descendants(self):
+            """Test if iter_descendants() walks the elements in the order of descendants()"""
+            self.assertTrue(self.app_info.ordered_iter_descendants)
+            self.assertEqual(self.app_info.descendants(), list(self.app_info.iter_descendants()))
+            self.assertEqual(self.app_info.children(control_type="Frame"),
+                             list(self.app_info.iter_children(control_type="Frame")))
+
+        def test_descendants_by_criteria(self):
+            """Test if the criteria filter the descendants without pruning the walk"""
+            all_descendants = self.app_info.descendants()
+            buttons = self.app_info.descendants(control_type="PushButton")
+            self.assertNotEqual(len(buttons), 0)
+            self.assertEqual(buttons, [elem for elem in all_descendants if elem.control_type == "PushButton"])
+            # the buttons are not children of buttons, a pruned walk would miss them
+            self.assertEqual(list(ElementInfo.iter_descendants(self.app_info, control_type="PushButton")), [])
+
+            for depth in (1, 3):
+                self.assertEqual(self.app_info.descendants(control_type="PushButton", depth=depth),
+                                 [elem for elem in self.app_info.descendants(depth=depth)
+                                  if elem.control_type == "PushButton"])
+
+        def test_descendants_of_process(self):
+            """Test if the sub-trees of other processes are not walked"""
+            with mock.patch.object(AtspiAccessible, "get_child_at_index",
+                                   wraps=AtspiAccessible.get_child_at_index) as mock_get_child:
+                elements = self.desktop_info.descendants(process=self.app.process, control_type="PushButton")
+            process_elements = [self.app_info] + self.app_info.descendants()
+            self.assertEqual(elements, [elem for elem in process_elements if elem.control_type == "PushButton"])
+            # the children of the desktop and of every element of the process are read
+            self.assertEqual(mock_get_child.call_count, len(self.desktop_info.children()) + len(process_elements) - 1)
+
+        def test_cache_strategy(self):
+            """Test the cached attributes are read once and count the saved IPC calls"""
+            ipc_funcs = ["get_name", "get_role", "get_role_name", "get_state_set"]
+
+            def count_ipc_calls(cache_enable):
+                elements = self.app_info.descendants(cache_enable=cache_enable)
+                patches = [mock.patch.object(AtspiAccessible, func, wraps=getattr(AtspiAccessible, func))
+                           for func in ipc_funcs]
+                mocks = [patch.start() for patch in patches]
+                try:
+                    # the properties read by the filters of a find_elements() call
+                    for _ in range(3):
+                        for elem in elements:
+                            elem.name, elem.class_name, elem.control_type, elem.visible
+                finally:
+                    for patch in patches:
+                        patch.stop()
+                return sum(m.call_count for m in mocks)
+
+            not_cached_calls = count_ipc_calls(cache_enable=False)
+            cached_calls = count_ipc_calls(cache_enable=True)
+            print("IPC calls: {0} not cached, {1} cached".format(not_cached_calls, cached_calls))
+            self.assertLess(cached_calls * 2, not_cached_calls)
+
+        def test_cache_refresh(self):
+            """Test refresh() and invalidate() of the cached attributes"""
+            frame_info = AtspiElementInfo(self.app_info.children()[0].handle, cache_enable=True)
+            name = frame_info.name
+            with mock.patch.object(AtspiAccessible, 'get_name') as mock_get_name:
+                mock_get_name.return_value = b"New name"
+                self.assertEqual(frame_info.name, name)
+                frame_info.invalidate("name")
+                self.assertEqual(frame_info.name, "New name")
+                mock_get_name.return_value = b"Other name"
+                frame_info.refresh()
+                self.assertEqual(mock_get_name.call_count, 2)
+                self.assertEqual(frame_info.name, "Other name")
+                frame_info.set_cache_strategy(cached=False)
+                frame_info.name
+                self.assertEqual(mock_get_name.call_count, 3)
+
+        def test_cache_mask(self):
+            """Test the libatspi cache mask of the application and clearing the cache"""
+            with mock.patch.object(AtspiAccessible, "set_cache_mask") as mock_set_cache_mask:
+                self.assertTrue(self.app_info.set_cache_mask("name", "role"))
+                mock_set_cache_mask.assert_called_once_with(self.app_info.handle, (1 << 2) | (1 << 5))
+                self.assertTrue(self.app_info.set_cache_mask())
+                mock_set_cache_mask.assert_called_with(self.app_info.handle, 0)
+            self.assertRaises(ValueError, self.app_info.set_cache_mask, "class_name")
+
+            frame_info = AtspiElementInfo(self.app_info.children()[0].handle, cache_enable=True)
+            with mock.patch.object(AtspiAccessible, "clear_cache") as mock_clear_cache:
+                frame_info.refresh()
+                frame_info.invalidate("name")
+                self.assertEqual(mock_clear_cache.call_count, 2)
+
+        def toggle_check_box(self):
+            """Toggle "Button 1" of the application, it sends the state-changed events"""
+            check_box = [elem for elem in self.app_info.descendants(control_type="CheckBox")
+                         if elem.name == "Button 1"][0]
+            check_box.get_action().do_action_by_name("click")
+
+        def test_change_notifier_of_process(self):
+            """Test if the notifier of a process is signalled by the events of its applications only"""
+            notifier = AtspiElementInfo.get_change_notifier(self.app.process)
+            self.assertIsNotNone(notifier)
+            self.assertIs(notifier, AtspiElementInfo.get_change_notifier(self.app.process))
+            self.assertIsNot(notifier, AtspiElementInfo.get_change_notifier())
+            # no applications of the process
+            other_notifier = AtspiElementInfo.get_change_notifier(-1)
+
+            version, other_version = notifier.version, other_notifier.version
+            self.toggle_check_box()
+            self.assertTrue(notifier.wait(version, 5))
+            time.sleep(0.5)
+            self.assertEqual(other_notifier.version, other_version)
+
+        def test_event_loop_thread_safety(self):
+            """Test if the events aren't dispatched during the libatspi calls of another thread"""
+            notifier = AtspiElementInfo.get_change_notifier(self.app.process)
+            with atspi_lock:
+                version = notifier.version
+                self.toggle_check_box()
+                self.assertFalse(notifier.wait(version, 0.5))
+            self.assertTrue(notifier.wait(version, 5))
+
+            # the walks are not disturbed by the events dispatched in parallel
+            descendants = self.app_info.descendants()
+            for _ in range(5):
+                self.toggle_check_box()
+                self.assertEqual(self.app_info.descendants(), descendants)
+
+        def test_query_descendants(self):
+            """Test if the Collection matches are the elements of descendants()"""
+            for props in [dict(control_type="PushButton"), dict(control_type="Frame", class_name="Frame"),
+                          dict(control_type="Label", pid=self.app.process)]:
+                elements = self.app_info.query_descendants(props)
+                if elements is not None:
+                    self.assertEqual(list(elements), self.app_info.descendants(
+                        control_type=props.get("control_type"), class_name=props.get("class_name"),
+                        process=props.get("pid")))
+            self.assertEqual(self.app_info.query_descendants(dict(name="Frame")), None)
+            self.assertEqual(self.app_info.query_descendants(dict(control_type="Application")), None)
+            self.assertEqual(list(self.desktop_info.query_descendants(dict(control_type="PushButton",
+                                                                          pid=self.app.process))),
+                             self.desktop_info.descendants(control_type="PushButton", process=self.app.process))
+
+        def test_find_elements_by_collection(self):
+            """Benchmark find_elements() with and without the Collection interface"""
+            def search():
+                start = time.time()
+                with mock.patch.object(AtspiAccessible, "get_child_at_index",
+                                       wraps=AtspiAccessible.get_child_at_index) as mock_get_child:
+                    elements = find_elements(backend="atspi", top_level_only=False, control_type="PushButton")
+                return elements, time.time() - start, mock_get_child.call_count
+
+            elements, query_time, query_calls = search()
+            with mock.patch.object(AtspiElementInfo, "query_descendants", return_value=None):
+                walked_elements, walk_time, walk_calls = search()
+            print("find_elements: {0:.3f}s and {1} children read by Collection, "
+                  "{2:.3f}s and {3} children read by walking".format(query_time, query_calls, walk_time, walk_calls))
+            self.assertEqual(elements, walked_elements)
+            self.assertLess(query_calls, walk_calls)
+
         def test_control_type_equal_class_name(self):
             children = self.app_info.descendants()
             self.assertNotEqual(len(children), 0)
@@ -271,6 +429,21 @@ if sys.platform.startswith("linux"):
             self.assertNotEqual(d[frame_info1], d[frame_info2])
             self.assertEqual(d[frame_info2], d[frame_info2])
 
+        def test_identity(self):
+            """Test the elements are compared and hashed by the bus name and the object path"""
+            elements = self.app_info.descendants()
+            with mock.patch.object(AtspiAccessible, 'get_component') as mock_get_component:
+                same_elements = self.app_info.descendants()
+                self.assertEqual(elements, same_elements)
+                self.assertEqual(set(elements), set(same_elements))
+                self.assertEqual(len(set(elements)), len(elements))
+                self.assertEqual(same_elements.index(elements[-1]), len(elements) - 1)
+                self.assertEqual(mock_get_component.call_count, 0)
+
+            bus_name, path = AtspiAccessible.get_identity(self.app_info.handle)
+            self.assertNotEqual(bus_name, None)
+            self.assertNotEqual(path, None)
+
     class AtspiElementInfoWithoutChildrenMockedTests(unittest.TestCase):
 
         """Mocked unit tests for the AtspiElementInfo without children"""
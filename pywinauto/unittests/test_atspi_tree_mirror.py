@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+# GUI Application automation and testing library
+# Copyright (C) 2006-2019 Mark Mc Mahon and Contributors
+# https://github.com/pywinauto/pywinauto/graphs/contributors
+# http://pywinauto.readthedocs.io/en/latest/credits.html
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of pywinauto nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Tests for Linux AtspiTreeMirror"""
+
+import os
+import sys
+import time
+import unittest
+import mock
+
+if sys.platform.startswith("linux"):
+    sys.path.append(".")
+    from pywinauto.linux.atspi_objects import AtspiAccessible
+    from pywinauto.linux.atspi_element_info import AtspiElementInfo
+    from pywinauto.linux.atspi_tree_mirror import AtspiTreeMirror
+    from pywinauto.linux.atspi_tree_mirror import MirrorElementInfo
+    from pywinauto.linux.application import Application
+    from pywinauto.findwindows import find_elements
+
+app_name = r"gtk_example.py"
+
+
+def _test_app():
+    test_folder = os.path.join(os.path.dirname
+                               (os.path.dirname
+                                (os.path.dirname
+                                 (os.path.abspath(__file__)))),
+                               r"apps/Gtk_samples")
+    sys.path.append(test_folder)
+    return os.path.join(test_folder, app_name)
+
+
+if sys.platform.startswith("linux"):
+    class AtspiTreeMirrorTests(unittest.TestCase):
+
+        """Unit tests for the AtspiTreeMirror class"""
+
+        def setUp(self):
+            self.app = Application()
+            self.app.start(_test_app())
+            time.sleep(3)
+            self.desktop_info = AtspiElementInfo()
+            self.mirror = AtspiTreeMirror(self.app.process)
+            self.assertTrue(self.mirror.start())
+
+        def tearDown(self):
+            self.mirror.stop()
+            self.app.kill()
+
+        def get_live_descendants(self):
+            """Return the application elements and their descendants walked through libatspi"""
+            elements = []
+            for app_info in self.desktop_info.children():
+                if app_info.process_id == self.app.process:
+                    elements.append(app_info)
+                    elements.extend(app_info.descendants(process=self.app.process))
+            return elements
+
+        def test_mirror_equals_live_tree(self):
+            """Test if the searches in the process walk the mirror of the live tree"""
+            elements = self.desktop_info.descendants(process=self.app.process)
+            self.assertNotEqual(len(elements), 0)
+            self.assertTrue(all([isinstance(elem, MirrorElementInfo) for elem in elements]))
+            self.assertEqual(elements, self.get_live_descendants())
+            self.assertEqual(elements[2].parent, self.get_live_descendants()[2].parent)
+            self.assertEqual(find_elements(backend="atspi", top_level_only=False, pid=self.app.process,
+                                           control_type="PushButton"),
+                             [elem for elem in elements if elem.control_type == "PushButton"])
+
+        def test_search_without_ipc(self):
+            """Test find_elements() in the mirror doesn't read the children through libatspi"""
+            def search():
+                with mock.patch.object(AtspiAccessible, "get_child_at_index",
+                                       wraps=AtspiAccessible.get_child_at_index) as mock_get_child:
+                    elements = find_elements(backend="atspi", top_level_only=False, pid=self.app.process,
+                                             control_type="PushButton")
+                return elements, mock_get_child.call_count
+
+            search()
+            elements, mirror_calls = search()
+            self.mirror.stop()
+            live_elements, live_calls = search()
+            self.assertEqual(elements, live_elements)
+            self.assertEqual(mirror_calls, 0)
+            self.assertNotEqual(live_calls, 0)
+
+        def test_sync_once_per_search(self):
+            """Test the replica is synced at the start of a search only, not during the walk"""
+            bus_name, _ = AtspiAccessible.get_identity(self.desktop_info.children(process=self.app.process)[0].handle)
+            with mock.patch.object(self.mirror, "sync", wraps=self.mirror.sync) as mock_sync:
+                elements = self.desktop_info.descendants(process=self.app.process)
+                self.assertEqual(mock_sync.call_count, 1)
+
+                resync_count = self.mirror.resync_count
+                walked = []
+                for elem in self.desktop_info.iter_descendants(process=self.app.process):
+                    walked.append(elem)
+                    # the change of an unknown element is applied by the next search
+                    self.mirror._on_event("object:children-changed:add", (bus_name, "/not/mirrored"))
+                self.assertEqual(walked, elements)
+                self.assertEqual(mock_sync.call_count, 2)
+                self.assertEqual(self.mirror.resync_count, resync_count)
+
+            self.desktop_info.children(process=self.app.process)
+            self.assertEqual(self.mirror.resync_count, resync_count + 1)
+
+        def test_search_from_mirrored_parent(self):
+            """Test a search from a resolved element of the mirror applies the queued events"""
+            frame = self.desktop_info.children(process=self.app.process)[0].children()[0]
+            identity = AtspiAccessible.get_identity(frame.handle)
+            node = self.mirror.get_node(identity)
+            child = MirrorElementInfo(self.mirror, node.children[-1])
+            # the child is added after the frame is resolved
+            node.children = node.children[:-1]
+            self.assertNotIn(child, frame.children())
+
+            self.mirror._on_event("object:children-changed:add", identity)
+            self.assertIn(child, find_elements(backend="atspi", parent=frame, top_level_only=False))
+            self.assertIn(child, frame.children())
+
+        def test_name_change_event(self):
+            """Test the mirrored name is updated by the event"""
+            elements = self.desktop_info.descendants(process=self.app.process, cache_enable=True)
+            names = [elem.name for elem in elements]
+            elem = elements[1]
+            name = names[1]
+            with mock.patch.object(AtspiAccessible, "get_name") as mock_get_name:
+                mock_get_name.return_value = b"New name"
+                self.assertEqual(elem.name, name)
+                self.mirror._on_event("object:property-change:accessible-name",
+                                      AtspiAccessible.get_identity(elem.handle))
+                self.assertEqual(self.desktop_info.descendants(process=self.app.process, name="New name",
+                                                               cache_enable=True), [elem])
+
+        def test_stale_mirror_resync(self):
+            """Test the mirror is resynced after the change of an unknown element or too many events"""
+            bus_name, _ = AtspiAccessible.get_identity(self.desktop_info.children(process=self.app.process)[0].handle)
+            resync_count = self.mirror.resync_count
+            self.mirror._on_event("object:children-changed:add", (bus_name, "/not/mirrored"))
+            self.desktop_info.children(process=self.app.process)
+            self.assertEqual(self.mirror.resync_count, resync_count + 1)
+
+            self.mirror.max_pending_events = 0
+            self.mirror._on_event("object:state-changed:showing", (bus_name, "/not/mirrored"))
+            self.assertTrue(self.mirror.stale)
+            self.desktop_info.children(process=self.app.process)
+            self.assertFalse(self.mirror.stale)
+            self.assertEqual(self.mirror.resync_count, resync_count + 2)
+
+        def test_application_tree_mirror(self):
+            """Test the tree mirror of the Application"""
+            self.mirror.stop()
+            self.assertTrue(self.app.start_tree_mirror())
+            self.assertIsInstance(self.app.Application.find().element_info, MirrorElementInfo)
+            self.app.stop_tree_mirror()
+            self.assertNotIsInstance(self.app.Application.find().element_info, MirrorElementInfo)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+# GUI Application automation and testing library
+# Copyright (C) 2006-2018 Mark Mc Mahon and Contributors
+# https://github.com/pywinauto/pywinauto/graphs/contributors
+# http://pywinauto.readthedocs.io/en/latest/credits.html
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of pywinauto nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Tests for the backend independent part of ElementInfo"""
+import unittest
+import sys
+
+sys.path.append(".")
+from pywinauto.element_info import ElementInfo
+
+
+class _Node(object):
+
+    """A node of a synthetic tree"""
+
+    def __init__(self, name, parent=None):
+        self.name = name
+        self.parent = parent
+        self.children = []
+
+
+class _CountingElementInfo(ElementInfo):
+
+    """An element of a synthetic tree counting the fetched nodes"""
+
+    def __init__(self, node, visited):
+        self._node = node
+        self._visited = visited
+
+    def __eq__(self, other):
+        return isinstance(other, _CountingElementInfo) and self._node is other._node
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return id(self._node)
+
+    @property
+    def name(self):
+        return self._node.name
+
+    @property
+    def control_id(self):
+        return id(self._node)
+
+    @property
+    def parent(self):
+        if self._node.parent is None:
+            return None
+        return _CountingElementInfo(self._node.parent, self._visited)
+
+    def iter_children(self, **kwargs):
+        for child in self._node.children:
+            self._visited.append(child)
+            yield _CountingElementInfo(child, self._visited)
+
+    def children(self, **kwargs):
+        return list(self.iter_children(**kwargs))
+
+
+class DepthBoundTests(unittest.TestCase):
+
+    """Check that the depth limits the walk through a deep tree"""
+
+    levels = 200
+    width = 3
+
+    def setUp(self):
+        """Build a chain of the levels with a few leaves on every level"""
+        self.root = _Node("root")
+        self.depths = {}
+        node = self.root
+        for level in range(1, self.levels + 1):
+            for i in range(self.width):
+                leaf = _Node("leaf {0} {1}".format(level, i), node)
+                node.children.append(leaf)
+                self.depths[leaf] = level
+            node = node.children[0]
+        self.visited = []
+        self.element = _CountingElementInfo(self.root, self.visited)
+
+    def test_nodes_below_depth_are_not_visited(self):
+        """Make sure only the nodes within the depth are fetched"""
+        for depth in (1, 2, 5, 50):
+            del self.visited[:]
+            self.element.descendants(depth=depth)
+            self.assertEqual(len(self.visited), depth * self.width)
+            self.assertTrue(all(self.depths[node] <= depth for node in self.visited))
+
+    def test_depth_filters_as_the_full_walk(self):
+        """Make sure the bounded walk finds the same elements as the full one"""
+        all_nodes = [elem._node for elem in self.element.descendants()]
+        self.assertEqual(len(self.visited), self.levels * self.width)
+        for depth in (1, 3, 10, self.levels, self.levels + 1):
+            expected = [node for node in all_nodes if self.depths[node] <= depth]
+            found = [elem._node for elem in self.element.descendants(depth=depth)]
+            self.assertEqual(found, expected)
+
+    def test_iter_descendants_stops_early(self):
+        """Make sure iter_descendants fetches nodes only on demand"""
+        descendants = self.element.iter_descendants(depth=self.levels)
+        for _ in range(10):
+            next(descendants)
+        self.assertEqual(len(self.visited), 10)
+
+    def test_wrong_depth(self):
+        """Make sure a wrong depth raises before the walk"""
+        for depth in (0, -1, 1.5):
+            self.assertRaises(Exception, self.element.descendants, depth=depth)
+        self.assertEqual(self.visited, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -32,13 +32,16 @@
 """Tests for findbestmatch.py"""
 
 import unittest
+import difflib
 import os.path
+import threading
 
 test_path = os.path.split(__file__)[0]
 
 import sys
 sys.path.append(".")
 from pywinauto import findbestmatch
+from pywinauto import similarity
 from pywinauto.windows import win32structures
 
 
@@ -69,12 +72,464 @@ class TestFindBestMatch(unittest.TestCase):
         self.assertEqual('', result)
 
 
+class TestRatioCache(unittest.TestCase):
+
+    """Unit tests for the bounded cache of match ratios"""
+
+    def test_symmetric_lookup(self):
+        """A ratio is found for both orders of the texts"""
+        cache = findbestmatch.RatioCache()
+        cache.put("abc", "abd", .5)
+        self.assertEqual(.5, cache.get("abc", "abd"))
+        self.assertEqual(.5, cache.get("abd", "abc"))
+        self.assertEqual(None, cache.get("abc", "xyz"))
+        self.assertEqual({'size': 1, 'capacity': 10000, 'hits': 2, 'misses': 1, 'evictions': 0},
+                         cache.stats())
+
+    def test_lru_eviction(self):
+        """The least recently used ratios are evicted first"""
+        cache = findbestmatch.RatioCache(capacity=2)
+        cache.put("a", "1", .1)
+        cache.put("b", "1", .2)
+        cache.get("a", "1")
+        cache.put("c", "1", .3)
+        self.assertEqual(2, len(cache))
+        self.assertEqual(1, cache.evictions)
+        self.assertEqual(None, cache.get("b", "1"))
+        self.assertEqual(.1, cache.get("a", "1"))
+
+        cache.capacity = 1
+        self.assertEqual(1, len(cache))
+        self.assertEqual(2, cache.evictions)
+
+    def test_clear(self):
+        """Clearing drops the ratios and the counters"""
+        cache = findbestmatch.RatioCache()
+        cache.put("a", "b", 0)
+        cache.get("a", "b")
+        cache.clear()
+        self.assertEqual(0, len(cache))
+        self.assertEqual(0, cache.hits)
+
+    def test_threads(self):
+        """The cache stays bounded when used from several threads"""
+        cache = findbestmatch.RatioCache(capacity=100)
+
+        def worker(n):
+            for i in range(1000):
+                cache.put(str(n), str(i), i)
+                cache.get(str(i), str(n))
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(100, len(cache))
+        self.assertEqual(4000, cache.hits + cache.misses)
+        self.assertEqual(3900, cache.evictions)
+
+
+class TestUniqueDictTrigramIndex(unittest.TestCase):
+
+    """Check UniqueDict.find_best_matches gives the same results with the trigram index"""
+
+    def setUp(self):
+        """Build a dictionary large enough to be indexed"""
+        self.min_keys = findbestmatch.trigram_index_min_keys
+        self.names = findbestmatch.UniqueDict()
+        for i in range(300):
+            self.names["Item{0}Edit".format(i)] = i
+            self.names["Item {0}".format(i)] = i
+        self.names["OKButton"] = "ok"
+        self.names["CancelButton"] = "cancel"
+        self.names["Static"] = "static"
+
+    def tearDown(self):
+        """Restore the index settings"""
+        findbestmatch.trigram_index_min_keys = self.min_keys
+        findbestmatch.ratio_cache.clear()
+
+    def _find_best_matches(self, min_keys, *args):
+        """Find the best matches with a clean cache and the specified index settings"""
+        findbestmatch.ratio_cache.clear()
+        findbestmatch.trigram_index_min_keys = min_keys
+        return self.names.find_best_matches(*args)
+
+    def test_same_results(self):
+        """Indexed lookups must return the same ratio and the same ties"""
+        for search_text in ["OKButton", "okbutton", "Cancle", "Item 15Edit", "Item2", "Stat", "qwerty", ""]:
+            for clean in (False, True):
+                for ignore_case in (False, True):
+                    self.assertEqual(
+                        self._find_best_matches(None, search_text, clean, ignore_case),
+                        self._find_best_matches(1, search_text, clean, ignore_case))
+
+    def test_pruning(self):
+        """Only a few ratios are calculated for an exact match"""
+        self._find_best_matches(1, "OKButton")
+        self.assertLess(len(findbestmatch.ratio_cache), len(self.names) // 10)
+
+    def test_variant_matches_pruning(self):
+        """The single pass over the variants calculates fewer ratios with the index"""
+        counts = {None: 0, 1: 0}
+        for search_text in ["okbutton", "Item 15Edit", "item 150 edit", "Itme 42", "qwerty"]:
+            results = []
+            for min_keys in (None, 1):
+                findbestmatch.ratio_cache.clear()
+                findbestmatch.trigram_index_min_keys = min_keys
+                results.append(self.names.find_best_variant_matches(search_text))
+                # every calculated ratio is put to the cache
+                counts[min_keys] += len(findbestmatch.ratio_cache)
+            self.assertEqual(results[0], results[1])
+        self.assertLess(counts[1], counts[None] * 4 // 5)
+
+    def test_index_invalidation(self):
+        """The index is rebuilt after the dictionary is changed"""
+        self.assertEqual((0, []), self._find_best_matches(1, "BrandNewName"))
+        self.names["BrandNewName"] = "new"
+        self.assertEqual((1.0, ["BrandNewName"]), self._find_best_matches(1, "BrandNewName"))
+
+
+class TestUniqueDictVariantMatches(unittest.TestCase):
+
+    """Check find_best_variant_matches against separate find_best_matches calls"""
+
+    def setUp(self):
+        """Build a dictionary with cleaned and not cleaned names"""
+        self.names = findbestmatch.UniqueDict()
+        for i in range(100):
+            self.names["Item{0}Edit".format(i)] = i
+            self.names["Item #{0}".format(i)] = i
+        self.names["OK"] = "ok"
+        self.names["&Ok Button"] = "ok_button"
+        self.names["Cancel"] = "cancel"
+
+    def tearDown(self):
+        """Clear the cache of ratios"""
+        findbestmatch.ratio_cache.clear()
+
+    def _find_best_matches(self, search_text):
+        """Combine the variants the same way as find_best_control_matches did"""
+        best_ratio, best_texts = 0, []
+        for clean, ignore_case in findbestmatch._match_variants:
+            findbestmatch.ratio_cache.clear()
+            ratio, texts = self.names.find_best_matches(search_text, clean, ignore_case)
+            if ratio > best_ratio:
+                best_ratio, best_texts = ratio, texts
+        return best_ratio, best_texts
+
+    def test_same_results(self):
+        """The single pass gives the same ratio and the same ties"""
+        for search_text in ["OK", "ok", "OkButton", "Item #5", "item5", "item 15 edit", "Cancle", "q", ""]:
+            findbestmatch.ratio_cache.clear()
+            self.assertEqual(self._find_best_matches(search_text),
+                             self.names.find_best_variant_matches(search_text))
+
+    def test_cached_ratios(self):
+        """Ratios are reused from the cache on the next lookup"""
+        result = self.names.find_best_variant_matches("Itm #5")
+        hits = findbestmatch.ratio_cache.hits
+        self.assertEqual(result, self.names.find_best_variant_matches("Itm #5"))
+        self.assertGreater(findbestmatch.ratio_cache.hits, hits)
+
+
+class TestVariantMatchesRatioCount(unittest.TestCase):
+
+    """Compare the ratios calculated by the single pass and by the four separate lookups"""
+
+    def setUp(self):
+        """Build the names of a dialog with 2000 controls scored without the indexes"""
+        self.min_keys = findbestmatch.trigram_index_min_keys
+        findbestmatch.trigram_index_min_keys = None
+        self.names = findbestmatch.UniqueDict()
+        for i in range(2000):
+            self.names["Item{0}Edit".format(i)] = i
+            self.names["&Item #{0} Button".format(i)] = i
+            self.names["Label {0}:".format(i)] = i
+
+    def tearDown(self):
+        """Restore the index settings"""
+        findbestmatch.trigram_index_min_keys = self.min_keys
+        findbestmatch.ratio_cache.clear()
+
+    def _find_best_matches(self, search_text):
+        """Score the keys for each variant as find_best_control_matches did before"""
+        best_ratio, best_texts = 0, []
+        for clean, ignore_case in findbestmatch._match_variants:
+            ratio, texts = self.names.find_best_matches(search_text, clean, ignore_case)
+            if ratio > best_ratio:
+                best_ratio, best_texts = ratio, texts
+        return best_ratio, best_texts
+
+    def _count_ratios(self, find, search_text):
+        """Return the result of the lookup and the number of calculated ratios"""
+        findbestmatch.ratio_cache.clear()
+        result = find(search_text)
+        # every calculated ratio is put to the cache
+        return result, len(findbestmatch.ratio_cache)
+
+    def test_fewer_ratios(self):
+        """The single pass gives the same results calculating 10 times fewer ratios"""
+        for search_text in ["item 15 edit", "Item #1999 Buton", "label 77"]:
+            old_result, old_count = self._count_ratios(self._find_best_matches, search_text)
+            new_result, new_count = self._count_ratios(self.names.find_best_variant_matches, search_text)
+            self.assertEqual(old_result, new_result)
+            self.assertLess(new_count * 10, old_count)
+
+
+class TestUniqueDictShortCircuits(unittest.TestCase):
+
+    """Check the exact match and the length bound short-circuits on 10k keys"""
+
+    def setUp(self):
+        """Build a dictionary of 10000 names of different lengths"""
+        self.min_keys = findbestmatch.trigram_index_min_keys
+        findbestmatch.trigram_index_min_keys = None
+        self.names = findbestmatch.UniqueDict()
+        for i in range(10000):
+            self.names["Item{0}".format(i) + "Edit" * (i % 7)] = i
+        findbestmatch.ratio_cache.clear()
+
+    def tearDown(self):
+        """Restore the index settings"""
+        findbestmatch.trigram_index_min_keys = self.min_keys
+        findbestmatch.ratio_cache.clear()
+
+    def _find_all_best_matches(self, search_text):
+        """Calculate the ratios of all the keys"""
+        ratios = [(difflib.SequenceMatcher(None, search_text, key).ratio(), key) for key in self.names]
+        best_ratio = max(ratios)[0]
+        return best_ratio, [key for ratio, key in ratios if ratio == best_ratio]
+
+    def test_exact_match(self):
+        """No ratio is calculated for a key in the dictionary"""
+        self.assertEqual((1.0, ["Item44EditEdit"]), self.names.find_best_matches("Item44EditEdit"))
+        self.assertEqual((1.0, ["Item44EditEdit"]), self.names.find_best_variant_matches("Item44EditEdit"))
+        self.assertEqual(0, len(findbestmatch.ratio_cache))
+
+    def test_length_bound(self):
+        """Only the keys of close lengths are scored"""
+        for search_text in ["Item42EdiEdit", "Item9999EditEditEditEditEdt", "Item1234"]:
+            findbestmatch.ratio_cache.clear()
+            self.assertEqual(self._find_all_best_matches(search_text), self.names.find_best_matches(search_text))
+            # every calculated ratio is put to the cache
+            self.assertLess(len(findbestmatch.ratio_cache), len(self.names) // 2)
+
+    def test_length_bound_variants(self):
+        """The single pass over the variants skips the ratios of most keys"""
+        for search_text in ["Item42EdiEdit", "item9999editediteditedt", "Item77Edt", "qwerty"]:
+            best_ratio, best_texts = 0, []
+            for clean, ignore_case in findbestmatch._match_variants:
+                ratio, texts = self.names.find_best_matches(search_text, clean, ignore_case)
+                if ratio > best_ratio:
+                    best_ratio, best_texts = ratio, texts
+
+            findbestmatch.ratio_cache.clear()
+            self.assertEqual((best_ratio, best_texts), self.names.find_best_variant_matches(search_text))
+            self.assertLess(len(findbestmatch.ratio_cache), len(self.names) // 50)
+
+
+class TestScorers(unittest.TestCase):
+
+    """Check the lookups with a scorer other than SequenceMatcher"""
+
+    def setUp(self):
+        """Build a dictionary of names"""
+        self.names = findbestmatch.UniqueDict()
+        for name in ["OKButton", "CancelButton", "&Help", "Edit", "Edit2"]:
+            self.names[name] = name
+
+    def tearDown(self):
+        """Restore the default scorer"""
+        similarity.set_default_scorer('difflib')
+
+    def test_find_best_match(self):
+        """find_best_match accepts a scorer"""
+        texts = ["Open", "Save As", "Close"]
+        self.assertEqual("Save As", findbestmatch.find_best_match("Save as", texts, texts, scorer='levenshtein'))
+        self.assertRaises(findbestmatch.MatchError,
+                          findbestmatch.find_best_match, "Print", texts, texts, scorer='levenshtein')
+
+    def test_find_best_matches(self):
+        """UniqueDict lookups with a scorer apply the same normalizations"""
+        scorer = similarity.get_scorer('levenshtein')
+        self.assertEqual((1.0, ["OKButton"]), self.names.find_best_matches("OKButton", scorer=scorer))
+        ratio, texts = self.names.find_best_matches("help", clean=True, ignore_case=True, scorer=scorer)
+        self.assertAlmostEqual(.81, ratio)
+        self.assertEqual(["&Help"], texts)
+        self.assertEqual((0, []), self.names.find_best_variant_matches("qwerty", scorer))
+
+    def test_default_scorer(self):
+        """The default scorer is used for the lookups"""
+        similarity.set_default_scorer('levenshtein')
+        self.assertEqual((1.0, ["Edit2"]), self.names.find_best_variant_matches("Edit2"))
+        ratio, texts = self.names.find_best_variant_matches("Edt")
+        self.assertEqual(["Edit"], texts)
+        self.assertAlmostEqual(similarity.get_scorer().ratio("Edt", "Edit"), ratio)
+
+
 class DummyCtrl():
     def __init__(self, l, t, r, b):
         self.rect = win32structures.RECT(l, t, r, b)
     def rectangle(self):
         return self.rect
 
+
+class DummyTextCtrl(DummyCtrl):
+    def __init__(self, class_name, text, l, t, r, b):
+        DummyCtrl.__init__(self, l, t, r, b)
+        self.class_name = class_name
+        self.text = text
+        self.rectangle_calls = 0
+    def rectangle(self):
+        self.rectangle_calls += 1
+        return self.rect
+    def friendly_class_name(self):
+        return self.class_name
+    def window_text(self):
+        return self.text
+    def is_visible(self):
+        return True
+
+
+def _create_label_column(rows=50):
+    """Create a column of labels and edits with the properties used by build_unique_dict"""
+    ctrls = []
+    for row in range(rows):
+        top = row * 30
+        label = DummyTextCtrl("Static", "Label{0}".format(row), 0, top, 80, top + 20)
+        edit = DummyTextCtrl("Edit", "", 90, top, 190, top + 20)
+        label.can_be_label, edit.can_be_label = True, False
+        label.has_title = edit.has_title = True
+        label.texts = edit.texts = lambda: []
+        ctrls.extend([label, edit])
+    return ctrls
+
+
+class TestLabelIndex(unittest.TestCase):
+
+    """Unit tests for the names of non text controls found by LabelIndex"""
+
+    def setUp(self):
+        """Create a grid of labels and edits"""
+        self.ctrls = []
+        for row in range(10):
+            for col in range(10):
+                left, top = col * 200, row * 30
+                self.ctrls.append(DummyTextCtrl("Static", "Label{0}_{1}".format(row, col),
+                                                left, top, left + 80, top + 20))
+                self.ctrls.append(DummyTextCtrl("Edit", "", left + 90, top, left + 190, top + 20))
+        self.text_ctrls = [ctrl for ctrl in self.ctrls if ctrl.text]
+
+    def _get_closest_name(self, ctrl):
+        """Find the closest text control by checking all of them"""
+        best_name, _ = findbestmatch._get_closest_text_name(
+            ctrl.rect, ctrl.friendly_class_name(), self.text_ctrls, [c.rect for c in self.text_ctrls])
+        return best_name
+
+    def test_same_names(self):
+        """The closest label is the same as with the full scan"""
+        label_index = findbestmatch.LabelIndex(self.ctrls, self.text_ctrls)
+        for ctrl in self.ctrls[1::2]:
+            names = findbestmatch.get_non_text_control_name(ctrl, self.ctrls, self.text_ctrls, label_index)
+            self.assertEqual(self._get_closest_name(ctrl), names[-1])
+            self.assertIn(self.ctrls[self.ctrls.index(ctrl) - 1].text + "Edit", names)
+
+    def test_no_label(self):
+        """No label is found for a control above all the text controls"""
+        ctrl = DummyTextCtrl("Edit", "", 0, -100, 50, -80)
+        self.assertEqual([''], findbestmatch.get_non_text_control_name(ctrl, [ctrl], self.text_ctrls))
+
+    def test_rectangles_retrieved_once(self):
+        """build_unique_dict gets the rectangle of each control only once"""
+        for ctrl in self.ctrls:
+            ctrl.can_be_label = ctrl.class_name == "Static"
+            ctrl.has_title = True
+        name_control_map = findbestmatch.build_unique_dict(self.ctrls)
+        self.assertIs(self.ctrls[1], name_control_map["Label0_0Edit"])
+        self.assertEqual([1], list(set(ctrl.rectangle_calls for ctrl in self.ctrls)))
+
+
+class TestControlSnapshot(unittest.TestCase):
+
+    """Unit tests for the snapshot of the control properties"""
+
+    def setUp(self):
+        """Create a column of labels and edits"""
+        self.ctrls = _create_label_column()
+
+    def test_values_are_kept(self):
+        """A property is retrieved only once"""
+        ctrl = self.ctrls[0]
+        snapshot = findbestmatch.ControlSnapshot(ctrl)
+        fetch_count = findbestmatch.ControlSnapshot.fetch_count
+        self.assertEqual("Label0", snapshot.window_text())
+        ctrl.text = "Changed"
+        self.assertEqual("Label0", snapshot.window_text())
+        self.assertEqual(fetch_count + 1, findbestmatch.ControlSnapshot.fetch_count)
+        self.assertIs(ctrl, snapshot.control)
+
+    def test_linear_fetch_count(self):
+        """build_unique_dict retrieves not more than 7 properties per control"""
+        fetch_count = findbestmatch.ControlSnapshot.fetch_count
+        name_control_map = findbestmatch.build_unique_dict(self.ctrls)
+        self.assertIs(self.ctrls[-1], name_control_map["Label49Edit"])
+        self.assertLessEqual(findbestmatch.ControlSnapshot.fetch_count - fetch_count, 7 * len(self.ctrls))
+
+
+class TestTopKMatches(unittest.TestCase):
+
+    """Unit tests for the k best matches of the control names"""
+
+    def setUp(self):
+        """Create a column of labels and edits"""
+        self.ctrls = _create_label_column()
+
+    def tearDown(self):
+        """Clear the cache of ratios"""
+        findbestmatch.ratio_cache.clear()
+
+    def test_runner_ups(self):
+        """The best match is followed by the runner-up names"""
+        matches = findbestmatch.find_best_control_matches_topk("label7edit", self.ctrls, 3)
+        self.assertEqual(3, len(matches))
+        name, ratio, variant, ctrl = matches[0]
+        self.assertEqual(("Label7Edit", .9, "ignore_case"), (name, ratio, variant))
+        self.assertIs(self.ctrls[15], ctrl)
+        self.assertEqual([ctrl], findbestmatch.find_best_control_matches("label7edit", self.ctrls))
+        ratios = [match[1] for match in matches]
+        self.assertEqual(sorted(ratios, reverse=True), ratios)
+
+    def test_same_as_full_sort(self):
+        """The heap gives the same candidates as sorting all the names"""
+        name_control_map = findbestmatch.build_unique_dict(self.ctrls)
+        scorer = similarity.get_scorer()
+        for search_text in ["Label1", "label 12 edit", "Edit", "qwerty", ""]:
+            ratios = []
+            for name in name_control_map:
+                ratio = 0
+                for clean, ignore_case in findbestmatch._match_variants:
+                    text = findbestmatch._clean_non_chars(name) if clean else name
+                    search = search_text
+                    if ignore_case:
+                        text, search = text.lower(), search.lower()
+                    offset = findbestmatch._get_ratio_offset(clean, ignore_case)
+                    ratio = max(ratio, scorer.ratio(search, text) * offset)
+                ratios.append((name, ratio))
+            ratios.sort(key=lambda name_ratio: name_ratio[1], reverse=True)
+
+            top = name_control_map.find_best_topk(search_text, 5)
+            self.assertEqual(ratios[:5], [(name, ratio) for name, ratio, _ in top])
+
+    def test_below_cutoff(self):
+        """Names below the cutoff are returned also"""
+        matches = findbestmatch.find_best_control_matches_topk("qwerty", self.ctrls, 2)
+        self.assertEqual(2, len(matches))
+        self.assertTrue(all(match[1] < findbestmatch.find_best_control_match_cutoff for match in matches))
+        self.assertEqual([], findbestmatch.find_best_control_matches_topk("qwerty", self.ctrls, 0))
+
+
 class TestIsAboveOrToLeft(unittest.TestCase):
     def testSameRect(self):
         "both rectangles are the same so false"
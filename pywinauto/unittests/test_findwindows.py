@@ -33,12 +33,16 @@
 from __future__ import print_function
 
 import unittest
+import warnings
 
 import sys, os
 sys.path.append(".")
 from pywinauto.windows.application import Application
 from pywinauto.sysinfo import is_x64_Python
 from pywinauto.findwindows import find_window, find_windows
+from pywinauto.findwindows import find_element, find_elements, Criteria
+from pywinauto.findwindows import ElementAmbiguousError
+from pywinauto.windows.uia_element_info import UIAElementInfo
 from pywinauto.findwindows import WindowNotFoundError
 from pywinauto.findwindows import WindowAmbiguousError
 from pywinauto.timings import Timings
@@ -91,6 +95,85 @@ class FindWindowsTestCases(unittest.TestCase):
         self.assertRaises(WindowNotFoundError, find_windows,
                           pid=self.app.process, class_name='FakeClassName', found_index=1)
 
+    def test_find_elements_by_criteria(self):
+        """Test if precompiled criteria find the same elements as the keywords"""
+        parent = self.dlg.find().element_info
+        criteria = Criteria(backend='win32', class_name_re='Edit|Button', visible=True, top_level_only=False)
+
+        self.assertEqual(find_elements(criteria=criteria, parent=parent),
+                         find_elements(backend='win32', class_name_re='Edit|Button', visible=True,
+                                       top_level_only=False, parent=parent))
+        self.assertEqual(find_elements(criteria=criteria, parent=parent)[1:2],
+                         find_elements(criteria=criteria, parent=parent, found_index=1))
+
+    def test_find_element_lazily(self):
+        """Test if find_element() stopping at the first matches finds the same elements"""
+        UIAElementInfo.use_raw_view_walker = True
+        try:
+            parent = find_element(backend='uia', pid=self.app.process)
+            elements = find_elements(backend='uia', parent=parent, control_type='Button', top_level_only=False)
+            self.assertEqual(elements[1], find_element(backend='uia', parent=parent, control_type='Button',
+                                                       top_level_only=False, found_index=1))
+            self.assertRaises(ElementAmbiguousError, find_element,
+                              backend='uia', parent=parent, control_type='Button', top_level_only=False)
+        finally:
+            UIAElementInfo.use_raw_view_walker = False
+
+    def test_find_elements_by_selector(self):
+        """Test if a selector finds the same elements as the chained searches"""
+        dlg = find_element(backend='win32', pid=self.app.process)
+        self.assertEqual(find_elements(backend='win32', parent=dlg, class_name='Button', top_level_only=False),
+                         find_elements(backend='win32', parent=dlg, selector='*[class_name=Button]'))
+        self.assertEqual([dlg], find_elements(backend='win32', pid=self.app.process,
+                                              selector='> *[class_name="#32770"]'))
+        self.assertEqual(find_elements(backend='win32', parent=dlg, class_name='Button', top_level_only=False)[1:2],
+                         find_elements(backend='win32', parent=dlg, selector='*[class_name=Button]:nth(1)'))
+
+
+class CriteriaTestCases(unittest.TestCase):
+
+    """Unit tests for the Criteria class"""
+
+    def test_filters_order(self):
+        """Test if the filters are compiled in the search order of the backend"""
+        criteria = Criteria(backend='win32', name='OK', class_name_re='Button', control_id=1)
+        self.assertEqual(['class_name_re', 'control_id', 'name'], [prop for prop, _ in criteria.filters])
+
+    def test_filters_cost_order(self):
+        """Test if the filters of the expensive properties are moved to the end"""
+        criteria = Criteria(backend='uia', control_id=1, visible=True, control_type='Button')
+        self.assertEqual(['control_type', 'visible', 'control_id'], [prop for prop, _ in criteria.filters])
+
+    def test_adaptive_filters_order(self):
+        """Test if the filters are reordered by the observed selectivity"""
+        class Element(object):
+            def __init__(self, control_id):
+                self.class_name = 'Button'
+                self.control_id = control_id
+
+        elements = [Element(i % 10) for i in range(1000)]
+        criteria = Criteria(backend='win32', class_name_re='Button', control_id=1)
+        expected = [elem for elem in elements if criteria.match(elem)]
+
+        criteria.adaptive_order = True
+        self.assertEqual(expected, [elem for elem in elements if criteria.match(elem)])
+        self.assertEqual(['control_id', 'class_name_re'], [prop for prop, _ in criteria.filters])
+
+    def test_renamed_keywords(self):
+        """Test if the renamed keywords are replaced once on compiling"""
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            criteria = Criteria(backend='win32', title='OK', visible_only=False)
+            criteria.copy(found_index=1)
+        self.assertEqual({'name': 'OK', 'visible': None}, criteria.props)
+        self.assertEqual(2, len(caught))
+
+    def test_incorrect_keywords(self):
+        """Test if incorrect keywords are reported on compiling"""
+        self.assertRaises(KeyError, Criteria, backend='win32', unknown='OK')
+        self.assertRaises(KeyError, Criteria, backend='win32', pid_re='1')
+        self.assertRaises(ValueError, Criteria, backend='win32', name='OK', name_re='O')
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -32,6 +32,8 @@
 """Tests for class FuzzyDict"""
 import unittest
 import sys
+import difflib
+import threading
 from collections import OrderedDict
 
 sys.path.append(".")
@@ -94,6 +96,124 @@ class FuzzyTestCase(unittest.TestCase):
         self.assertEqual(324, fd2[1])
         self.assertRaises(KeyError, fd2.__getitem__, 23)
 
+    def test_scorer(self):
+        """Test lookups with the Levenshtein scorer"""
+        fd = FuzzyDict(self.test_dict, scorer = 'levenshtein')
+
+        self.assertEqual(self.test_dict[u"Hiya"], fd[u'Hiy'])
+        self.assertEqual(self.test_dict[u"test3"], fd[u'test'])
+        self.assertEqual(324, fd[1])
+        self.assertEqual(False, fd.__contains__(u'FuzzyWuzzy'))
+        self.assertEqual(False, fd.__contains__(23))
+
+
+class FuzzyDictIndexTestCase(unittest.TestCase):
+
+    """Benchmark the indexed lookups on 10k keys"""
+
+    def setUp(self):
+        """Count the calculated ratios"""
+        self.ratio = difflib.SequenceMatcher.ratio
+        self.ratio_count = 0
+
+        def ratio(matcher):
+            self.ratio_count += 1
+            return self.ratio(matcher)
+        difflib.SequenceMatcher.ratio = ratio
+
+        self.fd = FuzzyDict((u"Item{0}".format(i) + u"Edit" * (i % 7), i) for i in range(10000))
+
+    def tearDown(self):
+        """Restore SequenceMatcher"""
+        difflib.SequenceMatcher.ratio = self.ratio
+
+    def _find_best_match(self, lookfor):
+        """Return the first key with the best ratio scanning all the keys"""
+        best_ratio, best_key = 0, None
+        for key in self.fd:
+            ratio = self.ratio(difflib.SequenceMatcher(None, lookfor, key))
+            if ratio > best_ratio:
+                best_ratio, best_key = ratio, key
+        return best_key
+
+    def test_exact_match(self):
+        """No ratio is calculated for a key in the dictionary"""
+        self.assertEqual(44, self.fd[u"Item44EditEdit"])
+        self.assertEqual(0, self.ratio_count)
+
+    def test_length_buckets(self):
+        """Only the keys of close lengths are scored"""
+        for lookfor in [u"Item44EdiEdit", u"Item9999EditEditEditEditEdt", u"Item1234"]:
+            self.ratio_count = 0
+            self.assertEqual(self.fd[self._find_best_match(lookfor)], self.fd[lookfor])
+            self.assertLess(self.ratio_count, len(self.fd) // 2)
+
+    def test_index_update(self):
+        """The length index follows the changes of the dictionary"""
+        del self.fd[u"Item44EditEdit"]
+        self.assertEqual(9999, sum(len(keys) for keys in self.fd._keys_by_length.values()))
+        self.fd[u"Item44EdtEdit"] = -44
+        self.assertIn(u"Item44EdtEdit", self.fd._keys_by_length[13])
+        self.fd.pop(u"Item44EdtEdit")
+        self.fd.clear()
+        self.fd[u"Item"] = 0
+        self.assertEqual({4: [u"Item"]},
+                         dict((length, list(keys)) for length, keys in self.fd._keys_by_length.items()))
+        self.assertEqual({u"Ite": {u"Item": 1}, u"tem": {u"Item": 1}}, self.fd._trigram_keys)
+
+    def test_memo(self):
+        """A lookup is not repeated until the dictionary is changed"""
+        self.assertEqual(True, u"Item44EdiEdit" in self.fd)
+        ratio_count = self.ratio_count
+        self.assertEqual(44, self.fd[u"Item44EdiEdit"])
+        self.assertEqual(ratio_count, self.ratio_count)
+
+        self.fd[u"Item44EdiEdit2"] = -44
+        self.assertEqual(44, self.fd[u"Item44EdiEdit"])
+        self.assertGreater(self.ratio_count, ratio_count)
+
+    def test_memo_move_to_end(self):
+        """The order of the keys breaks the ties, so it's not memorized across move_to_end()"""
+        fd = FuzzyDict(OrderedDict([(u"abcdX", 1), (u"abcdY", 2)]))
+        self.assertEqual(1, fd[u"abcdZ"])
+        fd.move_to_end(u"abcdX")
+        self.assertEqual(2, fd[u"abcdZ"])
+
+    def test_get_many(self):
+        """Look up several items at once"""
+        lookfors = [u"Item44EdiEdit", u"Item44EditEdit", u"Item5EditEditEditEditEdit", u"qwerty"]
+        self.assertEqual([44, 44, 5, -1], self.fd.get_many(lookfors, default = -1))
+
+    def test_threads(self):
+        """Concurrent changes and lookups keep the indexes consistent"""
+        errors = []
+
+        def change(start):
+            for i in range(start, 10000, 4):
+                del self.fd[u"Item{0}".format(i) + u"Edit" * (i % 7)]
+                self.fd[u"Key{0}".format(i)] = i
+
+        def look_up():
+            for i in range(50):
+                try:
+                    self.fd.get_many([u"Itm{0}".format(i), u"Ky{0}".format(i)])
+                except Exception as e:
+                    errors.append(e)
+
+        threads = [threading.Thread(target=change, args=(i,)) for i in range(4)]
+        threads += [threading.Thread(target=look_up) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([], errors)
+        self.assertEqual(10000, len(self.fd))
+        self.assertEqual(sorted(self.fd), sorted(key for keys in self.fd._keys_by_length.values() for key in keys))
+        self.assertEqual(len(self.fd._trigram_keys[u"Key"]), 10000)
+        self.assertNotIn(u"Ite", self.fd._trigram_keys)
+        self.assertEqual(1234, self.fd[u"Kye1234"])
+
 
 if __name__ == '__main__':
     unittest.main()
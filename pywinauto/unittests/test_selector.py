@@ -0,0 +1,162 @@
+# GUI Application automation and testing library
+# Copyright (C) 2006-2018 Mark Mc Mahon and Contributors
+# https://github.com/pywinauto/pywinauto/graphs/contributors
+# http://pywinauto.readthedocs.io/en/latest/credits.html
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of pywinauto nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Tests for selector.py"""
+import re
+import sys
+import unittest
+
+sys.path.append(".")
+from pywinauto.selector import Selector, SelectorStep, SelectorSyntaxError, compile_selector
+from pywinauto.selector import CHILD, DESCENDANT
+
+
+class _Element(object):
+
+    """An element of a synthetic tree counting the visited elements"""
+
+    def __init__(self, control_type, name='', children=(), visited=None):
+        self.control_type = control_type
+        self.name = name
+        self.children = list(children)
+        self.visited = visited
+
+    def iter_tree_children(self):
+        for child in self.children:
+            if self.visited is not None:
+                self.visited.append(child)
+            child.visited = self.visited
+            yield child
+
+
+def _get_matchers(selector):
+    """Return the functions matching the steps by the exact and regex properties"""
+    def get_matcher(props):
+        def matcher(elem):
+            for key, value in props.items():
+                if key.endswith('_re'):
+                    if not re.match(value, getattr(elem, key[:-3])):
+                        return False
+                elif getattr(elem, key) != value:
+                    return False
+            return True
+        return matcher
+    return [get_matcher(step.props) for step in selector.steps]
+
+
+class SelectorParserTests(unittest.TestCase):
+
+    """Unit tests for parsing of the selectors"""
+
+    def test_steps(self):
+        """Test if the selector is parsed to the steps"""
+        steps = Selector('Frame[name="Editor"] > Panel PushButton[name~="^Save"]:nth(0)').steps
+        self.assertEqual([(DESCENDANT, {'control_type': 'Frame', 'name': 'Editor'}, None),
+                          (CHILD, {'control_type': 'Panel'}, None),
+                          (DESCENDANT, {'control_type': 'PushButton', 'name_re': '^Save'}, 0)],
+                         [(step.combinator, step.props, step.nth) for step in steps])
+
+    def test_values(self):
+        """Test if the values are unquoted and converted"""
+        step = Selector('>*[name="a \\"b\\" ]"][auto_id=\'x\'][visible=true][enabled=false][pid=12][class_name=Edit]')\
+            .steps[0]
+        self.assertEqual(CHILD, step.combinator)
+        self.assertEqual({'name': 'a "b" ]', 'auto_id': 'x', 'visible': True, 'enabled': False,
+                          'pid': 12, 'class_name': 'Edit'}, step.props)
+
+    def test_syntax_errors(self):
+        """Test if the wrong selectors are reported"""
+        for text in ('', 'Frame >', 'Frame[name]', 'Frame[name="a"', 'Frame[name="a]', 'Frame!',
+                     'Frame:nth(x)', 'Frame[name=a][name=b]', '[=a]'):
+            self.assertRaises(SelectorSyntaxError, Selector, text)
+
+    def test_cache(self):
+        """Test if the parsed selectors are reused"""
+        self.assertTrue(compile_selector('Frame > Panel') is compile_selector('Frame > Panel'))
+
+    def test_repr(self):
+        """Test the representations of the selector and the step"""
+        self.assertEqual("Selector('Frame')", repr(Selector(str('Frame'))).replace("u'", "'"))
+        self.assertTrue(repr(SelectorStep(CHILD, {})).startswith('SelectorStep('))
+
+
+class SelectorWalkTests(unittest.TestCase):
+
+    """Unit tests for the tree walk of the selectors"""
+
+    def setUp(self):
+        """Build a tree"""
+        self.save = _Element('Button', 'Save')
+        self.save_as = _Element('Button', 'Save as')
+        self.cancel = _Element('Button', 'Cancel')
+        self.deep_save = _Element('Button', 'Save deep')
+        self.panel = _Element('Panel', children=[self.save, _Element('Panel', children=[self.deep_save])])
+        self.frame = _Element('Frame', 'Editor', children=[self.panel, self.save_as, self.cancel])
+        self.other = _Element('Frame', 'Other', children=[_Element('Panel', children=[_Element('Button', 'Save')])])
+        self.visited = []
+        self.root = _Element('Desktop', children=[self.frame, self.other], visited=self.visited)
+
+    def select(self, text, depth=None):
+        selector = Selector(text)
+        return list(selector.iter_elements(self.root, _get_matchers(selector), depth))
+
+    def test_descendant_and_child(self):
+        """Test if the combinators select descendants and children"""
+        self.assertEqual([self.save, self.deep_save, self.save_as],
+                         self.select('Frame[name="Editor"] Button[name~="Save"]'))
+        self.assertEqual([self.save_as], self.select('Frame[name="Editor"] > Button[name~="Save"]'))
+        self.assertEqual([self.save], self.select('Frame[name="Editor"] > Panel > Button'))
+        self.assertEqual([self.save, self.deep_save], self.select('Frame[name="Editor"] > Panel Button'))
+
+    def test_nth(self):
+        """Test if nth takes an element of the matched ones in the tree order"""
+        self.assertEqual([self.deep_save], self.select('Frame[name="Editor"] Button:nth(1)'))
+        self.assertEqual([self.save], self.select('Panel:nth(0) > Button'))
+        self.assertEqual([], self.select('Button:nth(10)'))
+
+    def test_walk_is_bounded(self):
+        """Test if the subtrees which can't match are not walked"""
+        self.assertEqual([self.save_as], self.select('> Frame[name="Editor"] > Button[name~="Save"]'))
+        # the children of the desktop and of the matched frame only
+        self.assertEqual([self.frame, self.panel, self.save_as, self.cancel, self.other], self.visited)
+
+        del self.visited[:]
+        self.assertEqual([self.save], self.select('Button[name="Save"]:nth(0)'))
+        self.assertEqual([self.frame, self.panel, self.save], self.visited)
+
+    def test_depth(self):
+        """Test if the walk is limited by the depth"""
+        self.assertEqual([self.save_as], self.select('Button[name~="Save"]', depth=2))
+        self.assertTrue(all(elem not in self.visited for elem in (self.save, self.deep_save)))
+
+
+if __name__ == "__main__":
+    unittest.main()
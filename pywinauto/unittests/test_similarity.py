@@ -0,0 +1,155 @@
+# GUI Application automation and testing library
+# Copyright (C) 2006-2018 Mark Mc Mahon and Contributors
+# https://github.com/pywinauto/pywinauto/graphs/contributors
+# http://pywinauto.readthedocs.io/en/latest/credits.html
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of pywinauto nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Tests for similarity.py"""
+import unittest
+import random
+import sys
+
+sys.path.append(".")
+from pywinauto import similarity
+
+
+def _levenshtein_distance(text1, text2):
+    """Calculate the edit distance by the classic dynamic programming"""
+    previous = list(range(len(text2) + 1))
+    for i, char1 in enumerate(text1, 1):
+        current = [i]
+        for j, char2 in enumerate(text2, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char1 != char2)))
+        previous = current
+    return previous[-1]
+
+
+class LevenshteinScorerTests(unittest.TestCase):
+
+    """Unit tests for the LevenshteinScorer class"""
+
+    def setUp(self):
+        """Generate random texts of a few chars"""
+        random.seed(0)
+        self.texts = [''.join(random.choice('abcAB &1') for _ in range(random.randint(0, 70)))
+                      for _ in range(100)]
+        self.scorer = similarity.LevenshteinScorer()
+
+    def test_distances(self):
+        """The distances are the same as with the dynamic programming"""
+        for search_text in ['', 'a', 'Abc 1', 'abcab' * 10, 'ab&' * 30] + self.texts[:10]:
+            self.assertEqual([_levenshtein_distance(search_text, text) for text in self.texts],
+                             self.scorer.distances(search_text, self.texts))
+
+    def test_pure_python_distances(self):
+        """The distances are the same without NumPy"""
+        numpy = similarity.numpy
+        similarity.numpy = None
+        try:
+            for search_text in self.texts[:10]:
+                self.assertEqual([_levenshtein_distance(search_text, text) for text in self.texts],
+                                 self.scorer.distances(search_text, self.texts))
+        finally:
+            similarity.numpy = numpy
+
+    def test_ratios(self):
+        """The ratios are calibrated"""
+        self.assertEqual([1.0, 0.0, 1.0], self.scorer.ratios('abc', ['abc', 'xyz', 'abc']))
+        self.assertEqual([1.0], self.scorer.ratios('', ['']))
+        self.assertAlmostEqual(.588, self.scorer.ratio('abcd', 'abxy'))
+        self.assertAlmostEqual(.5, self.scorer.raw_ratios('abcd', ['abxy'])[0])
+
+
+class TrigramBoundTests(unittest.TestCase):
+
+    """Unit tests for the trigram upper bound of SequenceMatcher ratio"""
+
+    def test_bound(self):
+        """The bound is never below the ratio"""
+        random.seed(1)
+        texts = [''.join(random.choice('abcd ') for _ in range(random.randint(0, 30))) for _ in range(60)]
+        scorer = similarity.SequenceMatcherScorer()
+        for text1 in texts:
+            trigrams1 = similarity.get_trigrams(text1)
+            for text2, ratio in zip(texts, scorer.ratios(text1, texts)):
+                trigrams2 = similarity.get_trigrams(text2)
+                shared = sum(min(count, trigrams2.get(trigram, 0)) for trigram, count in trigrams1.items())
+                self.assertGreaterEqual(similarity.trigram_ratio_bound(shared, len(text1), len(text2)), ratio)
+
+
+class CalibrationTests(unittest.TestCase):
+
+    """Unit tests for the calibration tables"""
+
+    def test_table(self):
+        """The Levenshtein table is monotonic from (0, 0) to (1, 1)"""
+        table = similarity.LevenshteinScorer.calibration
+        self.assertEqual((0.0, 0.0), table[0])
+        self.assertEqual((1.0, 1.0), table[-1])
+        for (x1, y1), (x2, y2) in zip(table, table[1:]):
+            self.assertLess(x1, x2)
+            self.assertLessEqual(y1, y2)
+
+    def test_calibrate(self):
+        """A calibration table maps the ratios to the reference scale"""
+        pairs = [('OKButton', 'OK'), ('Edit', 'Edit2'), ('Cancel', 'CancelButton'),
+                 ('File', 'Fiel'), ('Name', 'NameEdit'), ('abc', 'xyz')]
+        table = similarity.calibrate(similarity.SequenceMatcherScorer(), pairs, points=5)
+        self.assertEqual(5, len(table))
+        self.assertEqual((0.0, 0.0), table[0])
+        self.assertEqual((1.0, 1.0), table[-1])
+        self.assertEqual(sorted(table), list(table))
+
+
+class ScorerSelectionTests(unittest.TestCase):
+
+    """Unit tests for choosing the scorer"""
+
+    def tearDown(self):
+        """Restore the default scorer"""
+        similarity.set_default_scorer('difflib')
+
+    def test_get_scorer(self):
+        """Scorers are got by name or as is"""
+        scorer = similarity.LevenshteinScorer()
+        self.assertIs(scorer, similarity.get_scorer(scorer))
+        self.assertIs(similarity.scorers['levenshtein'], similarity.get_scorer('levenshtein'))
+        self.assertIsInstance(similarity.get_scorer(), similarity.SequenceMatcherScorer)
+        self.assertRaises(ValueError, similarity.get_scorer, 'unknown')
+
+    def test_set_default_scorer(self):
+        """The default scorer is used if a scorer is not specified"""
+        similarity.set_default_scorer('levenshtein')
+        self.assertIs(similarity.scorers['levenshtein'], similarity.get_scorer())
+        self.assertRaises(ValueError, similarity.set_default_scorer, 'unknown')
+        self.assertIs(similarity.scorers['levenshtein'], similarity.get_scorer())
+
+
+if __name__ == "__main__":
+    unittest.main()
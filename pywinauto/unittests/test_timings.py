@@ -0,0 +1,264 @@
+# GUI Application automation and testing library
+# Copyright (C) 2006-2018 Mark Mc Mahon and Contributors
+# https://github.com/pywinauto/pywinauto/graphs/contributors
+# http://pywinauto.readthedocs.io/en/latest/credits.html
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of pywinauto nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Tests for the waits and the settings of timings.py"""
+import sys
+import time
+import unittest
+from threading import Thread
+
+sys.path.append(".")
+from pywinauto.timings import Timings  # noqa: E402
+from pywinauto.timings import TimeoutError  # noqa: E402
+from pywinauto.timings import timestamp  # noqa: E402
+from pywinauto.timings import wait_until  # noqa: E402
+from pywinauto.timings import wait_until_passes  # noqa: E402
+from pywinauto.timings import ChangeNotifier  # noqa: E402
+from pywinauto.timings import RetryPolicy  # noqa: E402
+from pywinauto.timings import ExponentialRetryPolicy  # noqa: E402
+from pywinauto.timings import CostAwareRetryPolicy  # noqa: E402
+
+
+class ChangeNotifierTests(unittest.TestCase):
+
+    """Unit tests for the event driven wait_until and wait_until_passes"""
+
+    def setUp(self):
+        """Set the state of the test"""
+        Timings.defaults()
+        self.notifier = ChangeNotifier(lambda: True)
+        self.changed = False
+
+    def tearDown(self):
+        """Restore the timings"""
+        Timings.defaults()
+
+    def change_later(self, delay=0.1):
+        """Change the state in a thread and notify about it"""
+        def change():
+            time.sleep(delay)
+            self.changed = True
+            self.notifier.notify()
+        thread = Thread(target=change)
+        thread.start()
+        return thread
+
+    def test_wait(self):
+        """Test waiting for a change after the version"""
+        version = self.notifier.version
+        self.assertFalse(self.notifier.wait(version, 0.01))
+        self.notifier.notify()
+        self.assertTrue(self.notifier.wait(version, 0))
+        self.assertEqual(self.notifier.version, version + 1)
+
+    def test_wait_until_wakes_up_on_change(self):
+        """Test wait_until() checks the condition after a change, not after notifier_poll_interval"""
+        Timings.notifier_poll_interval = 4
+        thread = self.change_later()
+        start = timestamp()
+        self.assertTrue(wait_until(5, 0.01, lambda: self.changed, notifier=self.notifier))
+        self.assertLess(timestamp() - start, 2)
+        thread.join()
+
+    def test_wait_until_passes_wakes_up_on_change(self):
+        """Test wait_until_passes() retries after a change, not after notifier_poll_interval"""
+        Timings.notifier_poll_interval = 4
+        def check():
+            if not self.changed:
+                raise ValueError("not changed yet")
+            return "changed"
+        thread = self.change_later()
+        start = timestamp()
+        self.assertEqual(wait_until_passes(5, 0.01, check, ValueError, notifier=self.notifier), "changed")
+        self.assertLess(timestamp() - start, 2)
+        thread.join()
+
+    def test_wait_until_polls_without_events(self):
+        """Test the condition is still checked every notifier_poll_interval"""
+        Timings.notifier_poll_interval = 0.05
+        start = timestamp()
+        self.assertTrue(wait_until(5, 0.01, lambda: timestamp() - start > 0.2, notifier=self.notifier))
+        self.assertLess(timestamp() - start, 2)
+        self.assertRaises(TimeoutError, wait_until, 0.2, 0.01, lambda: False, notifier=self.notifier)
+
+    def test_wait_until_polls_if_not_live(self):
+        """Test the condition is checked every retry_interval if the event source isn't live"""
+        Timings.notifier_poll_interval = 4
+        for notifier in [ChangeNotifier(), ChangeNotifier(lambda: False)]:
+            self.assertFalse(notifier.live)
+            start = timestamp()
+            self.assertTrue(wait_until(5, 0.01, lambda: timestamp() - start > 0.2, notifier=notifier))
+            self.assertLess(timestamp() - start, 2)
+        self.assertTrue(self.notifier.live)
+
+    def test_checks_rate_limited(self):
+        """Test a burst of changes doesn't make the checks more frequent than retry_interval"""
+        calls = []
+        stop = []
+
+        def notify_often():
+            while not stop:
+                self.notifier.notify()
+                time.sleep(0.001)
+        thread = Thread(target=notify_often)
+        thread.start()
+        try:
+            self.assertRaises(TimeoutError, wait_until, 0.5, 0.1, lambda: calls.append(1), notifier=self.notifier)
+        finally:
+            stop.append(1)
+            thread.join()
+        self.assertTrue(3 <= len(calls) <= 7)
+
+
+class RetryPolicyTests(unittest.TestCase):
+
+    """Unit tests for the retry policies of wait_until and wait_until_passes"""
+
+    def setUp(self):
+        """Set the default timings"""
+        Timings.defaults()
+
+    def tearDown(self):
+        """Restore the timings"""
+        Timings.defaults()
+
+    def test_intervals(self):
+        """Test the intervals of the policies"""
+        fixed = RetryPolicy()
+        fixed.add_attempt(0.3)
+        self.assertEqual(fixed.get_interval(0.09), 0.09)
+
+        exponential = ExponentialRetryPolicy()
+        exponential.jitter = 0
+        intervals = []
+        for _ in range(6):
+            exponential.add_attempt(0)
+            intervals.append(exponential.get_interval(0.1))
+        self.assertEqual(intervals, [0.1, 0.2, 0.4, 0.8, 1., 1.])
+        exponential.jitter = 0.5
+        self.assertTrue(0.5 <= exponential.get_interval(0.1) <= 1.)
+
+        cost_aware = CostAwareRetryPolicy()
+        cost_aware.add_attempt(0.3)
+        self.assertEqual(cost_aware.get_interval(0.09), 0.3)
+        cost_aware.add_attempt(0.01)
+        self.assertEqual(cost_aware.get_interval(0.09), 0.09)
+
+    def test_attempts_report(self):
+        """Test the policy counts the attempts and the time inside the function"""
+        calls = []
+
+        def slow_check():
+            calls.append(1)
+            time.sleep(0.05)
+            if len(calls) < 3:
+                raise ValueError("not yet")
+            return len(calls)
+
+        policy = CostAwareRetryPolicy()
+        self.assertEqual(wait_until_passes(5, 0.01, slow_check, ValueError, retry_policy=policy), 3)
+        self.assertEqual(policy.attempts, 3)
+        self.assertTrue(0.15 <= policy.func_time < 1)
+
+        with self.assertRaises(TimeoutError) as context:
+            wait_until(0.3, 0.01, lambda: False, retry_policy='exponential')
+        self.assertIsInstance(context.exception.retry_policy, ExponentialRetryPolicy)
+        self.assertTrue(context.exception.retry_policy.attempts > 1)
+
+    def test_policy_selection(self):
+        """Test the policy is selected by Timings.retry_policy and per call"""
+        Timings.retry_policy = 'cost_aware'
+        with self.assertRaises(TimeoutError) as context:
+            wait_until_passes(0.1, 0.01, lambda: 1 / 0, ZeroDivisionError)
+        self.assertIsInstance(context.exception.retry_policy, CostAwareRetryPolicy)
+
+        with self.assertRaises(TimeoutError) as context:
+            wait_until_passes(0.1, 0.01, lambda: 1 / 0, ZeroDivisionError, retry_policy=RetryPolicy)
+        self.assertEqual(type(context.exception.retry_policy), RetryPolicy)
+
+        self.assertRaises(ValueError, wait_until, 0.1, 0.01, lambda: True, retry_policy='unknown')
+
+        Timings.slow()
+        self.assertEqual(Timings.retry_policy, 'cost_aware')
+
+
+class TimeConfigTests(unittest.TestCase):
+
+    """Unit tests for the Timings object"""
+
+    def setUp(self):
+        """Set the default timings"""
+        Timings.defaults()
+
+    def tearDown(self):
+        """Restore the timings"""
+        Timings.defaults()
+
+    def test_access(self):
+        """Test reading and setting the timings"""
+        self.assertEqual(Timings.after_click_wait, .09)
+        Timings.after_click_wait = 1
+        self.assertEqual(Timings.after_click_wait, 1)
+        Timings.fast()
+        self.assertEqual(Timings.window_find_retry, .001)
+        Timings.defaults()
+        self.assertEqual(Timings.after_click_wait, .09)
+
+        self.assertRaises(AttributeError, getattr, Timings, "unknown_wait")
+        self.assertRaises(AttributeError, setattr, Timings, "unknown_wait", 1)
+
+    def test_override(self):
+        """Test the timings are overridden in the current thread only"""
+        values = []
+        with Timings.override(after_click_wait=0, window_find_timeout=1):
+            self.assertEqual(Timings.after_click_wait, 0)
+            self.assertEqual(Timings.window_find_timeout, 1)
+            self.assertEqual(Timings.window_find_retry, .09)
+
+            with Timings.override(after_click_wait=2):
+                self.assertEqual(Timings.after_click_wait, 2)
+                self.assertEqual(Timings.window_find_timeout, 1)
+            self.assertEqual(Timings.after_click_wait, 0)
+
+            thread = Thread(target=lambda: values.append(Timings.after_click_wait))
+            thread.start()
+            thread.join()
+        self.assertEqual(values, [.09])
+        self.assertEqual(Timings.after_click_wait, .09)
+        self.assertEqual(Timings.window_find_timeout, 5)
+
+        with self.assertRaises(AttributeError):
+            with Timings.override(unknown_wait=0):
+                pass
+
+
+if __name__ == "__main__":
+    unittest.main()
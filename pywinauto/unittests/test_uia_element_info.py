@@ -9,6 +9,7 @@ from pywinauto.handleprops import processid  # noqa: E402
 from pywinauto.sysinfo import is_x64_Python  # noqa: E402
 from pywinauto.sysinfo import UIA_support  # noqa: E402
 from pywinauto.timings import Timings  # noqa: E402
+from pywinauto.findwindows import find_elements  # noqa: E402
 
 if UIA_support:
     from pywinauto.windows.uia_element_info import UIAElementInfo
@@ -81,6 +82,15 @@ if UIA_support:
             """Test get AcceleratorKey value"""
             self.assertEqual(self.ctrl.accelerator, "")
 
+        def test_search_reads_actual_values(self):
+            """Test find_elements() doesn't switch the UIA elements to the cached properties"""
+            self.assertFalse(UIAElementInfo.search_cache_enable)
+            with mock.patch.object(UIAElementInfo, 'set_cache_strategy', autospec=True,
+                                   side_effect=UIAElementInfo.set_cache_strategy) as mock_set_cache:
+                elements = find_elements(backend="uia", parent=self.ctrl, top_level_only=False)
+            self.assertNotEqual(elements, [])
+            self.assertNotIn(True, [call[1].get('cached') for call in mock_set_cache.call_args_list])
+
         def testChildren(self):
             """Test whether a list of only immediate children of the element is equal"""
             self.assertEqual(len(self.ctrl.children()), 5)
@@ -147,6 +157,12 @@ if UIA_support:
             self.assertIsNotNone(slider)
             self.assertIn(slider, self.ctrl.descendants())
 
+        def test_depth_with_criteria_same_as_walk(self):
+            """Test the depth of the server-side matches is the same as of the walked descendants"""
+            for depth in (2, 3):
+                walked = [elem for elem in self.ctrl.descendants(depth=depth) if elem.control_type == "Text"]
+                self.assertEqual(self.ctrl.descendants(control_type="Text", depth=depth), walked)
+
         def test_descendants_generator(self):
             """Test whether descendant generator iterates over correct elements"""
             descendants = [desc for desc in self.ctrl.iter_descendants(depth=3)]
@@ -39,7 +39,7 @@ from .uia_defines import IUIA
 from .uia_defines import get_elem_interface, NoPatternInterfaceError
 
 from pywinauto.handleprops import dumpwindow, controlid
-from pywinauto.element_info import ElementInfo
+from pywinauto.element_info import ElementInfo, PROP_COST_IPC, PROP_COST_MULTI_IPC
 from .win32structures import RECT
 
 
@@ -89,6 +89,19 @@ class UIAElementInfo(ElementInfo):
                     "legacy_shortcut", "legacy_value"]
     assert set(re_props + exact_only_props) == set(search_order)
 
+    # the search doesn't use the UIA cache, so every property is a COM call at least
+    prop_costs = {prop: PROP_COST_IPC for prop in search_order}
+    prop_costs.update({
+        "control_id": PROP_COST_MULTI_IPC,
+        "value": PROP_COST_MULTI_IPC,
+        "legacy_action": PROP_COST_MULTI_IPC,
+        "legacy_descr": PROP_COST_MULTI_IPC,
+        "legacy_help": PROP_COST_MULTI_IPC,
+        "legacy_name": PROP_COST_MULTI_IPC,
+        "legacy_shortcut": PROP_COST_MULTI_IPC,
+        "legacy_value": PROP_COST_MULTI_IPC,
+    })
+
     renamed_props = {
         "title": ("name", None),
         "title_re": ("name_re", None),
@@ -431,6 +444,11 @@ class UIAElementInfo(ElementInfo):
                 yield UIAElementInfo(element)
                 element = tree_walker.GetNextSiblingElement(element)
 
+    @property
+    def ordered_iter_descendants(self):
+        """Return True if iter_descendants() walks the same view as descendants()"""
+        return UIAElementInfo.use_raw_view_walker
+
     def iter_descendants(self, **kwargs):
         """Iterate over descendants of the element"""
         cache_enable = kwargs.pop('cache_enable', False)
@@ -486,24 +504,38 @@ class UIAElementInfo(ElementInfo):
                 return self._get_elements(IUIA().tree_scope["descendants"], cond, cache_enable)
             if depth == 1:
                 return self.children(cache_enable=cache_enable, **kwargs)
+            elif kwargs:
+                # the criteria are matched on the server side by one FindAll call,
+                # only the depth of the matches is checked
+                cond = IUIA().build_condition(**kwargs)
+                elements = self._get_elements(IUIA().tree_scope["descendants"], cond, cache_enable)
+                return [element for element in elements if self._is_within_depth(element, depth)]
             else:
-                if kwargs:
-                    cond = IUIA().build_condition(**kwargs)
-                    elements = self._get_elements(IUIA().tree_scope["descendants"], cond, cache_enable)
-                    return ElementInfo.filter_with_depth(elements, self, depth)
-                else:
-                    descendants = []
-
-                    def walk_the_tree(parent, depth_):
-                        # type: (UIAElementInfo, int) -> None
-                        if depth_ == 0:
-                            return
-                        for child in parent.children(cache_enable=cache_enable):
-                            descendants.append(child)
-                            walk_the_tree(child, depth_ - 1)
-
-                    walk_the_tree(self, depth)
-                    return descendants
+                # the elements deeper than depth are not retrieved at all
+                descendants = []
+
+                def walk_the_tree(parent, depth_):
+                    # type: (UIAElementInfo, int) -> None
+                    if depth_ == 0:
+                        return
+                    for child in parent.children(cache_enable=cache_enable):
+                        descendants.append(child)
+                        walk_the_tree(child, depth_ - 1)
+
+                walk_the_tree(self, depth)
+                return descendants
+
+    def _is_within_depth(self, element, depth):
+        """Return True if the element is a descendant of this element not deeper than depth"""
+        walker = IUIA().iuia.ControlViewWalker
+        parent_elem = walker.GetParentElement(element.element)
+        for _ in range(depth):
+            if not parent_elem:
+                return False
+            if IUIA().iuia.CompareElements(self._element, parent_elem):
+                return True
+            parent_elem = walker.GetParentElement(parent_elem)
+        return False
 
     @property
     def visible(self):
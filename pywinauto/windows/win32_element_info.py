@@ -36,8 +36,9 @@ import win32gui
 
 from pywinauto.windows import win32functions
 from pywinauto.windows import win32structures
+from pywinauto.windows import win32defines
 from pywinauto import handleprops
-from pywinauto.element_info import ElementInfo
+from pywinauto.element_info import ElementInfo, PROP_COST_CACHED, PROP_COST_IPC, PROP_COST_MULTI_IPC
 from pywinauto.windows.remote_memory_block import RemoteMemoryBlock
 
 
@@ -63,6 +64,21 @@ class HwndElementInfo(ElementInfo):
         "auto_id", "control_type", "full_control_type", "rectangle"]
     assert set(re_props + exact_only_props) == set(search_order)
 
+    prop_costs = {
+        "handle": PROP_COST_CACHED,
+        "class_name": PROP_COST_IPC,
+        "pid": PROP_COST_IPC,
+        "control_id": PROP_COST_IPC,
+        "visible": PROP_COST_IPC,
+        "enabled": PROP_COST_IPC,
+        "rectangle": PROP_COST_IPC,
+        "name": PROP_COST_MULTI_IPC,
+        "auto_id": PROP_COST_MULTI_IPC,
+        "control_type": PROP_COST_MULTI_IPC,
+        "full_control_type": PROP_COST_MULTI_IPC,
+    }
+    assert set(prop_costs) == set(search_order)
+
     renamed_props = {
         "title": ("name", None),
         "title_re": ("name_re", None),
@@ -80,6 +96,10 @@ class HwndElementInfo(ElementInfo):
         else:
             self._handle = handle
 
+    def is_alive(self):
+        """Return True if the window still exists"""
+        return handleprops.iswindow(self.handle)
+
     def set_cache_strategy(self, cached):
         """Set a cache strategy for frequently used attributes of the element"""
         pass  # TODO: implement a cache strategy for native elements
@@ -132,6 +152,19 @@ class HwndElementInfo(ElementInfo):
         else:
             return None
 
+    @staticmethod
+    def _is_satisfying_criteria(element, process=None, class_name=None, name=None, control_type=None, **kwargs):
+        """Check if the element satisfies the criteria"""
+        if process is not None and process != element.pid:
+            return False
+        if class_name is not None and class_name != element.class_name:
+            return False
+        if name is not None and name != element.rich_text:
+            return False
+        if control_type is not None and control_type != element.control_type:
+            return False
+        return True
+
     def children(self, **kwargs):
         """Return a list of immediate children of the window"""
         class_name = kwargs.get('class_name', None)
@@ -148,15 +181,8 @@ class HwndElementInfo(ElementInfo):
         def enum_window_proc(hwnd, lparam):
             """Called for each window - adds wrapped elements to a list"""
             element = HwndElementInfo(hwnd)
-            if process is not None and process != element.pid:
-                return True
-            if class_name is not None and class_name != element.class_name:
-                return True
-            if name is not None and name != element.rich_text:
-                return True
-            if control_type is not None and control_type != element.control_type:
-                return True
-            child_elements.append(element)
+            if HwndElementInfo._is_satisfying_criteria(element, process, class_name, name, control_type):
+                child_elements.append(element)
             return True
 
         # define the type of the child procedure
@@ -182,8 +208,24 @@ class HwndElementInfo(ElementInfo):
         for child in self.children(**kwargs):
             yield child
 
+    def iter_tree_children(self):
+        """Iterate over the immediate children of the window (EnumChildWindows lists the sub-tree)"""
+        if self == HwndElementInfo():  # self == root
+            for child in self.children():
+                yield child
+            return
+        hwnd = win32functions.GetWindow(self.handle, win32defines.GW_CHILD)
+        while hwnd:
+            yield HwndElementInfo(hwnd)
+            hwnd = win32functions.GetWindow(hwnd, win32defines.GW_HWNDNEXT)
+
     def descendants(self, **kwargs):
         """Return descendants of the window (all children from sub-tree)"""
+        depth = kwargs.pop('depth', None)
+        self._check_depth(depth)
+        if depth is not None:
+            return self._get_descendants_within_depth(depth, **kwargs)
+
         if self == HwndElementInfo(): # root
             top_elements = self.children()
             child_elements = self.children(**kwargs)
@@ -191,11 +233,35 @@ class HwndElementInfo(ElementInfo):
                 child_elements.extend(child.children(**kwargs))
         else:
             child_elements = self.children(**kwargs)
-        depth = kwargs.pop('depth', None)
-
-        child_elements = ElementInfo.filter_with_depth(child_elements, self, depth)
         return child_elements
 
+    def _get_descendants_within_depth(self, depth, **kwargs):
+        """Return descendants of the window not deeper than depth
+
+        EnumChildWindows lists the whole sub-tree in one call, so the depth
+        of each window is found from the depth of its parent listed before it.
+        Only the windows within the depth are checked against the criteria.
+        """
+        if self == HwndElementInfo(): # root
+            roots = self.children()
+            elements = [(1, root) for root in roots]
+            depth -= 1
+        else:
+            roots = [self]
+            elements = []
+
+        for root in roots:
+            if depth < 1:
+                break
+            levels = {root.handle: 0}
+            for element in root.children():
+                level = levels.get(handleprops.parent(element.handle), depth) + 1
+                levels[element.handle] = level
+                if level <= depth:
+                    elements.append((level, element))
+
+        return [element for _, element in elements if self._is_satisfying_criteria(element, **kwargs)]
+
     @property
     def rectangle(self):
         """Return rectangle of the element"""